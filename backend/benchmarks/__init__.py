@@ -0,0 +1,9 @@
+"""Performance benchmarks for the helpdesk backend.
+
+Run them from the repository root, e.g.::
+
+    python -m backend.benchmarks.bench_ticket_loader
+
+They are plain scripts (not collected by pytest) and build their own
+throwaway SQLite databases under a temporary directory.
+"""
@@ -0,0 +1,110 @@
+"""Auto-assignment throughput and balance for each policy, in memory.
+
+Usage:
+  python -m backend.benchmarks.bench_assignment [--agents 1000] [--tickets 1000000]
+      [--open 50000]
+
+Simulates a help desk in steady state: tickets arrive with a realistic mix of
+priorities and, once --open tickets are in flight, every new ticket closes a
+random open one. Each policy of the AssignmentEngine is compared with a naive
+baseline that scans all agents for the least loaded one, the O(n) approach
+the heap replaces. Reports assignments per second (arrival plus close) and the
+spread of the weighted load across agents at the end.
+"""
+
+import argparse
+import random
+import time
+
+from backend.benchmarks.common import build_db, load_server, temp_db_path
+
+PRIORITY_MIX = (("low", 0.3), ("normal", 0.45), ("high", 0.2), ("urgent", 0.05))
+
+
+class ScanEngine:
+    """Baseline: least loaded (priority weighted) by scanning every agent."""
+
+    def __init__(self, server, agents):
+        self.weights = server.PRIORITY_LOAD
+        self.loads = dict.fromkeys(agents, 0)
+        self.tickets = {}
+
+    def take(self, conn, priority):
+        agent = min(self.loads, key=self.loads.__getitem__)
+        self.loads[agent] += self.weights[priority]
+        return agent
+
+    def bind(self, ticket_id, agent, priority):
+        self.tickets[ticket_id] = (agent, self.weights[priority])
+
+    def forget(self, ticket_id):
+        agent, weight = self.tickets.pop(ticket_id)
+        self.loads[agent] -= weight
+
+
+def simulate(engine, priorities, closes, max_open):
+    open_ids = []
+    start = time.perf_counter()
+    for ticket_id, priority in enumerate(priorities):
+        agent = engine.take(None, priority)
+        engine.bind(ticket_id, agent, priority)
+        open_ids.append(ticket_id)
+        if len(open_ids) > max_open:
+            # Swap-remove a random open ticket: O(1).
+            i = closes[ticket_id] % len(open_ids)
+            open_ids[i], open_ids[-1] = open_ids[-1], open_ids[i]
+            engine.forget(open_ids.pop())
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--agents", type=int, default=1000, help="Agents to balance over"
+    )
+    parser.add_argument(
+        "--tickets", type=int, default=1_000_000, help="Tickets to assign"
+    )
+    parser.add_argument(
+        "--open", type=int, default=50_000, help="Open tickets in steady state"
+    )
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    # The simulation never touches the database; it only needs the module.
+    server = load_server(build_db(temp_db_path("assignment.db"), 0))
+    rng = random.Random(args.seed)
+    names, weights = zip(*PRIORITY_MIX)
+    priorities = rng.choices(names, weights, k=args.tickets)
+    closes = [rng.getrandbits(32) for _ in range(args.tickets)]
+    agents = list(range(1, args.agents + 1))
+
+    candidates = [
+        (name, lambda cls=cls: server.AssignmentEngine(cls()))
+        for name, cls in server.ASSIGNMENT_POLICIES.items()
+    ]
+    candidates.append(("scan", lambda: ScanEngine(server, agents)))
+
+    print(
+        f"{args.agents} agents, {args.tickets} tickets, "
+        f"{args.open} open in steady state"
+    )
+    print(f"{'policy':<16} {'assign/s':>10} {'min':>6} {'max':>6} {'spread':>7}")
+    for name, make in candidates:
+        engine = make()
+        if isinstance(engine, server.AssignmentEngine):
+            engine.rebuild(agents, [])
+        elapsed = simulate(engine, priorities, closes, args.open)
+        # Balance is judged on the priority-weighted load, whatever the policy counts.
+        loads = dict.fromkeys(agents, 0)
+        for ticket_id, (agent, _) in engine.tickets.items():
+            loads[agent] += server.PRIORITY_LOAD[priorities[ticket_id]]
+        low, high = min(loads.values()), max(loads.values())
+        print(
+            f"{name:<16} {args.tickets / elapsed:>10.0f} {low:>6} {high:>6} "
+            f"{high - low:>7}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Closing N tickets one PUT at a time vs a single PATCH /tickets/bulk.
+
+Usage:
+  python -m backend.benchmarks.bench_bulk [--batch 100 500 1000]
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from backend.benchmarks.common import build_db, load_server, temp_db_path
+
+
+async def run(server, batches):
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=300
+    ) as client:
+        r = await client.post(
+            "/auth/login", json={"username": "bench", "password": "bench-pass"}
+        )
+        headers = {"Authorization": f"Bearer {r.json()['token']}"}
+        print(
+            f"{'batch':>6} {'single (ops/s)':>15} {'bulk (ops/s)':>13} {'speedup':>8}"
+        )
+        for size in batches:
+            ids = []
+            for _ in range(2):
+                created = await client.post(
+                    "/tickets/bulk",
+                    json=[{"title": f"t{i}", "priority": "low"} for i in range(size)],
+                    headers=headers,
+                )
+                ids.extend(int(x["ticket"]["id"]) for x in created.json())
+
+            start = time.perf_counter()
+            for tid in ids[:size]:
+                await client.put(
+                    f"/tickets/{tid}",
+                    json={"status": "closed", "assignee_id": 2},
+                    headers=headers,
+                )
+            single = size / (time.perf_counter() - start)
+
+            start = time.perf_counter()
+            await client.patch(
+                "/tickets/bulk",
+                json=[
+                    {"id": tid, "status": "closed", "assignee_id": 2}
+                    for tid in ids[size:]
+                ],
+                headers=headers,
+            )
+            bulk = size / (time.perf_counter() - start)
+            print(f"{size:>6} {single:>15.0f} {bulk:>13.0f} {bulk / single:>7.1f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch", type=int, nargs="+", default=[100, 500, 1000])
+    parser.add_argument(
+        "--tickets", type=int, default=10_000, help="Background tickets in the DB"
+    )
+    args = parser.parse_args()
+    server = load_server(build_db(temp_db_path("bulk.db"), args.tickets))
+    asyncio.run(run(server, args.batch))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""Requests/sec of the API at increasing numbers of concurrent clients.
+
+Usage:
+  python -m backend.benchmarks.bench_concurrency [--clients 10 100 1000]
+  python -m backend.benchmarks.bench_concurrency --url http://localhost:8000
+
+Without --url the app runs in-process through httpx's ASGI transport against
+a throwaway database. Each client loops over GET /tickets?limit=20 (with a
+comment-free field list) until the duration elapses. Run it on two commits to
+compare before/after.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from backend.benchmarks.common import build_db, load_server, percentile, temp_db_path
+
+
+async def drive(
+    client: httpx.AsyncClient, headers: dict, clients: int, duration: float
+):
+    latencies = []
+    errors = 0
+    deadline = time.perf_counter() + duration
+    params = {"limit": 20, "fields": "id,title,status,priority,updatedAt"}
+
+    async def worker():
+        nonlocal errors
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            r = await client.get("/tickets", params=params, headers=headers)
+            latencies.append(time.perf_counter() - start)
+            if r.status_code != 200:
+                errors += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(clients)))
+    return latencies, errors, time.perf_counter() - start
+
+
+async def run(args):
+    if args.url:
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=max(args.clients))
+        )
+        base_url = args.url
+    else:
+        server = load_server(build_db(temp_db_path("concurrency.db"), args.tickets))
+        transport = httpx.ASGITransport(app=server.app)
+        base_url = "http://bench"
+    async with httpx.AsyncClient(
+        transport=transport, base_url=base_url, timeout=120
+    ) as client:
+        r = await client.post(
+            "/auth/login", json={"username": args.username, "password": args.password}
+        )
+        headers = {"Authorization": f"Bearer {r.json()['token']}"}
+        print(
+            f"{'clients':>8} {'req/s':>9} {'p50 (ms)':>9} {'p99 (ms)':>9} {'errors':>7}"
+        )
+        for clients in args.clients:
+            latencies, errors, elapsed = await drive(
+                client, headers, clients, args.duration
+            )
+            print(
+                f"{clients:>8} {len(latencies) / elapsed:>9.1f} "
+                f"{percentile(latencies, 50) * 1000:>9.1f} "
+                f"{percentile(latencies, 99) * 1000:>9.1f} {errors:>7}"
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--clients", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument(
+        "--duration", type=float, default=10.0, help="Seconds per level"
+    )
+    parser.add_argument("--tickets", type=int, default=10_000)
+    parser.add_argument(
+        "--url", default=None, help="Benchmark a running server instead"
+    )
+    parser.add_argument("--username", default="bench")
+    parser.add_argument("--password", default="bench-pass")
+    args = parser.parse_args()
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
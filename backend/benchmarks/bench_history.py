@@ -0,0 +1,99 @@
+"""Point-in-time reads on a ticket with thousands of edits.
+
+Usage:
+  python -m backend.benchmarks.bench_history [--edits 5000] [--reads 500]
+      [--tickets 10000]
+
+Applies --edits updates to one ticket through the data layer, spacing the
+history events one second apart, then rebuilds the ticket as of random
+moments of its life. It is done twice: with the configured
+HELPDESK_HISTORY_SNAPSHOT_EVERY and with snapshots disabled, where every
+read replays the history from the creation. Also reports the update rate
+while the history grows, and the latency of reading one history page.
+"""
+
+import argparse
+import random
+import statistics
+import time
+
+from backend.benchmarks.common import build_db, load_server, temp_db_path
+
+STATUSES = ("open", "in_progress")
+PRIORITIES = ("low", "normal", "high", "urgent")
+
+
+def run(server, conn, edits: int, reads: int, rng: random.Random) -> dict:
+    ticket = server.insert_ticket(
+        conn, server.TicketIn(title="Long lived", priority="low"), 1
+    )
+    tid = int(ticket["id"])
+    start = time.perf_counter()
+    for i in range(edits):
+        data = (
+            {"status": STATUSES[i % 2]}
+            if i % 3
+            else {"priority": PRIORITIES[i % 4], "title": f"Long lived {i}"}
+        )
+        server.apply_ticket_update(conn, tid, data, minimal=True, actor_id=1)
+    write_rate = edits / (time.perf_counter() - start)
+    conn.execute(
+        "UPDATE ticket_events "
+        "SET created_at = datetime('2000-01-01', '+' || version || ' seconds') "
+        "WHERE ticket_id = ?",
+        (tid,),
+    )
+    conn.commit()
+    versions = conn.execute(
+        "SELECT MAX(version) FROM ticket_events WHERE ticket_id = ?", (tid,)
+    ).fetchone()[0]
+
+    samples = []
+    for _ in range(reads):
+        as_of = server.sql_time(946684800 + rng.randint(1, versions))
+        t0 = time.perf_counter()
+        server.ticket_state_as_of(conn, tid, as_of, None)
+        samples.append(time.perf_counter() - t0)
+    t0 = time.perf_counter()
+    server.ticket_history(conn, tid, 100, versions // 2)
+    page = time.perf_counter() - t0
+    samples.sort()
+    return {
+        "versions": versions,
+        "updates/s": write_rate,
+        "as_of p50 ms": statistics.median(samples) * 1000,
+        "as_of max ms": samples[-1] * 1000,
+        "page ms": page * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--edits", type=int, default=5000, help="Updates applied to the ticket"
+    )
+    parser.add_argument("--reads", type=int, default=500, help="Point-in-time reads")
+    parser.add_argument(
+        "--tickets", type=int, default=10_000, help="Background tickets in the DB"
+    )
+    args = parser.parse_args()
+    server = load_server(build_db(temp_db_path("history.db"), args.tickets))
+    conn = server.db_pool.connection()
+
+    configured = server.HISTORY_SNAPSHOT_EVERY
+    print(
+        f"{'snapshots':<16} {'versions':>8} {'updates/s':>10} {'as_of p50 ms':>13} "
+        f"{'as_of max ms':>13} {'page ms':>8}"
+    )
+    for label, every in ((f"every {configured}", configured), ("none", 10**9)):
+        server.HISTORY_SNAPSHOT_EVERY = every
+        r = run(server, conn, args.edits, args.reads, random.Random(1))
+        print(
+            f"{label:<16} {r['versions']:>8} {r['updates/s']:>10.0f} "
+            f"{r['as_of p50 ms']:>13.3f} "
+            f"{r['as_of max ms']:>13.3f} {r['page ms']:>8.3f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
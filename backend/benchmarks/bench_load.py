@@ -0,0 +1,274 @@
+"""Mixed-workload load test of the API with latency percentiles written to JSON.
+
+Usage:
+  python -m backend.benchmarks.bench_load [--concurrency 50] [--duration 30]
+      [--out load.json]
+  python -m backend.benchmarks.bench_load --db base/helpdesk.db
+      --username admin --password admin123
+  python -m backend.benchmarks.bench_load --url http://localhost:8000
+      --compare before.json
+
+A fixed number of clients loop over a weighted mix of operations (login,
+list, create, update, comment) until the duration elapses. Without --url the
+app runs in-process through httpx's ASGI transport, against --db (e.g. one
+generated with `init_db.py --synthetic`) or a throwaway database. The report
+(p50/p95/p99 per operation, throughput, errors, git commit) goes to --out;
+--compare prints the change against an earlier report.
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import subprocess
+import time
+
+import httpx
+
+from backend.benchmarks.common import (
+    REPO_ROOT,
+    build_db,
+    load_server,
+    percentile,
+    temp_db_path,
+)
+
+DEFAULT_MIX = "login=2,list=45,create=10,update=23,comment=20"
+PRIORITIES = ["low", "normal", "high", "urgent"]
+STATUSES = ["open", "in_progress", "resolved", "closed"]
+
+
+def parse_mix(text: str) -> dict:
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight)
+    unknown = set(mix) - {"login", "list", "create", "update", "comment"}
+    if unknown:
+        raise SystemExit(f"Unknown operations in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+        )
+        return out.stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+class Workload:
+    """The operations of the mix; each returns the HTTP response."""
+
+    def __init__(
+        self,
+        client: httpx.AsyncClient,
+        headers: dict,
+        credentials: dict,
+        ticket_ids: list,
+        rng,
+    ):
+        self.client = client
+        self.headers = headers
+        self.credentials = credentials
+        self.ticket_ids = ticket_ids
+        self.rng = rng
+
+    async def login(self):
+        return await self.client.post("/auth/login", json=self.credentials)
+
+    async def list(self):
+        params = {"limit": 50}
+        if self.rng.random() < 0.5:
+            params["status"] = self.rng.choice(STATUSES)
+        return await self.client.get("/tickets", params=params, headers=self.headers)
+
+    async def create(self):
+        ticket = {
+            "title": f"Load test {self.rng.randrange(1_000_000)}",
+            "description": "Generated by bench_load",
+            "priority": self.rng.choice(PRIORITIES),
+        }
+        r = await self.client.post("/tickets", json=ticket, headers=self.headers)
+        if r.status_code == 200:
+            self.ticket_ids.append(int(r.json()["id"]))
+        return r
+
+    async def update(self):
+        ticket_id = self.rng.choice(self.ticket_ids)
+        body = {
+            "status": self.rng.choice(STATUSES),
+            "priority": self.rng.choice(PRIORITIES),
+        }
+        return await self.client.put(
+            f"/tickets/{ticket_id}", json=body, headers=self.headers
+        )
+
+    async def comment(self):
+        ticket_id = self.rng.choice(self.ticket_ids)
+        body = {"text": f"Comentario de carga {self.rng.randrange(1_000_000)}"}
+        return await self.client.post(
+            f"/tickets/{ticket_id}/comments", json=body, headers=self.headers
+        )
+
+
+async def drive(
+    workload: Workload, mix: dict, concurrency: int, duration: float, rng
+) -> tuple:
+    names, weights = list(mix), list(mix.values())
+    latencies = {name: [] for name in names}
+    errors = {name: 0 for name in names}
+    deadline = time.perf_counter() + duration
+
+    async def client_loop():
+        while time.perf_counter() < deadline:
+            name = rng.choices(names, weights)[0]
+            start = time.perf_counter()
+            try:
+                r = await getattr(workload, name)()
+                ok = r.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            latencies[name].append(time.perf_counter() - start)
+            if not ok:
+                errors[name] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client_loop() for _ in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def summarize(samples: list, errors: int, elapsed: float) -> dict:
+    ms = 1000
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput": round(len(samples) / elapsed, 2),
+        "p50_ms": round(percentile(samples, 50) * ms, 2),
+        "p95_ms": round(percentile(samples, 95) * ms, 2),
+        "p99_ms": round(percentile(samples, 99) * ms, 2),
+    }
+
+
+async def run(args) -> dict:
+    credentials = {"username": args.username, "password": args.password}
+    if args.url:
+        transport = httpx.AsyncHTTPTransport(
+            limits=httpx.Limits(max_connections=args.concurrency)
+        )
+        base_url = args.url
+    else:
+        path = args.db or build_db(temp_db_path("load.db"), args.tickets)
+        server = load_server(path)
+        transport = httpx.ASGITransport(app=server.app)
+        base_url = "http://bench"
+
+    rng = random.Random(args.seed)
+    async with httpx.AsyncClient(
+        transport=transport, base_url=base_url, timeout=120
+    ) as client:
+        r = await client.post("/auth/login", json=credentials)
+        r.raise_for_status()
+        headers = {"Authorization": f"Bearer {r.json()['token']}"}
+        r = await client.get(
+            "/tickets", params={"limit": 500, "fields": "id"}, headers=headers
+        )
+        ticket_ids = [int(t["id"]) for t in r.json()]
+        workload = Workload(client, headers, credentials, ticket_ids, rng)
+        if not ticket_ids:
+            await workload.create()
+
+        latencies, errors, elapsed = await drive(
+            workload, parse_mix(args.mix), args.concurrency, args.duration, rng
+        )
+
+    every = [s for samples in latencies.values() for s in samples]
+    return {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "target": args.url or "in-process",
+        "concurrency": args.concurrency,
+        "duration_s": round(elapsed, 2),
+        "mix": args.mix,
+        "total": summarize(every, sum(errors.values()), elapsed),
+        "operations": {
+            name: summarize(latencies[name], errors[name], elapsed)
+            for name in latencies
+        },
+    }
+
+
+def print_report(report: dict, baseline: dict = None):
+    def delta(name: str, key: str, value: float) -> str:
+        if baseline is None:
+            return ""
+        before = (
+            baseline["total"] if name == "total" else baseline["operations"].get(name)
+        )
+        if not before or not before.get(key):
+            return ""
+        return f" ({(value - before[key]) / before[key]:+.0%})"
+
+    print(
+        f"commit {report['commit']}, {report['concurrency']} clients, "
+        f"{report['duration_s']}s, mix {report['mix']}"
+    )
+    print(
+        f"{'operation':<10} {'req':>7} {'err':>5} {'req/s':>16} {'p50 ms':>16} "
+        f"{'p95 ms':>16} {'p99 ms':>16}"
+    )
+    rows = list(report["operations"].items()) + [("total", report["total"])]
+    for name, s in rows:
+        cells = [
+            f"{s[k]}{delta(name, k, s[k])}"
+            for k in ("throughput", "p50_ms", "p95_ms", "p99_ms")
+        ]
+        print(
+            f"{name:<10} {s['requests']:>7} {s['errors']:>5} "
+            + " ".join(f"{c:>16}" for c in cells)
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument(
+        "--mix", default=DEFAULT_MIX, help="Operation weights, e.g. list=50,create=10"
+    )
+    parser.add_argument(
+        "--tickets", type=int, default=10_000, help="Size of the throwaway database"
+    )
+    parser.add_argument(
+        "--db", default=None, help="Existing database to run against in-process"
+    )
+    parser.add_argument("--url", default=None, help="Load a running server instead")
+    parser.add_argument("--username", default="bench")
+    parser.add_argument("--password", default="bench-pass")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument(
+        "--out", default="load-report.json", help="Where to write the JSON report"
+    )
+    parser.add_argument(
+        "--compare", default=None, help="Earlier JSON report to diff against"
+    )
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    print_report(report, baseline)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
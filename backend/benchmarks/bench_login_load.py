@@ -0,0 +1,90 @@
+"""Ticket read latency while a burst of bcrypt logins is in flight.
+
+Usage:
+  python -m backend.benchmarks.bench_login_load [--logins 40] [--readers 10]
+
+Logins run through the dedicated password pool; ticket reads keep using the
+regular threadpool. The report shows how much the login burst degrades read
+latency and how many logins were shed with 503.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from backend.benchmarks.common import build_db, load_server, percentile, temp_db_path
+
+
+async def run(server, logins: int, readers: int, reads_per_reader: int):
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench"
+    ) as client:
+        r = await client.post(
+            "/auth/login", json={"username": "bench", "password": "bench-pass"}
+        )
+        headers = {"Authorization": f"Bearer {r.json()['token']}"}
+        params = {"limit": 50}
+
+        async def reader(latencies):
+            for _ in range(reads_per_reader):
+                start = time.perf_counter()
+                await client.get("/tickets", params=params, headers=headers)
+                latencies.append(time.perf_counter() - start)
+
+        async def login(codes):
+            r = await client.post(
+                "/auth/login", json={"username": "bench", "password": "bench-pass"}
+            )
+            codes.append(r.status_code)
+
+        baseline = []
+        await asyncio.gather(*(reader(baseline) for _ in range(readers)))
+
+        loaded, codes = [], []
+        start = time.perf_counter()
+        await asyncio.gather(
+            *(login(codes) for _ in range(logins)),
+            *(reader(loaded) for _ in range(readers)),
+        )
+        elapsed = time.perf_counter() - start
+    return baseline, loaded, codes, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=5_000)
+    parser.add_argument("--logins", type=int, default=40)
+    parser.add_argument("--readers", type=int, default=10)
+    parser.add_argument("--reads", type=int, default=20, help="Reads per reader")
+    args = parser.parse_args()
+
+    path = build_db(temp_db_path("login.db"), args.tickets)
+    server = load_server(path)
+
+    baseline, loaded, codes, elapsed = asyncio.run(
+        run(server, args.logins, args.readers, args.reads)
+    )
+    ms = 1000
+    print(
+        f"password pool: {server.password_pool.workers} workers, max pending "
+        f"{server.password_pool.max_pending}"
+    )
+    print(
+        f"reads idle:        p50={percentile(baseline, 50) * ms:.1f}ms "
+        f"p95={percentile(baseline, 95) * ms:.1f}ms"
+    )
+    print(
+        f"reads during burst: p50={percentile(loaded, 50) * ms:.1f}ms "
+        f"p95={percentile(loaded, 95) * ms:.1f}ms"
+    )
+    print(
+        f"logins: {codes.count(200)} ok, {codes.count(503)} shed (503), "
+        f"{len(codes) / elapsed:.1f} attempts/s over {elapsed:.2f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
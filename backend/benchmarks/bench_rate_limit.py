@@ -0,0 +1,104 @@
+"""Per-request overhead of the rate limit middleware.
+
+Usage:
+  python -m backend.benchmarks.bench_rate_limit [--requests 200000] [--clients 10000]
+
+Calls the ASGI stack directly (no HTTP, no routing) around an app that
+answers immediately, so the difference between the rows is the cost of the
+limiter itself: rule matching, identifying the client (IP or bearer token)
+and the token bucket update. Requests are spread over --clients distinct
+clients so the bucket store is exercised at that size; budgets are large
+enough that nothing is rejected.
+"""
+
+import argparse
+import asyncio
+import time
+
+from backend.benchmarks.common import build_db, load_server, temp_db_path
+
+RULES = "POST /auth/login=1:60,GET /tickets=1000000:1000000,*=1000000:1000000"
+
+
+async def endpoint(scope, receive, send):
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+def scopes(server, requests: int, clients: int, tokens: bool) -> list:
+    if tokens:
+        auth = [
+            [(b"authorization", f"Bearer {server.create_token(f'user{i}')}".encode())]
+            for i in range(clients)
+        ]
+    result = []
+    for i in range(requests):
+        c = i % clients
+        result.append(
+            {
+                "type": "http",
+                "method": "GET",
+                "path": f"/tickets/{i}",
+                "headers": auth[c] if tokens else [],
+                "client": (f"10.{c >> 16}.{(c >> 8) & 255}.{c & 255}", 50000),
+            }
+        )
+    return result
+
+
+async def timed(app, batch: list) -> float:
+    start = time.perf_counter()
+    for scope in batch:
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--requests", type=int, default=200_000, help="Requests per variant"
+    )
+    parser.add_argument(
+        "--clients", type=int, default=10_000, help="Distinct clients (buckets)"
+    )
+    args = parser.parse_args()
+    server = load_server(build_db(temp_db_path("ratelimit.db"), 0))
+    rules = server.parse_rate_limits(RULES)
+
+    def limited():
+        return server.RateLimitMiddleware(
+            endpoint, rules, server.RateLimiter(server.RATE_LIMIT_MAX_KEYS)
+        )
+
+    variants = (
+        ("no middleware", endpoint, False),
+        ("by client IP", limited(), False),
+        ("by bearer token", limited(), True),
+    )
+    print(f"{args.requests} requests over {args.clients} clients")
+    print(f"{'variant':<18} {'req/s':>10} {'us/req':>8} {'overhead us':>12}")
+    baseline = None
+    for name, app, tokens in variants:
+        batch = scopes(server, args.requests, args.clients, tokens)
+        asyncio.run(
+            timed(app, batch[: args.clients])
+        )  # warm-up: buckets and token cache filled
+        elapsed = asyncio.run(timed(app, batch))
+        per_request = elapsed / args.requests * 1e6
+        baseline = per_request if baseline is None else baseline
+        print(
+            f"{name:<18} {args.requests / elapsed:>10.0f} {per_request:>8.2f} "
+            f"{per_request - baseline:>12.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
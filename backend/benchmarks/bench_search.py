@@ -0,0 +1,60 @@
+"""FTS5 search vs a LIKE scan over tickets and comments.
+
+Usage:
+  python -m backend.benchmarks.bench_search [--tickets 200000] [--comments 5]
+
+The defaults give 1M comments. Building the database takes a few minutes.
+"""
+
+import argparse
+
+from backend.benchmarks.common import build_db, connect, temp_db_path, timeit
+from backend.server import SEARCH_SQL, fts_query
+
+LIKE_SQL = """
+SELECT DISTINCT t.id FROM tickets t LEFT JOIN comments c ON c.ticket_id = t.id
+WHERE t.title LIKE :q OR t.description LIKE :q OR c.text LIKE :q
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=200_000)
+    parser.add_argument("--comments", type=int, default=5, help="Comments per ticket")
+    parser.add_argument(
+        "--terms",
+        nargs="+",
+        default=["ref4242", "certificado", "vpn lento", "dashb", "impresora"],
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    path = build_db(temp_db_path("search.db"), args.tickets, args.comments)
+    conn = connect(path)
+    comments = conn.execute("SELECT COUNT(*) FROM comments").fetchone()[0]
+    print(f"{args.tickets} tickets, {comments} comments")
+    print(
+        "LIKE finds every matching ticket by scanning; "
+        "FTS5 ranks all matches and returns the top 20."
+    )
+    print(
+        f"{'query':>14} {'matches':>9} {'LIKE (ms)':>10} {'FTS5 (ms)':>10} "
+        f"{'speedup':>8}"
+    )
+    for term in args.terms:
+        like_params = {"q": f"%{term}%"}
+        matches = len(conn.execute(LIKE_SQL, like_params).fetchall())
+        like = timeit(
+            lambda: conn.execute(LIKE_SQL, like_params).fetchall(), args.repeat
+        )
+        params = {"q": fts_query(term), "limit": 20, "offset": 0}
+        fts = timeit(lambda: conn.execute(SEARCH_SQL, params).fetchall(), args.repeat)
+        print(
+            f"{term:>14} {matches:>9} {like * 1000:>10.1f} {fts * 1000:>10.1f} "
+            f"{like / fts:>7.1f}x"
+        )
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
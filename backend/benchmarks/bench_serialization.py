@@ -0,0 +1,89 @@
+"""Measure the cost of building and encoding the GET /tickets payload.
+
+Compares the previous path (sqlite3.Row -> row_to_ticket dicts ->
+jsonable_encoder -> json.dumps) with the current one (tuple rows zipped into
+dicts -> orjson) and reports gzip cost and size. Times are per 10k tickets.
+
+Usage:
+  python -m backend.benchmarks.bench_serialization [--tickets 10000]
+"""
+
+import argparse
+import gzip
+import json
+
+from fastapi.encoders import jsonable_encoder
+
+from backend.benchmarks.common import build_db, connect, temp_db_path, timeit
+from backend.server import (
+    GZIP_LEVEL,
+    dump_json,
+    orjson,
+    query_tickets,
+    row_to_comment,
+    row_to_ticket,
+)
+
+
+def load_tickets_rows(conn):
+    """The previous loader: sqlite3.Row objects through row_to_ticket/row_to_comment."""
+    tickets = []
+    by_id = {}
+    for row in conn.execute("SELECT * FROM tickets ORDER BY created_at DESC, id DESC"):
+        t = row_to_ticket(row)
+        t["comments"] = by_id[row["id"]] = []
+        tickets.append(t)
+    for c in conn.execute(
+        "SELECT ticket_id, id, author_id, text, created_at FROM comments "
+        "ORDER BY ticket_id, created_at, id"
+    ):
+        by_id[c["ticket_id"]].append(row_to_comment(c))
+    return tickets
+
+
+def encode_stdlib(tickets) -> bytes:
+    # What FastAPI's default JSONResponse did with a returned list.
+    return json.dumps(
+        jsonable_encoder(tickets), ensure_ascii=False, separators=(",", ":")
+    ).encode("utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tickets", type=int, default=10_000)
+    parser.add_argument("--comments", type=int, default=3, help="Comments per ticket")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    path = build_db(temp_db_path("serialization.db"), args.tickets, args.comments)
+    conn = connect(path)
+    scale = 10_000 / args.tickets
+
+    legacy_rows = load_tickets_rows(conn)
+    fast_rows = query_tickets(conn)[0]
+    assert json.loads(encode_stdlib(legacy_rows)) == json.loads(dump_json(fast_rows))
+    body = dump_json(fast_rows)
+
+    stages = [
+        ("build: Row + row_to_ticket", lambda: load_tickets_rows(conn)),
+        ("build: tuples + zip", lambda: query_tickets(conn)),
+        ("encode: jsonable_encoder + json", lambda: encode_stdlib(fast_rows)),
+        (
+            f"encode: {'orjson' if orjson else 'json (orjson missing)'}",
+            lambda: dump_json(fast_rows),
+        ),
+        (f"gzip level {GZIP_LEVEL}", lambda: gzip.compress(body, GZIP_LEVEL)),
+    ]
+    print(f"{args.tickets} tickets, {args.comments} comments each; ms per 10k tickets")
+    for name, fn in stages:
+        print(f"{name:<34} {timeit(fn, args.repeat) * 1000 * scale:>9.1f}")
+    compressed = len(gzip.compress(body, GZIP_LEVEL))
+    print(
+        f"{'body size (KiB)':<34} {len(body) / 1024:>9.0f}  gzip "
+        f"{compressed / 1024:.0f} ({compressed / len(body):.0%})"
+    )
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
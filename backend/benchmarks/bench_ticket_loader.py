@@ -0,0 +1,49 @@
+"""Compare the legacy per-ticket comment queries with the batched loader.
+
+Usage:
+  python -m backend.benchmarks.bench_ticket_loader [--sizes 1000 10000 100000]
+"""
+
+import argparse
+
+from backend.benchmarks.common import build_db, connect, temp_db_path, timeit
+from backend.server import load_tickets, row_to_comment, row_to_ticket
+
+
+def load_tickets_n_plus_one(conn):
+    """The previous GET /tickets implementation: one comment query per ticket."""
+    tickets = [
+        row_to_ticket(r)
+        for r in conn.execute("SELECT * FROM tickets ORDER BY created_at DESC")
+    ]
+    for t in tickets:
+        cur = conn.execute(
+            "SELECT id, author_id, text, created_at FROM comments WHERE ticket_id = ? "
+            "ORDER BY created_at ASC",
+            (int(t["id"]),),
+        )
+        t["comments"] = [row_to_comment(c) for c in cur.fetchall()]
+    return tickets
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000]
+    )
+    parser.add_argument("--comments", type=int, default=3, help="Comments per ticket")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'tickets':>10} {'n+1 (s)':>10} {'batched (s)':>12} {'speedup':>8}")
+    for size in args.sizes:
+        path = build_db(temp_db_path(f"loader-{size}.db"), size, args.comments)
+        conn = connect(path)
+        legacy = timeit(lambda: load_tickets_n_plus_one(conn), args.repeat)
+        batched = timeit(lambda: load_tickets(conn), args.repeat)
+        conn.close()
+        print(f"{size:>10} {legacy:>10.3f} {batched:>12.3f} {legacy / batched:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
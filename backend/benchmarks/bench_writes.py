@@ -0,0 +1,123 @@
+"""Writes per second through the API: create, update, comment and delete.
+
+Usage:
+  python -m backend.benchmarks.bench_writes [--ops 2000] [--tickets 10000] [--direct]
+
+Each operation runs --ops times, one request after another, against a fresh
+in-process database; the output is writes per second per operation. With
+--direct the data-layer functions are called on a pooled connection, leaving
+out HTTP, auth and JSON so the SQL cost stands out. Run it before and after a
+change to the write path to compare.
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from backend.benchmarks.common import build_db, load_server, temp_db_path
+
+
+def report(name: str, ops: int, elapsed: float, errors: int):
+    print(f"{name:<10} {ops:>6} {ops / elapsed:>10.0f} {errors:>7}")
+
+
+def run_direct(server, ops: int):
+    conn = server.db_pool.connection()
+    ticket = server.TicketIn(title="Write", priority="low")
+    ids = []
+    operations = (
+        (
+            "create",
+            lambda i: ids.append(int(server.insert_ticket(conn, ticket, 1)["id"])),
+        ),
+        (
+            "update",
+            lambda i: server.apply_ticket_update(
+                conn, ids[i], {"status": "in_progress", "assignee_id": 2}
+            ),
+        ),
+        ("comment", lambda i: server.insert_comment(conn, ids[i], 1, f"nota {i}")),
+        ("delete", lambda i: server.delete_ticket_row(conn, ids[i])),
+    )
+    print(f"{'operation':<10} {'ops':>6} {'writes/s':>10} {'errors':>7}")
+    for name, op in operations:
+        start = time.perf_counter()
+        for i in range(ops):
+            op(i)
+        report(name, ops, time.perf_counter() - start, 0)
+
+
+async def run(server, ops: int):
+    transport = httpx.ASGITransport(app=server.app)
+    async with httpx.AsyncClient(
+        transport=transport, base_url="http://bench", timeout=300
+    ) as client:
+        r = await client.post(
+            "/auth/login", json={"username": "bench", "password": "bench-pass"}
+        )
+        headers = {"Authorization": f"Bearer {r.json()['token']}"}
+        ids = []
+
+        async def create(i):
+            r = await client.post(
+                "/tickets",
+                json={"title": f"Write {i}", "priority": "low"},
+                headers=headers,
+            )
+            ids.append(r.json()["id"])
+            return r
+
+        async def update(i):
+            status = "in_progress" if i % 2 else "open"
+            return await client.put(
+                f"/tickets/{ids[i]}",
+                json={"status": status, "assignee_id": 2},
+                headers=headers,
+            )
+
+        async def comment(i):
+            return await client.post(
+                f"/tickets/{ids[i]}/comments",
+                json={"text": f"nota {i}"},
+                headers=headers,
+            )
+
+        async def delete(i):
+            return await client.delete(f"/tickets/{ids[i]}", headers=headers)
+
+        print(f"{'operation':<10} {'ops':>6} {'writes/s':>10} {'errors':>7}")
+        for name, op in (
+            ("create", create),
+            ("update", update),
+            ("comment", comment),
+            ("delete", delete),
+        ):
+            errors = 0
+            start = time.perf_counter()
+            for i in range(ops):
+                if (await op(i)).status_code >= 400:
+                    errors += 1
+            report(name, ops, time.perf_counter() - start, errors)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ops", type=int, default=2000, help="Requests per operation")
+    parser.add_argument(
+        "--tickets", type=int, default=10_000, help="Background tickets in the DB"
+    )
+    parser.add_argument(
+        "--direct", action="store_true", help="Call the data layer instead of the API"
+    )
+    args = parser.parse_args()
+    server = load_server(build_db(temp_db_path("writes.db"), args.tickets))
+    if args.direct:
+        run_direct(server, args.ops)
+    else:
+        asyncio.run(run(server, args.ops))
+
+
+if __name__ == "__main__":
+    main()
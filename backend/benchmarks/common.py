@@ -0,0 +1,135 @@
+"""Shared helpers for the benchmark scripts."""
+
+import logging
+import os
+import random
+import sqlite3
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+import bcrypt
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+SCHEMA = REPO_ROOT / "base" / "schema.sql"
+
+PRIORITIES = ["low", "normal", "high", "urgent"]
+STATUSES = ["open", "in_progress", "resolved", "closed"]
+WORDS = (
+    "impresora red correo vpn acceso usuario contraseña servidor lento error pantalla "
+    "teclado licencia factura reporte backup disco memoria actualizacion instalar "
+    "permiso carpeta compartida wifi telefono camara audio navegador certificado "
+    "sesion bloqueo sistema base datos aplicacion movil portal ventas dashboard"
+).split()
+
+
+WORD_WEIGHTS = [1 / (rank + 1) for rank in range(len(WORDS))]
+
+
+def sentence(rng: random.Random, words: int) -> str:
+    # Zipf-like skew over the vocabulary plus one rare reference token.
+    picked = rng.choices(WORDS, WORD_WEIGHTS, k=words - 1)
+    picked.append(f"ref{rng.randrange(100_000)}")
+    return " ".join(picked)
+
+
+def temp_db_path(name: str = "bench.db") -> str:
+    return os.path.join(tempfile.mkdtemp(prefix="helpdesk-bench-"), name)
+
+
+def build_db(
+    path: str,
+    tickets: int,
+    comments_per_ticket: int = 3,
+    users: int = 20,
+    seed: int = 1,
+) -> str:
+    """Create a database at `path` with synthetic users, tickets and comments."""
+    rng = random.Random(seed)
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA.read_text(encoding="utf-8"))
+    # User 1 is the account benchmarks log in with (bench / bench-pass).
+    bench_hash = bcrypt.hashpw(b"bench-pass", bcrypt.gensalt()).decode("utf-8")
+    conn.executemany(
+        "INSERT INTO users (username, full_name, password_hash, role) "
+        "VALUES (?, ?, ?, ?)",
+        [("bench", "Bench", bench_hash, "admin")]
+        + [
+            (f"user{i}", f"User {i}", "x" * 60, "agent" if i % 2 else "user")
+            for i in range(2, users + 1)
+        ],
+    )
+    ticket_rows = (
+        (
+            f"Ticket {i} {sentence(rng, 3)}",
+            sentence(rng, 20),
+            rng.choice(PRIORITIES),
+            rng.choice(STATUSES),
+            rng.randint(1, users),
+            rng.randint(1, users),
+            f"2025-01-01 00:00:{i % 60:02d}",
+        )
+        for i in range(tickets)
+    )
+    conn.executemany(
+        "INSERT INTO tickets (title, description, priority, status, reporter_id, "
+        "assignee_id, created_at) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+        ticket_rows,
+    )
+    comment_rows = (
+        (t, rng.randint(1, users), sentence(rng, 15))
+        for t in range(1, tickets + 1)
+        for c in range(comments_per_ticket)
+    )
+    conn.executemany(
+        "INSERT INTO comments (ticket_id, author_id, text) VALUES (?, ?, ?)",
+        comment_rows,
+    )
+    conn.commit()
+    conn.close()
+    return path
+
+
+def timeit(fn, repeat: int = 3) -> float:
+    """Return the median wall time of `fn()` in seconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def load_server(db_path: str):
+    """Import backend.server bound to `db_path` (DB_PATH is read at import)."""
+    os.environ["HELPDESK_DB_PATH"] = db_path
+    # Benchmarks drive one user as hard as they can: no rate limits unless asked.
+    os.environ.setdefault("HELPDESK_RATE_LIMITS", "")
+    from backend import server
+
+    # The server configures INFO logging; keep httpx from logging every request.
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    if server.DB_PATH != db_path:
+        server.db.close()
+        server.DB_PATH = db_path
+        server.db_pool = server.ConnectionPool(db_path)
+        # db.run (every async endpoint) goes through its own pool reference.
+        server.db = server.Database(server.db_pool, server.DB_WORKERS)
+    return server
+
+
+def percentile(samples: list, pct: float) -> float:
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
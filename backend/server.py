@@ -1,16 +1,42 @@
+import asyncio
+import base64
+import csv
 import hashlib
+import heapq
+import io
+import itertools
+import json
+import logging
+import math
 import os
+import re
 import sqlite3
+import tempfile
+import threading
 import time
-from typing import Optional
+import weakref
+from bisect import bisect_left
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from functools import lru_cache
+from typing import Optional
+from urllib.parse import quote
 
 import bcrypt
 import jwt
-from fastapi import Depends, FastAPI, HTTPException, Header
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from pydantic import BaseModel
 
+try:
+    import orjson
+except ImportError:  # orjson es opcional; sin él se usa json de la stdlib
+    orjson = None
+
 # ============================================================
 # CONFIGURACIÓN BÁSICA
 # ============================================================
@@ -18,30 +44,606 @@ APP_DIR = os.path.dirname(__file__)
 DEFAULT_DB = os.path.join(APP_DIR, "..", "base", "helpdesk.db")
 DB_PATH = os.path.abspath(os.environ.get("HELPDESK_DB_PATH", DEFAULT_DB))
 SECRET = os.environ.get("HELPDESK_SECRET", "cambiame_por_una_clave_segura")
+MAX_PAGE_SIZE = 500
+MAX_BULK_ITEMS = 1000
+
+# Valores permitidos por los CHECK de base/schema.sql
+TICKET_PRIORITIES = ("low", "normal", "high", "urgent")
+TICKET_STATUSES = ("open", "in_progress", "resolved", "closed")
+
+# Ajustes de SQLite para las conexiones del pool
+BUSY_TIMEOUT_MS = 5000
+STATEMENT_CACHE_SIZE = 256
+CACHE_SIZE_KIB = 16384
+MMAP_SIZE = 256 * 1024 * 1024
+# Hilos dedicados a SQLite; los endpoints async esperan en su cola
+DB_WORKERS = int(os.environ.get("HELPDESK_DB_WORKERS", "8"))
+
+# Caché de token -> usuario (ver get_current_user)
+TOKEN_CACHE_SIZE = int(os.environ.get("HELPDESK_TOKEN_CACHE_SIZE", "10000"))
+TOKEN_CACHE_TTL = float(os.environ.get("HELPDESK_TOKEN_CACHE_TTL", "60"))
+
+# Caché de respuestas de lectura, invalidada por la generación de escritura
+RESPONSE_CACHE_SIZE = int(os.environ.get("HELPDESK_RESPONSE_CACHE_SIZE", "512"))
+RESPONSE_CACHE_BYTES = (
+    int(os.environ.get("HELPDESK_RESPONSE_CACHE_MB", "64")) * 1024 * 1024
+)
+
+# Verificación de contraseñas (bcrypt) fuera del threadpool de la API
+LOGIN_WORKERS = int(
+    os.environ.get("HELPDESK_LOGIN_WORKERS", str(min(4, os.cpu_count() or 1)))
+)
+LOGIN_MAX_PENDING = int(os.environ.get("HELPDESK_LOGIN_MAX_PENDING", "32"))
+
+# Canal de eventos (SSE)
+EVENT_HISTORY = int(os.environ.get("HELPDESK_EVENT_HISTORY", "1000"))
+EVENT_QUEUE_SIZE = 256
+EVENT_HEARTBEAT_SECONDS = float(os.environ.get("HELPDESK_EVENT_HEARTBEAT", "15"))
+
+# Asignación automática de tickets nuevos: off, round_robin, least_loaded o
+# priority_aware; la carga en memoria se resincroniza con la base cada tanto
+ASSIGNMENT_POLICY = os.environ.get("HELPDESK_ASSIGNMENT_POLICY", "priority_aware")
+ASSIGNMENT_RESYNC_SECONDS = float(os.environ.get("HELPDESK_ASSIGNMENT_RESYNC", "300"))
+
+# SLA: horas por prioridad que un ticket abierto o en curso puede esperar antes
+# de escalarse (vacío = sin escalado); se cargan los vencimientos de la próxima
+# ventana y se revisan los cambios cada HELPDESK_SLA_POLL segundos. Al arrancar
+# solo se escalan los vencidos en las últimas HELPDESK_SLA_BACKLOG_HOURS horas
+SLA_HOURS = {
+    priority: float(hours)
+    for priority, _, hours in (
+        item.partition("=")
+        for item in os.environ.get(
+            "HELPDESK_SLA_HOURS", "urgent=4,high=24,normal=72,low=168"
+        ).split(",")
+        if item.strip()
+    )
+}
+SLA_HORIZON_SECONDS = int(os.environ.get("HELPDESK_SLA_HORIZON", "3600"))
+SLA_BACKLOG_SECONDS = int(
+    float(os.environ.get("HELPDESK_SLA_BACKLOG_HOURS", "1")) * 3600
+)
+SLA_POLL_SECONDS = float(os.environ.get("HELPDESK_SLA_POLL", "30"))
+SLA_BATCH = int(os.environ.get("HELPDESK_SLA_BATCH", "200"))
+
+# Límite de peticiones (token bucket) por usuario autenticado, o por IP sin
+# token, y grupo de rutas: "[MÉTODO ]ruta=peticiones_por_segundo:ráfaga"
+# separados por comas; manda la primera regla cuya ruta encaja entera (un
+# segmento "*" vale por uno cualquiera y al final por todo lo que sigue) y
+# "*" es el resto (vacío = sin límite)
+RATE_LIMITS = os.environ.get(
+    "HELPDESK_RATE_LIMITS", "POST /auth/login=1:60,GET /tickets=20:100,*=50:200"
+)
+RATE_LIMIT_MAX_KEYS = int(os.environ.get("HELPDESK_RATE_LIMIT_KEYS", "100000"))
+
+# Historial de tickets: cada cuántas versiones se guarda el ticket completo
+HISTORY_SNAPSHOT_EVERY = int(os.environ.get("HELPDESK_HISTORY_SNAPSHOT_EVERY", "50"))
+
+# Compresión gzip de respuestas a partir de este tamaño (bytes)
+GZIP_MIN_SIZE = int(os.environ.get("HELPDESK_GZIP_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.environ.get("HELPDESK_GZIP_LEVEL", "1"))
+
+# Archivo de tickets cerrados (base SQLite adjunta con ATTACH como "archive")
+ARCHIVE_PATH = os.environ.get("HELPDESK_ARCHIVE_PATH")
+ARCHIVE_AFTER_DAYS = int(os.environ.get("HELPDESK_ARCHIVE_AFTER_DAYS", "90"))
+ARCHIVE_INTERVAL_SECONDS = float(os.environ.get("HELPDESK_ARCHIVE_INTERVAL", "3600"))
+ARCHIVE_BATCH = int(os.environ.get("HELPDESK_ARCHIVE_BATCH", "500"))
+
+# Adjuntos: almacén por contenido (SHA-256) en disco
+ATTACHMENTS_DIR = os.path.abspath(
+    os.environ.get(
+        "HELPDESK_ATTACHMENTS_DIR",
+        os.path.join(os.path.dirname(DB_PATH), "attachments"),
+    )
+)
+MAX_ATTACHMENT_BYTES = (
+    int(os.environ.get("HELPDESK_MAX_ATTACHMENT_MB", "512")) * 1024 * 1024
+)
+UPLOAD_FLUSH_BYTES = 1024 * 1024
+
+# Exportación en streaming: filas leídas por lote del cursor
+EXPORT_BATCH = int(os.environ.get("HELPDESK_EXPORT_BATCH", "1000"))
+
+# Registro y métricas; las sentencias SQL más lentas que esto se registran (0 = nunca)
+LOG_LEVEL = os.environ.get("HELPDESK_LOG_LEVEL", "INFO").upper()
+SLOW_QUERY_MS = float(os.environ.get("HELPDESK_SLOW_QUERY_MS", "250"))
+MAX_SQL_LABELS = 200
+
+logging.basicConfig(
+    level=LOG_LEVEL, format="%(asctime)s %(levelname)s %(name)s: %(message)s"
+)
+logger = logging.getLogger("helpdesk")
+sql_logger = logging.getLogger("helpdesk.sql")
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    logger.info("startup: DB_PATH=%s exists=%s", DB_PATH, os.path.exists(DB_PATH))
+    await db.open()
+    archiver = asyncio.create_task(archive_loop()) if ARCHIVE_AFTER_DAYS > 0 else None
+    assigner = asyncio.create_task(assignment_loop())
+    escalator = asyncio.create_task(sla_loop()) if SLA_HOURS else None
+    try:
+        yield
+    finally:
+        assigner.cancel()
+        if escalator is not None:
+            escalator.cancel()
+        if archiver is not None:
+            archiver.cancel()
+        password_pool.shutdown()
+        db.close()
+
+
+# ============================================================
+# MÉTRICAS
+# ============================================================
+
+LATENCY_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+SQL_BUCKETS = (
+    0.0001,
+    0.00025,
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    1.0,
+)
+
+
+class Metrics:
+    """Minimal in-process metrics registry rendered in the Prometheus text format.
+
+    Samples are keyed by (name, labels), where labels is a tuple of
+    (key, value) pairs. An observation is one bisect plus a few additions
+    under a lock, cheap enough to leave on for every request and statement.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._meta = {}
+        self._counters = {}
+        self._gauges = {}
+        self._histograms = {}
+
+    def describe(self, name: str, kind: str, help_text: str, buckets: tuple = ()):
+        self._meta[name] = (kind, help_text, buckets)
+
+    def inc(self, name: str, labels: tuple = (), value: float = 1):
+        key = (name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def set_gauge(self, name: str, labels: tuple = (), value: float = 0):
+        with self._lock:
+            self._gauges[(name, labels)] = value
+
+    def add_gauge(self, name: str, labels: tuple = (), value: float = 1):
+        key = (name, labels)
+        with self._lock:
+            self._gauges[key] = self._gauges.get(key, 0) + value
+
+    def observe(self, name: str, labels: tuple, value: float):
+        buckets = self._meta[name][2]
+        key = (name, labels)
+        with self._lock:
+            sample = self._histograms.get(key)
+            if sample is None:
+                sample = self._histograms[key] = [[0] * (len(buckets) + 1), 0.0, 0]
+            sample[0][bisect_left(buckets, value)] += 1
+            sample[1] += value
+            sample[2] += 1
+
+    def value(self, name: str, labels: tuple = ()):
+        """Current counter/gauge value, or (count, sum) for a histogram."""
+        key = (name, labels)
+        with self._lock:
+            if key in self._histograms:
+                return self._histograms[key][2], self._histograms[key][1]
+            return self._counters.get(key, self._gauges.get(key, 0))
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._gauges.clear()
+            self._histograms.clear()
+
+    def render(self) -> str:
+        with self._lock:
+            samples = {}
+            for (name, labels), v in list(self._counters.items()) + list(
+                self._gauges.items()
+            ):
+                samples.setdefault(name, []).append(
+                    f"{name}{format_labels(labels)} {v}"
+                )
+            for (name, labels), (counts, total, count) in self._histograms.items():
+                lines = samples.setdefault(name, [])
+                cumulative = 0
+                for bound, n in zip(self._meta[name][2] + (float("inf"),), counts):
+                    cumulative += n
+                    le = "+Inf" if bound == float("inf") else repr(bound)
+                    lines.append(
+                        f"{name}_bucket{format_labels(labels + (('le', le),))} "
+                        f"{cumulative}"
+                    )
+                lines.append(f"{name}_sum{format_labels(labels)} {total}")
+                lines.append(f"{name}_count{format_labels(labels)} {count}")
+        out = []
+        for name in sorted(samples):
+            kind, help_text, _ = self._meta.get(name, ("untyped", "", ()))
+            out.append(f"# HELP {name} {help_text}")
+            out.append(f"# TYPE {name} {kind}")
+            out.extend(samples[name])
+        return "\n".join(out) + "\n"
+
+
+def format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+metrics = Metrics()
+metrics.describe(
+    "helpdesk_http_requests_in_flight", "gauge", "HTTP requests currently being served."
+)
+metrics.describe(
+    "helpdesk_http_request_duration_seconds",
+    "histogram",
+    "HTTP request latency by route.",
+    LATENCY_BUCKETS,
+)
+metrics.describe(
+    "helpdesk_http_responses_total",
+    "counter",
+    "HTTP responses by route and status code.",
+)
+metrics.describe(
+    "helpdesk_password_verify_seconds",
+    "histogram",
+    "Time spent verifying a password.",
+    LATENCY_BUCKETS,
+)
+metrics.describe(
+    "helpdesk_db_queue_wait_seconds",
+    "histogram",
+    "Wait for a free DB worker thread.",
+    LATENCY_BUCKETS,
+)
+metrics.describe(
+    "helpdesk_db_call_seconds",
+    "histogram",
+    "Duration of a data-layer function run via db.run.",
+    LATENCY_BUCKETS,
+)
+metrics.describe(
+    "helpdesk_sql_statement_seconds",
+    "histogram",
+    "Time to execute an SQL statement (until its first row).",
+    SQL_BUCKETS,
+)
+metrics.describe(
+    "helpdesk_sql_slow_statements_total",
+    "counter",
+    "Statements slower than HELPDESK_SLOW_QUERY_MS.",
+)
+metrics.describe("helpdesk_token_cache", "gauge", "Token cache size, hits and misses.")
+metrics.describe(
+    "helpdesk_response_cache",
+    "gauge",
+    "Read response cache size, bytes, hits, misses, evictions and hit ratio.",
+)
+metrics.describe(
+    "helpdesk_login_pending", "gauge", "Logins waiting for or running bcrypt."
+)
+metrics.describe(
+    "helpdesk_rate_limited_total",
+    "counter",
+    "Requests rejected with 429 by rate limit rule.",
+)
+metrics.describe(
+    "helpdesk_rate_limit_buckets", "gauge", "Token buckets held by the rate limiter."
+)
+metrics.describe(
+    "helpdesk_sse_subscribers", "gauge", "Connected Server-Sent Events clients."
+)
+metrics.describe(
+    "helpdesk_archived_tickets_total",
+    "counter",
+    "Tickets moved to the archive database.",
+)
+metrics.describe(
+    "helpdesk_exports_total", "counter", "Completed ticket exports by format."
+)
+metrics.describe(
+    "helpdesk_auto_assignments_total",
+    "counter",
+    "New tickets assigned to an agent on creation.",
+)
+metrics.describe(
+    "helpdesk_sla_escalations_total",
+    "counter",
+    "Tickets escalated for breaching their SLA, by original priority.",
+)
+metrics.describe(
+    "helpdesk_sla_pending", "gauge", "SLA deadlines loaded in the scheduler."
+)
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording in-flight requests, latency and status codes.
+
+    Latency is labelled with the route template (e.g. /tickets/{ticket_id}),
+    which FastAPI stores in the scope while routing, so label cardinality is
+    bounded by the number of routes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.add_gauge("helpdesk_http_requests_in_flight", (), 1)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - start
+            metrics.add_gauge("helpdesk_http_requests_in_flight", (), -1)
+            route = getattr(scope.get("route"), "path", "unmatched")
+            labels = (("method", scope["method"]), ("route", route))
+            metrics.observe("helpdesk_http_request_duration_seconds", labels, elapsed)
+            metrics.inc(
+                "helpdesk_http_responses_total", labels + (("status", str(status)),)
+            )
+
+
+def dump_json(data) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson when it is installed.
+
+    Endpoints that already hold plain dicts/lists return it directly, which
+    also skips FastAPI's jsonable_encoder pass over the payload.
+    """
+
+    def render(self, content) -> bytes:
+        return dump_json(content)
+
+
+# ============================================================
+# LÍMITE DE PETICIONES
+# ============================================================
+
+
+def rate_limit_pattern(path: str) -> re.Pattern:
+    """Compile a rule path: matched whole, a `*` segment stands for any one
+    segment and a trailing one for the rest of the path; `*` alone is all."""
+    if path == "*":
+        return re.compile(".*")
+    segments = path.rstrip("/").split("/")
+    parts = ["[^/]+" if segment == "*" else re.escape(segment) for segment in segments]
+    if segments[-1] == "*":
+        parts[-1] = ".+"
+    return re.compile("/".join(parts))
+
+
+def parse_rate_limits(spec: str) -> list:
+    """Parse HELPDESK_RATE_LIMITS into (name, method, pattern, rate, burst) rules.
+
+    Raises RuntimeError, refusing to start, for a rule that is malformed or
+    whose bucket could never serve a request (rate <= 0 or burst < 1).
+    """
+    rules = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        target, _, budget = item.strip().rpartition("=")
+        method, _, path = target.strip().rpartition(" ")
+        rate, _, burst = budget.partition(":")
+        try:
+            rate, burst = float(rate), float(burst or rate)
+        except ValueError:
+            rate = burst = math.nan
+        if not target.strip() or not (rate > 0 and burst >= 1):
+            raise RuntimeError(
+                f"Invalid HELPDESK_RATE_LIMITS rule {item.strip()!r}; use "
+                "[METHOD ]path=rate:burst with a rate > 0 and a burst >= 1"
+            )
+        rules.append(
+            (
+                target.strip(),
+                method.upper() or "*",
+                rate_limit_pattern(path),
+                rate,
+                burst,
+            )
+        )
+    return rules
+
+
+class RateLimiter:
+    """Token buckets keyed by (rule, client), in an LRU bounded by `maxsize`.
+
+    A bucket is two numbers refilled lazily when touched, so a check is O(1).
+    Buckets that have been idle long enough to be full again are no different
+    from a new one and are dropped from the cold end as requests come in.
+    """
+
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._buckets = OrderedDict()
+
+    def acquire(self, key, rate: float, burst: float, now: float) -> float:
+        """Take one token; returns 0 if allowed, else seconds until one is available."""
+        buckets = self._buckets
+        bucket = buckets.get(key)
+        if bucket is None:
+            tokens = burst
+            bucket = buckets[key] = [burst, now, now]
+        else:
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+            buckets.move_to_end(key)
+        if tokens < 1:
+            bucket[0], bucket[1] = tokens, now
+            return (1 - tokens) / rate
+        bucket[0], bucket[1] = tokens - 1, now
+        # Time at which the bucket is full again, i.e. can be forgotten.
+        bucket[2] = now + (burst - bucket[0]) / rate
+        self._evict(now)
+        return 0.0
+
+    def _evict(self, now: float):
+        buckets = self._buckets
+        while len(buckets) > self.maxsize:
+            buckets.popitem(last=False)
+        while buckets:
+            oldest = next(iter(buckets.values()))
+            if oldest[2] > now:
+                break
+            buckets.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+
+@lru_cache(maxsize=TOKEN_CACHE_SIZE)
+def token_subject(token: str) -> Optional[str]:
+    """Username in a validly signed token, or None.
+
+    Cached like user_cache: verifying the signature costs far more than the
+    rest of the rate limit check.
+    """
     try:
-        print(f"startup: DB_PATH={DB_PATH} exists={os.path.exists(DB_PATH)}")
-    except Exception as e:
-        print("startup: error checking DB_PATH", e)
-    yield
+        return jwt.decode(
+            token, SECRET, algorithms=["HS256"], options={"verify_exp": False}
+        ).get("sub")
+    except Exception:
+        return None
+
+
+class RateLimitMiddleware:
+    """ASGI middleware answering 429 with Retry-After once a client's bucket is empty.
+
+    Runs before routing, so rules match on method and path pattern. Clients
+    are the user in a validly signed bearer token (the same one
+    get_current_user accepts) or else the connecting IP.
+    """
+
+    def __init__(self, app, rules: list, limiter: RateLimiter):
+        self.app = app
+        self.rules = rules
+        self.limiter = limiter
+
+    def match(self, method: str, path: str):
+        for rule in self.rules:
+            _, rule_method, pattern, _, _ = rule
+            if rule_method in ("*", method) and pattern.fullmatch(path):
+                return rule
+        return None
+
+    @staticmethod
+    def client(scope) -> str:
+        for name, value in scope["headers"]:
+            if name == b"authorization":
+                token = value.decode("latin-1")
+                subject = token_subject(
+                    token[7:] if token.startswith("Bearer ") else token
+                )
+                if subject:
+                    return "user:" + subject
+                break
+        client = scope.get("client")
+        return "ip:" + (client[0] if client else "unknown")
+
+    async def __call__(self, scope, receive, send):
+        rule = (
+            self.match(scope["method"], scope["path"])
+            if scope["type"] == "http"
+            else None
+        )
+        if rule is None:
+            await self.app(scope, receive, send)
+            return
+        name, _, _, rate, burst = rule
+        wait = self.limiter.acquire(
+            (name, self.client(scope)), rate, burst, time.monotonic()
+        )
+        if not wait:
+            await self.app(scope, receive, send)
+            return
+        metrics.inc("helpdesk_rate_limited_total", (("rule", name),))
+        response = FastJSONResponse(
+            {"detail": "Too many requests"},
+            status_code=429,
+            headers={"Retry-After": str(math.ceil(wait))},
+        )
+        await response(scope, receive, send)
 
 
-app = FastAPI(lifespan=lifespan)
+RATE_LIMIT_RULES = parse_rate_limits(RATE_LIMITS)
+rate_limiter = RateLimiter(RATE_LIMIT_MAX_KEYS)
+
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+
+# Innermost, so 429 responses still get CORS headers and show up in the metrics.
+app.add_middleware(RateLimitMiddleware, rules=RATE_LIMIT_RULES, limiter=rate_limiter)
 
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://localhost:5173"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Next-Offset", "ETag", "Retry-After"],
 )
+# Server-Sent Events are excluded by GZipMiddleware itself.
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MIN_SIZE, compresslevel=GZIP_LEVEL)
+# Outermost, so the measured latency includes compression and CORS handling.
+app.add_middleware(MetricsMiddleware)
 
 # ============================================================
 # MODELOS Pydantic
 # ============================================================
 
+
 class LoginIn(BaseModel):
     username: str
     password: str
@@ -61,17 +663,289 @@ class TicketUpdate(BaseModel):
     assignee_id: Optional[int] = None
 
 
+class TicketBulkUpdate(TicketUpdate):
+    id: int
+
+
 # ============================================================
 # FUNCIONES AUXILIARES
 # ============================================================
 
-def get_db():
-    if not os.path.exists(DB_PATH):
-        raise RuntimeError(f"DB not found at {DB_PATH}. Run init_db.py first.")
-    conn = sqlite3.connect(DB_PATH)
-    conn.row_factory = sqlite3.Row
-    conn.execute("PRAGMA foreign_keys = ON;")
-    return conn
+_sql_labels = {}
+_sql_label_values = set()
+_sql_labels_lock = threading.Lock()
+
+
+def sql_label(sql: str) -> str:
+    """Normalise a statement into a metric label: single spaces, numbers replaced by ?.
+
+    Pool threads call this concurrently; the first MAX_SQL_LABELS statements
+    are remembered, later ones only keep a label already in use.
+    """
+    label = _sql_labels.get(sql)
+    if label is None:
+        label = re.sub(r"\b\d+\b", "?", " ".join(sql.split()))[:200]
+        with _sql_labels_lock:
+            if len(_sql_labels) < MAX_SQL_LABELS:
+                _sql_labels[sql] = label
+                _sql_label_values.add(label)
+            elif label not in _sql_label_values:
+                label = "other"
+    return label
+
+
+def record_sql(sql: str, elapsed: float):
+    metrics.observe(
+        "helpdesk_sql_statement_seconds", (("statement", sql_label(sql)),), elapsed
+    )
+    if SLOW_QUERY_MS and elapsed * 1000 >= SLOW_QUERY_MS:
+        metrics.inc("helpdesk_sql_slow_statements_total")
+        sql_logger.warning(
+            "slow query (%.1f ms): %s", elapsed * 1000, " ".join(sql.split())
+        )
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that records how long each execute/executemany takes.
+
+    For SELECTs this covers preparing the statement and producing the first
+    row, which includes any sort or aggregation; fetching the remaining rows
+    is counted in helpdesk_db_call_seconds.
+    """
+
+    def execute(self, sql, parameters=()):
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            record_sql(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            record_sql(sql, time.perf_counter() - start)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors (including the implicit ones) are TimedCursor."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+ARCHIVE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS archive.tickets (
+  id INTEGER PRIMARY KEY,
+  title TEXT NOT NULL,
+  description TEXT,
+  priority TEXT NOT NULL,
+  status TEXT NOT NULL,
+  reporter_id INTEGER,
+  assignee_id INTEGER,
+  created_at TEXT NOT NULL,
+  updated_at TEXT NOT NULL,
+  archived_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+CREATE INDEX IF NOT EXISTS archive.idx_archive_tickets_created
+  ON tickets(created_at, id);
+CREATE TABLE IF NOT EXISTS archive.comments (
+  id INTEGER PRIMARY KEY,
+  ticket_id INTEGER NOT NULL,
+  author_id INTEGER,
+  text TEXT NOT NULL,
+  created_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS archive.idx_archive_comments_ticket
+  ON comments(ticket_id, created_at, id);
+CREATE TABLE IF NOT EXISTS archive.attachments (
+  id INTEGER PRIMARY KEY,
+  ticket_id INTEGER NOT NULL,
+  file_name TEXT NOT NULL,
+  file_path TEXT NOT NULL,
+  sha256 TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  content_type TEXT NOT NULL,
+  uploader_id INTEGER,
+  uploaded_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS archive.idx_archive_attachments_ticket
+  ON attachments(ticket_id);
+"""
+
+
+def default_archive_path(path: str) -> str:
+    if ARCHIVE_PATH:
+        return os.path.abspath(ARCHIVE_PATH)
+    root, ext = os.path.splitext(path)
+    return f"{root}-archive{ext or '.db'}"
+
+
+class ConnectionPool:
+    """Per-thread SQLite connections, opened once and reused across requests.
+
+    Sync endpoints and dependencies run on the threadpool, so each worker
+    thread gets its own long-lived connection (SQLite connections must not be
+    used concurrently). The connection of a worker thread that exits is closed
+    when the thread object is collected.
+
+    The archive database is attached as "archive" only while the archiver is
+    enabled or an archive already exists; its tables are created by the first
+    connection. Use has_archive() before reading from it.
+    """
+
+    def __init__(self, path: str, archive_path: Optional[str] = None):
+        self.path = path
+        self.archive_path = archive_path or default_archive_path(path)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = {}
+        self._checked = False
+        self.attach_archive = False
+        self._archive_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        if not self._checked:
+            if not os.path.exists(self.path):
+                raise RuntimeError(
+                    f"DB not found at {self.path}. Run init_db.py first."
+                )
+            self.attach_archive = ARCHIVE_AFTER_DAYS > 0 or os.path.exists(
+                self.archive_path
+            )
+            self._checked = True
+        conn = sqlite3.connect(
+            self.path,
+            timeout=BUSY_TIMEOUT_MS / 1000,
+            check_same_thread=False,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            factory=TimedConnection,
+        )
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS};")
+        # WAL lets readers proceed while a writer commits; it is persistent
+        # in the database file, so only the first connection really switches.
+        conn.execute("PRAGMA journal_mode = WAL;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+        conn.execute(f"PRAGMA cache_size = -{CACHE_SIZE_KIB};")
+        conn.execute(f"PRAGMA mmap_size = {MMAP_SIZE};")
+        conn.execute("PRAGMA temp_store = MEMORY;")
+        conn.archive_attached = self.attach_archive
+        if self.attach_archive:
+            conn.execute("ATTACH DATABASE ? AS archive", (self.archive_path,))
+            if not self._archive_ready:
+                conn.execute("PRAGMA archive.journal_mode = WAL;")
+                conn.executescript(ARCHIVE_SCHEMA)
+                self._archive_ready = True
+        return conn
+
+    def connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._connect()
+            self._local.conn = conn
+            key = id(conn)
+            with self._lock:
+                self._connections[key] = conn
+            weakref.finalize(threading.current_thread(), self._discard, key)
+        elif conn.in_transaction:
+            # A previous request on this thread failed mid-transaction.
+            conn.rollback()
+        return conn
+
+    def _discard(self, key: int):
+        with self._lock:
+            conn = self._connections.pop(key, None)
+        if conn is not None:
+            conn.close()
+
+    def open(self):
+        """Validate the database and warm up a connection (lifespan startup)."""
+        self.connection()
+
+    def close_all(self):
+        with self._lock:
+            conns = list(self._connections.values())
+            self._connections.clear()
+        for conn in conns:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+        self._checked = False
+
+
+db_pool = ConnectionPool(DB_PATH)
+
+
+def has_archive(conn: sqlite3.Connection) -> bool:
+    """Whether `conn` has the archive database attached (see ConnectionPool)."""
+    return getattr(conn, "archive_attached", False)
+
+
+def get_db() -> sqlite3.Connection:
+    """Return the calling thread's pooled connection. Do not close it."""
+    return db_pool.connection()
+
+
+class Database:
+    """Async access to the database for `async def` endpoints.
+
+    Blocking work is written as plain functions taking a connection as their
+    first argument and submitted with `await db.run(fn, *args)`. They execute
+    on a dedicated set of threads, each with its own pooled connection, so
+    the event loop never blocks on SQLite and the number of in-flight
+    requests is not capped by the threadpool. Swapping SQLite for a server
+    database only means providing another object with the same `run`.
+    """
+
+    def __init__(self, pool: ConnectionPool, workers: int):
+        self.pool = pool
+        self.workers = workers
+        self._executor = None
+
+    def _call(self, fn, args, submitted):
+        start = time.perf_counter()
+        metrics.observe("helpdesk_db_queue_wait_seconds", (), start - submitted)
+        try:
+            return fn(self.pool.connection(), *args)
+        finally:
+            name = getattr(fn, "__name__", "call")
+            metrics.observe(
+                "helpdesk_db_call_seconds",
+                (("function", name),),
+                time.perf_counter() - start,
+            )
+
+    async def run(self, fn, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="db"
+            )
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, self._call, fn, args, time.perf_counter()
+        )
+
+    async def open(self):
+        await self.run(lambda conn: None)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        self.pool.close_all()
+
+
+db = Database(db_pool, DB_WORKERS)
 
 
 def create_token(username: str):
@@ -96,7 +970,11 @@ def verify_password(plain: str, hashed: str) -> bool:
                 return False
 
     try:
-        if hashed.startswith("$2a$") or hashed.startswith("$2b$") or hashed.startswith("$2y$"):
+        if (
+            hashed.startswith("$2a$")
+            or hashed.startswith("$2b$")
+            or hashed.startswith("$2y$")
+        ):
             return bcrypt.checkpw(plain.encode("utf-8"), hashed.encode("utf-8"))
     except Exception:
         pass
@@ -110,54 +988,312 @@ def verify_password(plain: str, hashed: str) -> bool:
     return plain == hashed
 
 
-def get_current_user(authorization: Optional[str] = Header(None, alias="Authorization")):
+def timed_verify_password(plain: str, hashed: str) -> bool:
+    start = time.perf_counter()
+    try:
+        return verify_password(plain, hashed)
+    finally:
+        scheme = "bcrypt" if is_bcrypt_hash(hashed) else "legacy"
+        metrics.observe(
+            "helpdesk_password_verify_seconds",
+            (("scheme", scheme),),
+            time.perf_counter() - start,
+        )
+
+
+def is_bcrypt_hash(hashed) -> bool:
+    if isinstance(hashed, bytes):
+        hashed = hashed.decode("utf-8", "replace")
+    return isinstance(hashed, str) and hashed.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+def hash_password(plain: str) -> str:
+    return bcrypt.hashpw(plain.encode("utf-8"), bcrypt.gensalt()).decode("utf-8")
+
+
+class PasswordPool:
+    """Small dedicated executor for bcrypt work with a bound on queued calls.
+
+    bcrypt releases the GIL, so a few threads are enough to use several
+    cores without occupying the threadpool that serves ticket reads. When
+    more than `max_pending` calls are waiting the request is rejected with
+    503 instead of queueing indefinitely.
+    """
+
+    def __init__(self, workers: int, max_pending: int):
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._executor = None
+
+    async def run(self, fn, *args):
+        # Only touched from the event loop thread, so no lock is needed.
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail=(
+                    "Demasiados inicios de sesión simultáneos, "
+                    "reintenta en unos segundos"
+                ),
+                headers={"Retry-After": "1"},
+            )
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="bcrypt"
+            )
+        self.pending += 1
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                self._executor, fn, *args
+            )
+        finally:
+            self.pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+password_pool = PasswordPool(LOGIN_WORKERS, LOGIN_MAX_PENDING)
+
+
+class UserCache:
+    """Bounded LRU cache of verified token -> user record, with a TTL.
+
+    A hit skips both the JWT decode and the users lookup. Entries for a user
+    are dropped with `invalidate_user` whenever that user's record changes;
+    the TTL bounds staleness for changes made by other processes.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._tokens_by_user = {}
+        self._lock = threading.Lock()
+
+    def get(self, token: str) -> Optional[dict]:
+        with self._lock:
+            entry = self._entries.get(token)
+            if entry is not None:
+                user, expires = entry
+                if expires > time.monotonic():
+                    self._entries.move_to_end(token)
+                    self.hits += 1
+                    return user
+                self._remove(token)
+            self.misses += 1
+            return None
+
+    def put(self, token: str, user: dict):
+        with self._lock:
+            self._remove(token)
+            self._entries[token] = (user, time.monotonic() + self.ttl)
+            self._tokens_by_user.setdefault(user["id"], set()).add(token)
+            while len(self._entries) > self.maxsize:
+                self._remove(next(iter(self._entries)))
+
+    def invalidate_user(self, user_id: int):
+        with self._lock:
+            for token in list(self._tokens_by_user.get(user_id, ())):
+                self._remove(token)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tokens_by_user.clear()
+
+    def _remove(self, token: str):
+        entry = self._entries.pop(token, None)
+        if entry is None:
+            return
+        tokens = self._tokens_by_user.get(entry[0]["id"])
+        if tokens is not None:
+            tokens.discard(token)
+            if not tokens:
+                del self._tokens_by_user[entry[0]["id"]]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+user_cache = UserCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+
+
+class ResponseCache:
+    """Bounded LRU cache of encoded read responses, tagged with a write generation.
+
+    An entry is only served while the database is still at the generation it
+    was built from (see write_generation), so there is no TTL to tune and a
+    write made by any worker process invalidates every cached read at once.
+    Memory is bounded both by entry count and by total body size.
+    """
+
+    def __init__(self, maxsize: int, max_bytes: int):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple, generation: int) -> Optional[tuple]:
+        """Return `(body, headers)` if cached at `generation`, else None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                if entry[0] == generation:
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return entry[1], entry[2]
+                self._remove(key)
+            self.misses += 1
+            return None
+
+    def put(self, key: tuple, generation: int, body: bytes, headers: Optional[dict]):
+        if len(body) > self.max_bytes:
+            return
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (generation, body, headers)
+            self.bytes += len(body)
+            while len(self._entries) > self.maxsize or self.bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes = 0
+
+    def _remove(self, key: tuple):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(entry[1])
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "bytes": self.bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_BYTES)
+
+
+def fetch_user(conn: sqlite3.Connection, username: str):
+    cur = conn.execute(
+        "SELECT id, username, full_name, role FROM users WHERE username = ?",
+        (username,),
+    )
+    return cur.fetchone()
+
+
+async def get_current_user(
+    authorization: Optional[str] = Header(None, alias="Authorization")
+):
     if not authorization:
         raise HTTPException(status_code=401, detail="No token")
-    token = authorization.split()[1] if authorization.startswith("Bearer ") else authorization
+    token = (
+        authorization.split()[1]
+        if authorization.startswith("Bearer ")
+        else authorization
+    )
+    cached = user_cache.get(token)
+    if cached is not None:
+        return cached
     try:
         payload = jwt.decode(token, SECRET, algorithms=["HS256"])
         username = payload.get("sub")
         if not username:
             raise HTTPException(status_code=401)
-        conn = get_db()
-        cur = conn.execute("SELECT id, username, full_name, role FROM users WHERE username = ?", (username,))
-        row = cur.fetchone()
-        conn.close()
+        row = await db.run(fetch_user, username)
         if not row:
             raise HTTPException(status_code=401)
-        return {"id": row["id"], "username": row["username"], "name": row["full_name"], "role": row["role"]}
+        user = {
+            "id": row["id"],
+            "username": row["username"],
+            "name": row["full_name"],
+            "role": row["role"],
+        }
     except HTTPException:
         raise
     except Exception:
         raise HTTPException(status_code=401, detail="Invalid token")
+    user_cache.put(token, user)
+    return user
 
 
 # ============================================================
 # ENDPOINTS DE AUTENTICACIÓN
 # ============================================================
 
+
+def fetch_login_user(conn: sqlite3.Connection, username: str):
+    cur = conn.execute(
+        "SELECT id, username, full_name, password_hash, role FROM users "
+        "WHERE username = ?",
+        (username,),
+    )
+    return cur.fetchone()
+
+
+def store_password_hash(conn: sqlite3.Connection, user_id: int, password_hash: str):
+    conn.execute(
+        "UPDATE users SET password_hash = ? WHERE id = ?", (password_hash, user_id)
+    )
+    conn.commit()
+    user_cache.invalidate_user(user_id)
+
+
 @app.post("/auth/login")
-def login(data: LoginIn):
-    conn = get_db()
-    cur = conn.execute("SELECT id, username, full_name, password_hash, role FROM users WHERE username = ?", (data.username,))
-    row = cur.fetchone()
-    conn.close()
+async def login(data: LoginIn):
+    row = await db.run(fetch_login_user, data.username)
 
     if not row:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
     try:
-        result = verify_password(data.password, row["password_hash"])
-    except Exception as e:
-        print("auth debug: verify_password raised:", e)
+        result = await password_pool.run(
+            timed_verify_password, data.password, row["password_hash"]
+        )
+    except HTTPException:
+        raise
+    except Exception:
+        logger.exception("verify_password raised for user %s", data.username)
         result = False
 
-    hash_prefix = (row["password_hash"][:8] + "...") if row["password_hash"] else "None"
-    print("auth debug: login user=", data.username, "hash=", hash_prefix, "verify=", result)
+    logger.debug("login user=%s verify=%s", data.username, result)
 
     if not result:
         raise HTTPException(status_code=401, detail="Credenciales inválidas")
 
+    if not is_bcrypt_hash(row["password_hash"]):
+        # Legacy SHA-256 / plaintext hash: upgrade it now that we know the password.
+        try:
+            new_hash = await password_pool.run(hash_password, data.password)
+            await db.run(store_password_hash, row["id"], new_hash)
+        except (HTTPException, sqlite3.Error) as e:
+            logger.warning("password rehash skipped for user %s: %s", data.username, e)
+
     token = create_token(row["username"])
     return {
         "token": token,
@@ -173,15 +1309,20 @@ def login(data: LoginIn):
 # ENDPOINTS DE USUARIOS
 # ============================================================
 
+
+def fetch_users(conn: sqlite3.Connection) -> list:
+    cur = conn.execute(
+        "SELECT id, username, full_name, role, created_at FROM users ORDER BY id ASC"
+    )
+    return cur.fetchall()
+
+
 @app.get("/users")
-def list_users(user: dict = Depends(get_current_user)):
+async def list_users(user: dict = Depends(get_current_user)):
     if user["role"].lower() != "admin":
         raise HTTPException(status_code=403, detail="Acceso denegado")
 
-    conn = get_db()
-    cur = conn.execute("SELECT id, username, full_name, role, created_at FROM users ORDER BY id ASC")
-    rows = cur.fetchall()
-    conn.close()
+    rows = await db.run(fetch_users)
 
     users = [
         {
@@ -197,9 +1338,47 @@ def list_users(user: dict = Depends(get_current_user)):
 
 
 # ============================================================
-# ENDPOINTS DE TICKETS
+# CAPA DE ACCESO A TICKETS
 # ============================================================
 
+TICKET_FIELDS = {
+    "id": "id",
+    "title": "title",
+    "description": "description",
+    "priority": "priority",
+    "status": "status",
+    "reporter_id": "reporter_id",
+    "assignee_id": "assignee_id",
+    "createdAt": "created_at",
+    "updatedAt": "updated_at",
+}
+# SELECT expression per API field; ids are exposed as strings.
+TICKET_COLUMNS = {
+    key: "CAST(id AS TEXT)" if key == "id" else column
+    for key, column in TICKET_FIELDS.items()
+}
+# RETURNING clause yielding a row in TICKET_FIELDS order.
+TICKET_RETURNING = ", ".join(TICKET_COLUMNS.values())
+
+# Hot tables plus the archive. An archived row whose ticket is still in main
+# (copied but not yet deleted, see archive_closed_tickets) is skipped.
+TICKETS_WITH_ARCHIVE = (
+    "(SELECT id, title, description, priority, status, reporter_id, assignee_id, "
+    "created_at, updated_at "
+    "FROM main.tickets UNION ALL "
+    "SELECT id, title, description, priority, status, reporter_id, assignee_id, "
+    "created_at, updated_at "
+    "FROM archive.tickets a WHERE NOT EXISTS (SELECT 1 FROM main.tickets t "
+    "WHERE t.id = a.id)) AS tickets"
+)
+COMMENTS_WITH_ARCHIVE = (
+    "(SELECT ticket_id, id, author_id, text, created_at FROM main.comments UNION ALL "
+    "SELECT ticket_id, id, author_id, text, created_at FROM archive.comments a "
+    "WHERE NOT EXISTS (SELECT 1 FROM main.tickets t "
+    "WHERE t.id = a.ticket_id)) AS comments"
+)
+
+
 def row_to_ticket(row: sqlite3.Row) -> dict:
     return {
         "id": str(row["id"]),
@@ -214,118 +1393,2513 @@ def row_to_ticket(row: sqlite3.Row) -> dict:
     }
 
 
-@app.get("/tickets")
-def list_tickets(user: dict = Depends(get_current_user)):
-    conn = get_db()
-    cur = conn.execute("SELECT * FROM tickets ORDER BY created_at DESC")
-    rows = cur.fetchall()
-    tickets = [row_to_ticket(r) for r in rows]
+def row_to_comment(row: sqlite3.Row) -> dict:
+    return {
+        "id": str(row["id"]),
+        "author_id": row["author_id"],
+        "text": row["text"],
+        "createdAt": row["created_at"],
+    }
 
-    for t in tickets:
-        cur = conn.execute(
-            "SELECT id, author_id, text, created_at FROM comments WHERE ticket_id = ? ORDER BY created_at ASC",
-            (int(t["id"]),),
+
+def encode_cursor(created_at: str, ticket_id: int) -> str:
+    raw = json.dumps([created_at, ticket_id]).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        created_at, ticket_id = json.loads(raw)
+        return str(created_at), int(ticket_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def tuple_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+    """A cursor yielding plain tuples instead of sqlite3.Row (cheaper in bulk)."""
+    cur = conn.cursor()
+    cur.row_factory = None
+    return cur
+
+
+def query_tickets(
+    conn: sqlite3.Connection,
+    where: str = "",
+    params: tuple = (),
+    limit: Optional[int] = None,
+    fields: Optional[list] = None,
+    comments: bool = True,
+    archived: bool = False,
+) -> tuple:
+    """Load a page of tickets and their comments with a constant number of queries.
+
+    `where` is an optional SQL fragment (e.g. "WHERE id = ?") applied to the
+    tickets query. Comments are fetched in a single pass and attached to their
+    ticket through a dict keyed by id, instead of one query per ticket.
+
+    `fields` restricts the ticket keys returned (API names, see
+    TICKET_FIELDS) and `comments=False` skips the comment query entirely.
+    `archived=True` also reads the archive database.
+    Returns `(tickets, next_cursor)`; the cursor is None on the last page.
+
+    Rows are read as tuples already shaped like the API output (ids cast to
+    text in SQL) and zipped into dicts, skipping sqlite3.Row lookups.
+    """
+    keys = fields or list(TICKET_FIELDS)
+    # created_at and id always trail the selected columns for the cursor.
+    select = ", ".join(TICKET_COLUMNS[k] for k in keys) + ", created_at, id"
+    tickets_source, comments_source = ("tickets", "comments")
+    if archived and has_archive(conn):
+        tickets_source, comments_source = (TICKETS_WITH_ARCHIVE, COMMENTS_WITH_ARCHIVE)
+    sql = (
+        f"SELECT {select} FROM {tickets_source} {where} "
+        "ORDER BY created_at DESC, id DESC"
+    )
+    if limit is not None:
+        # One extra row tells us whether there is a next page. Bound, so every
+        # page size shares one cached statement.
+        sql += " LIMIT ?"
+        params = (*params, int(limit) + 1)
+
+    rows = tuple_cursor(conn).execute(sql, params).fetchall()
+    next_cursor = None
+    if limit is not None and len(rows) > limit:
+        rows.pop()
+        next_cursor = encode_cursor(rows[-1][-2], rows[-1][-1])
+
+    tickets = []
+    comments_by_ticket = {}
+    for row in rows:
+        t = dict(zip(keys, row))
+        if comments:
+            t["comments"] = comments_by_ticket[row[-1]] = []
+        tickets.append(t)
+
+    if not comments_by_ticket:
+        return tickets, next_cursor
+
+    cur = tuple_cursor(conn)
+    if where or limit is not None:
+        # Pass the ids as one JSON parameter so the query stays the same
+        # regardless of how many tickets matched (no SQLITE_MAX_VARIABLE_NUMBER).
+        cur.execute(
+            "SELECT ticket_id, CAST(id AS TEXT), author_id, text, created_at "
+            f"FROM {comments_source} "
+            "WHERE ticket_id IN (SELECT value FROM json_each(?)) "
+            "ORDER BY ticket_id, created_at ASC, id ASC",
+            (json.dumps(list(comments_by_ticket)),),
+        )
+    else:
+        cur.execute(
+            "SELECT ticket_id, CAST(id AS TEXT), author_id, text, created_at "
+            f"FROM {comments_source} "
+            "ORDER BY ticket_id, created_at ASC, id ASC"
+        )
+    for ticket_id, comment_id, author_id, text, created_at in cur:
+        bucket = comments_by_ticket.get(ticket_id)
+        if bucket is not None:
+            bucket.append(
+                {
+                    "id": comment_id,
+                    "author_id": author_id,
+                    "text": text,
+                    "createdAt": created_at,
+                }
+            )
+    return tickets, next_cursor
+
+
+def load_tickets(conn: sqlite3.Connection, where: str = "", params: tuple = ()) -> list:
+    return query_tickets(conn, where, params)[0]
+
+
+def load_ticket(conn: sqlite3.Connection, ticket_id: int) -> Optional[dict]:
+    tickets = load_tickets(conn, "WHERE id = ?", (ticket_id,))
+    return tickets[0] if tickets else None
+
+
+def fetch_ticket_detail(
+    conn: sqlite3.Connection,
+    ticket_id: int,
+    comments_limit: int,
+    comments_cursor: Optional[tuple] = None,
+    as_of: Optional[str] = None,
+) -> Optional[dict]:
+    """One ticket (archived ones too) with a single page of its comments.
+
+    Comments are paginated oldest first on (created_at, id), which
+    idx_comments_ticket_created serves directly (the id is the rowid), so a
+    page costs about the same on a ticket with ten comments or ten thousand.
+    `nextCommentsCursor` is None on the last page. With `as_of` the ticket is
+    rebuilt from its history as it was then, with the comments it had.
+    """
+    # Read the comments from whichever database holds the ticket, so the
+    # page query runs on a plain index instead of the UNION of both.
+    comments_source = "main.comments"
+    tickets, _ = query_tickets(conn, "WHERE id = ?", (ticket_id,), comments=False)
+    if not tickets and has_archive(conn):
+        tickets, _ = query_tickets(
+            conn, "WHERE id = ?", (ticket_id,), comments=False, archived=True
+        )
+        if tickets:
+            comments_source = "archive.comments"
+    ticket = tickets[0] if tickets else None
+    if as_of is not None:
+        ticket = ticket_state_as_of(conn, ticket_id, as_of, ticket)
+    if ticket is None:
+        return None
+
+    clauses = ["ticket_id = ?"]
+    params = [ticket_id]
+    if as_of is not None:
+        clauses.append("created_at <= ?")
+        params.append(as_of)
+    count_sql = f"SELECT COUNT(*) FROM {comments_source} WHERE {' AND '.join(clauses)}"
+    count_params = tuple(params)
+    if comments_cursor:
+        clauses.append("(created_at, id) > (?, ?)")
+        params.extend(comments_cursor)
+    rows = (
+        tuple_cursor(conn)
+        .execute(
+            "SELECT CAST(id AS TEXT), author_id, text, created_at, id "
+            f"FROM {comments_source} "
+            f"WHERE {' AND '.join(clauses)} ORDER BY created_at, id LIMIT ?",
+            (*params, comments_limit + 1),
         )
-        comments = [
-            {"id": str(c["id"]), "author_id": c["author_id"], "text": c["text"], "createdAt": c["created_at"]}
-            for c in cur.fetchall()
+        .fetchall()
+    )
+    next_cursor = None
+    if len(rows) > comments_limit:
+        rows.pop()
+        if rows:
+            next_cursor = encode_cursor(rows[-1][3], rows[-1][4])
+
+    ticket["comments"] = [
+        {
+            "id": comment_id,
+            "author_id": author_id,
+            "text": text,
+            "createdAt": created_at,
+        }
+        for comment_id, author_id, text, created_at, _ in rows
+    ]
+    ticket["commentCount"] = conn.execute(count_sql, count_params).fetchone()[0]
+    ticket["nextCommentsCursor"] = next_cursor
+    return ticket
+
+
+def write_generation(conn: sqlite3.Connection) -> int:
+    """Current write generation of the ticket data, shared by all processes.
+
+    The change_log triggers give every insert, update and delete of a ticket
+    or comment (from any connection: API workers, bulk loads, the archiver) a
+    new, higher seq, so MAX(seq) moves on every write. It is one lookup at
+    the end of idx_change_log_seq.
+    """
+    return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0]
+
+
+async def cached_json(key: tuple, load) -> Response:
+    """Serve a JSON read from response_cache, or build it with `await load()`.
+
+    `load` returns `(content, headers)`. The generation is read before the
+    data, so an entry never holds data older than the generation it is
+    tagged with. X-Cache tells whether the response came from the cache.
+    """
+    generation = await db.run(write_generation)
+    entry = response_cache.get(key, generation)
+    if entry is None:
+        content, headers = await load()
+        entry = (dump_json(content), headers)
+        response_cache.put(key, generation, *entry)
+        status = "MISS"
+    else:
+        status = "HIT"
+    body, headers = entry
+    return Response(
+        body,
+        media_type="application/json",
+        headers={**(headers or {}), "X-Cache": status},
+    )
+
+
+def split_param(value: Optional[str]) -> list:
+    return [v.strip() for v in value.split(",") if v.strip()] if value else []
+
+
+def parse_timestamp(value: Optional[str], name: str) -> Optional[str]:
+    """Normalise an ISO date or datetime query parameter to the stored format.
+
+    Timestamps are stored in UTC (datetime('now')), so an explicit offset is
+    converted to UTC; a value without one is taken as UTC already.
+    """
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(
+            status_code=400, detail=f"Invalid {name}: expected an ISO date or datetime"
+        )
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(timezone.utc)
+    return moment.strftime("%Y-%m-%d %H:%M:%S")
+
+
+# ============================================================
+# BUS DE EVENTOS
+# ============================================================
+
+
+class EventBus:
+    """In-process publish/subscribe of ticket changes.
+
+    Publishing is thread-safe (it may happen on the event loop or on a DB
+    thread); each subscriber is an
+    asyncio.Queue owned by the event loop serving its SSE connection, so an
+    idle client costs a queue and a suspended coroutine, not a thread. The
+    last `history` events are kept so a reconnecting client can resume from
+    its Last-Event-ID.
+    """
+
+    RESET = "reset"
+
+    def __init__(self, history: int, queue_size: int):
+        self.queue_size = queue_size
+        self._history = deque(maxlen=history)
+        self._subscribers = {}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def publish(self, event_type: str, data: dict) -> int:
+        with self._lock:
+            event = (self._next_id, event_type, data)
+            self._next_id += 1
+            self._history.append(event)
+            subscribers = list(self._subscribers.items())
+        for queue, loop in subscribers:
+            try:
+                loop.call_soon_threadsafe(self._deliver, queue, event)
+            except RuntimeError:
+                # The subscriber's loop is closed; it will unsubscribe itself.
+                pass
+        return event[0]
+
+    @classmethod
+    def _deliver(cls, queue: asyncio.Queue, event: tuple):
+        if queue.full():
+            # Slow consumer: drop what it has not read and ask it to refetch.
+            while not queue.empty():
+                queue.get_nowait()
+            event = (event[0], cls.RESET, {})
+        queue.put_nowait(event)
+
+    def subscribe(self, last_event_id: Optional[int] = None) -> tuple:
+        """Register a subscriber on the running loop.
+
+        Returns `(queue, backlog)`. The backlog holds the events after
+        `last_event_id`, or a single reset event if they are no longer in
+        the history buffer.
+        """
+        queue = asyncio.Queue(self.queue_size)
+        with self._lock:
+            self._subscribers[queue] = asyncio.get_running_loop()
+            backlog = []
+            if last_event_id is not None:
+                backlog = [e for e in self._history if e[0] > last_event_id]
+                oldest = self._history[0][0] if self._history else self._next_id
+                # Events were evicted, or the id comes from before a restart.
+                if last_event_id + 1 < oldest or last_event_id >= self._next_id:
+                    backlog = [(self._next_id - 1, self.RESET, {})]
+        return queue, backlog
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        with self._lock:
+            self._subscribers.pop(queue, None)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+
+event_bus = EventBus(EVENT_HISTORY, EVENT_QUEUE_SIZE)
+
+
+# ============================================================
+# ASIGNACIÓN AUTOMÁTICA
+# ============================================================
+
+# Tickets that count towards an agent's load, and what each priority weighs.
+OPEN_STATUSES = ("open", "in_progress")
+PRIORITY_LOAD = {"low": 1, "normal": 2, "high": 4, "urgent": 8}
+
+
+class LeastLoadedPolicy:
+    """Fewest open tickets wins; ties go to the agent idle the longest."""
+
+    name = "least_loaded"
+
+    def weight(self, priority: str) -> int:
+        return 1
+
+    def pick(self, engine: "AssignmentEngine") -> Optional[int]:
+        return engine.least_loaded()
+
+
+class PriorityAwarePolicy(LeastLoadedPolicy):
+    """Least loaded, where an urgent ticket weighs as much as eight low ones."""
+
+    name = "priority_aware"
+
+    def weight(self, priority: str) -> int:
+        return PRIORITY_LOAD.get(priority, 1)
+
+
+class RoundRobinPolicy(LeastLoadedPolicy):
+    """Agents in turn, regardless of their load."""
+
+    name = "round_robin"
+
+    def __init__(self):
+        self._turn = 0
+
+    def pick(self, engine: "AssignmentEngine") -> Optional[int]:
+        if not engine.agents:
+            return None
+        agent = engine.agents[self._turn % len(engine.agents)]
+        self._turn += 1
+        return agent
+
+
+ASSIGNMENT_POLICIES = {
+    cls.name: cls for cls in (RoundRobinPolicy, LeastLoadedPolicy, PriorityAwarePolicy)
+}
+
+
+class AssignmentEngine:
+    """In-memory open-ticket load per agent, for picking an assignee in O(log n).
+
+    Agents (users with role 'agent') sit in a min-heap keyed by their load as
+    measured by the policy. A load change pushes a fresh entry and outdated
+    ones are discarded when they reach the top (the heap is compacted when
+    they pile up), so neither assigning nor updating scans the agents or the
+    tickets table. `tickets` remembers the agent and weight of every open
+    assigned ticket, so updates and deletes can take the old load back, and
+    `pending` the charges of takes not yet bound or released, which a rebuild
+    applies again on top of its snapshot.
+
+    The state is loaded from the database on first use and then kept up to
+    date by the write paths of this process; with several worker processes
+    `assignment_loop` reloads it every HELPDESK_ASSIGNMENT_RESYNC seconds to
+    pick up the others' writes and new agents.
+    """
+
+    def __init__(self, policy):
+        self.policy = policy
+        self.loaded = False
+        self.agents = []
+        self.loads = {}
+        self.tickets = {}
+        self.pending = Counter()
+        self._heap = []
+        self._order = itertools.count()
+        self._lock = threading.RLock()
+
+    def rebuild(self, agents, open_tickets):
+        """Reset from agent ids and the `(ticket_id, assignee_id, priority)` rows."""
+        with self._lock:
+            self.agents = sorted(agents)
+            self.loads = dict.fromkeys(self.agents, 0)
+            self.tickets = {}
+            for ticket_id, assignee_id, priority in open_tickets:
+                if assignee_id in self.loads:
+                    weight = self.policy.weight(priority)
+                    self.tickets[ticket_id] = (assignee_id, weight)
+                    self.loads[assignee_id] += weight
+            # Tickets taken but not bound yet may be missing from the snapshot;
+            # bind() takes the charge back if they were in it after all.
+            for (agent, weight), count in self.pending.items():
+                if agent in self.loads:
+                    self.loads[agent] += weight * count
+            self._compact()
+            self.loaded = True
+
+    def load(self, conn: sqlite3.Connection):
+        # Under the lock, so no write path changes the loads between the
+        # snapshot and the rebuild.
+        with self._lock:
+            agents = [
+                r[0] for r in conn.execute("SELECT id FROM users WHERE role = 'agent'")
+            ]
+            # idx_tickets_assignee: only assigned tickets are visited.
+            open_tickets = tuple_cursor(conn).execute(
+                "SELECT id, assignee_id, priority FROM tickets "
+                "WHERE assignee_id IS NOT NULL AND status IN ('open', 'in_progress')"
+            )
+            self.rebuild(agents, open_tickets)
+
+    def least_loaded(self) -> Optional[int]:
+        heap = self._heap
+        while heap:
+            load, _, agent = heap[0]
+            if self.loads.get(agent) == load:
+                return agent
+            heapq.heappop(heap)
+        return None
+
+    def take(self, conn: sqlite3.Connection, priority: str) -> Optional[int]:
+        """Choose the agent for a new ticket and charge it the ticket's weight."""
+        if not self.loaded:
+            self.load(conn)
+        with self._lock:
+            agent = self.policy.pick(self)
+            if agent is not None:
+                weight = self.policy.weight(priority)
+                self.pending[agent, weight] += 1
+                self._add(agent, weight)
+            return agent
+
+    def release(self, agent: Optional[int], priority: str):
+        """Undo `take` when the ticket could not be stored."""
+        if agent is not None:
+            with self._lock:
+                weight = self.policy.weight(priority)
+                self._settle(agent, weight)
+                self._add(agent, -weight)
+
+    def bind(self, ticket_id: int, agent: Optional[int], priority: str):
+        """Record the ticket a `take` was for."""
+        if agent is not None:
+            with self._lock:
+                weight = self.policy.weight(priority)
+                self._settle(agent, weight)
+                if ticket_id in self.tickets:
+                    # A rebuild since the take already counted the stored ticket.
+                    self._add(agent, -weight)
+                else:
+                    self.tickets[ticket_id] = (agent, weight)
+
+    def update(
+        self,
+        ticket_id: int,
+        assignee_id: Optional[int],
+        status: Optional[str],
+        priority: Optional[str],
+    ):
+        """Move a ticket's weight after a change of assignee, status or priority."""
+        with self._lock:
+            old = self.tickets.pop(ticket_id, None)
+            if old is not None:
+                self._add(old[0], -old[1])
+            if status in OPEN_STATUSES and assignee_id in self.loads:
+                weight = self.policy.weight(priority)
+                self.tickets[ticket_id] = (assignee_id, weight)
+                self._add(assignee_id, weight)
+
+    def forget(self, ticket_id: int):
+        self.update(ticket_id, None, None, None)
+
+    def _settle(self, agent: int, weight: int):
+        self.pending[agent, weight] -= 1
+        if self.pending[agent, weight] <= 0:
+            del self.pending[agent, weight]
+
+    def _add(self, agent: int, weight: int):
+        if agent not in self.loads:
+            return
+        self.loads[agent] += weight
+        heapq.heappush(self._heap, (self.loads[agent], next(self._order), agent))
+        if len(self._heap) > 4 * len(self.loads) + 64:
+            self._compact()
+
+    def _compact(self):
+        self._heap = [
+            (load, next(self._order), agent) for agent, load in self.loads.items()
         ]
-        t["comments"] = comments
+        heapq.heapify(self._heap)
 
-    conn.close()
-    return tickets
 
+class NoAssignment:
+    """Stand-in engine for HELPDESK_ASSIGNMENT_POLICY=off: tickets stay unassigned."""
 
-@app.post("/tickets")
-def create_ticket(ticket: TicketIn, user: dict = Depends(get_current_user)):
-    conn = get_db()
-    cur = conn.execute(
-        "INSERT INTO tickets (title, description, priority, status, reporter_id, assignee_id, created_at, updated_at) "
-        "VALUES (?, ?, ?, ?, ?, ?, datetime('now'), datetime('now'))",
-        (ticket.title, ticket.description, ticket.priority, "open", user["id"], None),
+    def take(self, conn, priority):
+        return None
+
+    def load(self, conn):
+        pass
+
+    def release(self, agent, priority):
+        pass
+
+    def bind(self, ticket_id, agent, priority):
+        pass
+
+    def update(self, ticket_id, assignee_id, status, priority):
+        pass
+
+    def forget(self, ticket_id):
+        pass
+
+
+def make_assignment_engine(policy: str):
+    if policy == "off":
+        return NoAssignment()
+    if policy not in ASSIGNMENT_POLICIES:
+        raise RuntimeError(
+            f"Unknown HELPDESK_ASSIGNMENT_POLICY {policy!r}; use off or one of "
+            f"{', '.join(ASSIGNMENT_POLICIES)}"
+        )
+    return AssignmentEngine(ASSIGNMENT_POLICIES[policy]())
+
+
+assignment = make_assignment_engine(ASSIGNMENT_POLICY)
+
+
+async def assignment_loop():
+    """Reload agent loads from the database, for changes made by other processes."""
+    while True:
+        try:
+            await db.run(assignment.load)
+        except Exception:
+            logger.exception("assignment resync failed")
+        await asyncio.sleep(ASSIGNMENT_RESYNC_SECONDS)
+
+
+# ============================================================
+# HISTORIAL DE TICKETS
+# ============================================================
+
+# Ticket fields tracked by ticket_events; updatedAt is the event's time.
+HISTORY_FIELDS = tuple(key for key in TICKET_FIELDS if key not in ("id", "updatedAt"))
+HISTORY_VERSION = (
+    "(SELECT MAX(version) FROM ticket_events e WHERE e.ticket_id = tickets.id)"
+)
+
+
+def history_state(ticket: dict) -> str:
+    return dump_json({key: ticket[key] for key in HISTORY_FIELDS}).decode()
+
+
+def history_event(
+    ticket_id: int,
+    version: int,
+    kind: str,
+    actor_id,
+    changes: dict,
+    ticket: dict,
+    at: str,
+) -> tuple:
+    """A ticket_events row; every HISTORY_SNAPSHOT_EVERY versions, a full snapshot."""
+    snapshot = history_state(ticket) if version % HISTORY_SNAPSHOT_EVERY == 0 else None
+    return (
+        ticket_id,
+        version,
+        kind,
+        actor_id,
+        dump_json(changes).decode(),
+        snapshot,
+        at,
+    )
+
+
+def creation_event(ticket: dict, actor_id) -> tuple:
+    return history_event(
+        int(ticket["id"]),
+        1,
+        "created",
+        actor_id,
+        {key: ticket[key] for key in HISTORY_FIELDS},
+        ticket,
+        ticket["updatedAt"],
+    )
+
+
+def change_events(
+    old: dict, version: Optional[int], new: Optional[dict], actor_id
+) -> list:
+    """Events turning `old` (at history `version`) into `new`; None means deleted.
+
+    Only fields whose value changed are stored, and an update that changes
+    nothing records nothing. A ticket without history yet (created before
+    it, or loaded by init_db) first gets a snapshot of its previous state.
+    """
+    ticket_id = int(old["id"])
+    if new is None:
+        kind, changes, at = "deleted", {}, None
+    else:
+        changes = {key: new[key] for key in HISTORY_FIELDS if new[key] != old[key]}
+        if not changes:
+            return []
+        kind, at = "updated", new["updatedAt"]
+    events = []
+    if version is None:
+        events.append(
+            (ticket_id, 1, "snapshot", None, "{}", history_state(old), old["updatedAt"])
+        )
+        version = 1
+    events.append(
+        history_event(ticket_id, version + 1, kind, actor_id, changes, new or old, at)
+    )
+    return events
+
+
+def append_ticket_events(conn: sqlite3.Connection, events: list):
+    """Insert history rows; a NULL created_at (deletions) becomes now."""
+    if events:
+        conn.executemany(
+            "INSERT INTO ticket_events "
+            "(ticket_id, version, kind, actor_id, changes, snapshot, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, COALESCE(?, datetime('now')))",
+            events,
+        )
+
+
+def lock_tickets(conn: sqlite3.Connection, where: str, params: tuple) -> dict:
+    """Current row and history version of tickets about to change.
+
+    Returns {id: (ticket, version)}. Call inside BEGIN IMMEDIATE, so nobody
+    else writes in between.
+    """
+    rows = tuple_cursor(conn).execute(
+        f"SELECT {TICKET_RETURNING}, {HISTORY_VERSION} FROM tickets {where}", params
+    )
+    return {int(row[0]): (dict(zip(TICKET_FIELDS, row)), row[-1]) for row in rows}
+
+
+def ticket_history(
+    conn: sqlite3.Connection, ticket_id: int, limit: int, after: int = 0
+) -> Optional[tuple]:
+    """A page of a ticket's events, oldest first, and the cursor of the next one.
+
+    None if there is no such ticket and never was.
+    """
+    rows = (
+        tuple_cursor(conn)
+        .execute(
+            "SELECT version, kind, actor_id, changes, snapshot, created_at "
+            "FROM ticket_events "
+            "WHERE ticket_id = ? AND version > ? ORDER BY version LIMIT ?",
+            (ticket_id, after, limit + 1),
+        )
+        .fetchall()
+    )
+    if not rows and not after:
+        exists = ticket_exists(conn, ticket_id) or (
+            has_archive(conn)
+            and conn.execute(
+                "SELECT 1 FROM archive.tickets WHERE id = ?", (ticket_id,)
+            ).fetchone()
+            is not None
+        )
+        if not exists:
+            return None
+    next_cursor = None
+    if len(rows) > limit:
+        rows.pop()
+        next_cursor = rows[-1][0] if rows else None
+    events = [
+        {
+            "version": version,
+            "kind": kind,
+            "actor_id": actor_id,
+            # A baseline snapshot has no changes; show the state it recorded.
+            "changes": json.loads(snapshot if kind == "snapshot" else changes),
+            "createdAt": created_at,
+        }
+        for version, kind, actor_id, changes, snapshot, created_at in rows
+    ]
+    return events, next_cursor
+
+
+def ticket_state_as_of(
+    conn: sqlite3.Connection, ticket_id: int, as_of: str, current: Optional[dict]
+) -> Optional[dict]:
+    """The ticket as it was at `as_of`, or None if it did not exist then.
+
+    Walks the history backwards from `as_of` to the closest full state (a
+    snapshot or the creation, at most HISTORY_SNAPSHOT_EVERY rows away) and
+    replays the changes after it. `current` is the ticket as it is now, used
+    when it has no history at all.
+    """
+    events = []
+    for version, kind, changes, snapshot, created_at in tuple_cursor(conn).execute(
+        "SELECT version, kind, changes, snapshot, created_at FROM ticket_events "
+        "WHERE ticket_id = ? AND created_at <= ? ORDER BY version DESC",
+        (ticket_id, as_of),
+    ):
+        if kind == "deleted" and not events:
+            return None
+        events.append((version, changes, created_at))
+        if snapshot is not None or kind == "created":
+            state = json.loads(snapshot if snapshot is not None else changes)
+            break
+    else:
+        return ticket_state_before_history(conn, ticket_id, as_of, current)
+
+    for _, changes, _ in reversed(events[:-1]):
+        state.update(json.loads(changes))
+    version, _, created_at = events[0]
+    return {"id": str(ticket_id), **state, "updatedAt": created_at, "version": version}
+
+
+def ticket_state_before_history(
+    conn: sqlite3.Connection, ticket_id: int, as_of: str, current: Optional[dict]
+) -> Optional[dict]:
+    """`as_of` precedes the ticket's first event (or it has none).
+
+    None if the ticket was created after `as_of`. A ticket older than its
+    history (created before ticket_events, or loaded by init_db) is known
+    only from its last update on: the current row if that is not after
+    `as_of`, else 409 with the moment its history starts.
+    """
+    first = conn.execute(
+        "SELECT changes, snapshot, created_at FROM ticket_events WHERE ticket_id = ? "
+        "ORDER BY version LIMIT 1",
+        (ticket_id,),
+    ).fetchone()
+    if first is not None:
+        created, starts = json.loads(first[1] or first[0])["createdAt"], first[2]
+    elif current is not None:
+        if current["updatedAt"] <= as_of:
+            return {**current, "version": None}
+        created, starts = current["createdAt"], current["updatedAt"]
+    else:
+        return None
+    if created > as_of:
+        return None
+    raise HTTPException(status_code=409, detail=f"Ticket history starts at {starts}")
+
+
+# ============================================================
+# ENDPOINTS DE TICKETS
+# ============================================================
+
+
+@app.get("/tickets")
+async def list_tickets(
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    assignee_id: Optional[int] = None,
+    reporter_id: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    fields: Optional[str] = None,
+    include: Optional[str] = None,
+    include_archived: bool = False,
+    user: dict = Depends(get_current_user),
+):
+    """List tickets, newest first.
+
+    Without parameters this returns every ticket with its comments (legacy
+    behaviour). `limit`/`cursor` paginate on (created_at, id) and the cursor
+    for the next page is returned in the X-Next-Cursor header. `fields`
+    selects ticket keys; when it is given, comments are only embedded with
+    `include=comments`. Archived tickets are only listed with
+    `include_archived=1`.
+    """
+    selected = split_param(fields)
+    unknown = [f for f in selected if f not in TICKET_FIELDS]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown fields: {', '.join(unknown)}"
+        )
+    with_comments = "comments" in split_param(include) or (
+        not selected and include is None
+    )
+
+    clauses = []
+    params = []
+    for column, value in (
+        ("status", status),
+        ("priority", priority),
+        ("assignee_id", assignee_id),
+        ("reporter_id", reporter_id),
+    ):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if cursor:
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend(decode_cursor(cursor))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+    async def load():
+        tickets, next_cursor = await db.run(
+            query_tickets,
+            where,
+            tuple(params),
+            limit,
+            selected or None,
+            with_comments,
+            include_archived,
+        )
+        return tickets, {"X-Next-Cursor": next_cursor} if next_cursor else None
+
+    key = (
+        "list",
+        user["role"],
+        where,
+        tuple(params),
+        limit,
+        tuple(selected),
+        with_comments,
+        include_archived,
+    )
+    return await cached_json(key, load)
+
+
+SEARCH_SQL = """
+WITH hits AS (
+  SELECT rowid AS ticket_id, NULL AS comment_id, bm25(tickets_fts, 10.0, 3.0) AS score
+  FROM tickets_fts WHERE tickets_fts MATCH :q
+  UNION ALL
+  SELECT c.ticket_id, c.id, bm25(comments_fts)
+  FROM comments_fts JOIN comments c ON c.id = comments_fts.rowid
+  WHERE comments_fts MATCH :q
+)
+SELECT ticket_id, comment_id, MIN(score) AS score
+FROM hits GROUP BY ticket_id
+ORDER BY score, ticket_id
+LIMIT :limit OFFSET :offset
+"""
+
+
+def fts_query(text: str) -> str:
+    """Make free text a safe FTS5 query: all words must match, the last as a prefix."""
+    terms = re.findall(r"\w+", text)
+    if not terms:
+        raise HTTPException(status_code=400, detail="Empty search query")
+    quoted = [f'"{t}"' for t in terms]
+    quoted[-1] += "*"
+    return " ".join(quoted)
+
+
+def search_ticket_rows(
+    conn: sqlite3.Connection, match: str, limit: int, offset: int
+) -> tuple:
+    """Run a ranked FTS query; returns `(results, has_more)`."""
+    try:
+        hits = conn.execute(
+            SEARCH_SQL, {"q": match, "limit": limit + 1, "offset": offset}
+        ).fetchall()
+    except sqlite3.OperationalError:
+        raise HTTPException(status_code=400, detail="Invalid search query")
+    has_more = len(hits) > limit
+    if has_more:
+        hits.pop()
+    if not hits:
+        return [], has_more
+
+    # Snippets are only computed for the page being returned.
+    ticket_ids = json.dumps([h["ticket_id"] for h in hits])
+    ticket_snippets = dict(
+        conn.execute(
+            "SELECT rowid, snippet(tickets_fts, -1, '<mark>', '</mark>', '…', 12) "
+            "FROM tickets_fts "
+            "WHERE tickets_fts MATCH ? AND rowid IN (SELECT value FROM json_each(?))",
+            (
+                match,
+                json.dumps([h["ticket_id"] for h in hits if h["comment_id"] is None]),
+            ),
+        ).fetchall()
+    )
+    comment_snippets = dict(
+        conn.execute(
+            "SELECT rowid, snippet(comments_fts, 0, '<mark>', '</mark>', '…', 12) "
+            "FROM comments_fts "
+            "WHERE comments_fts MATCH ? AND rowid IN (SELECT value FROM json_each(?))",
+            (
+                match,
+                json.dumps(
+                    [h["comment_id"] for h in hits if h["comment_id"] is not None]
+                ),
+            ),
+        ).fetchall()
+    )
+    tickets = {
+        row["id"]: row
+        for row in conn.execute(
+            "SELECT * FROM tickets WHERE id IN (SELECT value FROM json_each(?))",
+            (ticket_ids,),
+        )
+    }
+
+    results = []
+    for h in hits:
+        row = tickets.get(h["ticket_id"])
+        if row is None:
+            continue
+        t = row_to_ticket(row)
+        if h["comment_id"] is None:
+            t["matchedIn"] = "ticket"
+            t["snippet"] = ticket_snippets.get(h["ticket_id"], "")
+        else:
+            t["matchedIn"] = "comment"
+            t["snippet"] = comment_snippets.get(h["comment_id"], "")
+        t["score"] = round(-h["score"], 4)
+        results.append(t)
+    return results, has_more
+
+
+@app.get("/tickets/search")
+async def search_tickets(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=10000),
+    user: dict = Depends(get_current_user),
+):
+    """Full-text search over ticket titles, descriptions and comments.
+
+    Results are ranked by bm25 (best first, title matches weigh more) and
+    carry a highlighted snippet of the best match. The offset of the next
+    page is returned in the X-Next-Offset header.
+    """
+
+    async def load():
+        results, has_more = await db.run(
+            search_ticket_rows, fts_query(q), limit, offset
+        )
+        return results, {"X-Next-Offset": str(offset + limit)} if has_more else None
+
+    return await cached_json(("search", user["role"], q, limit, offset), load)
+
+
+def fetch_changes(conn: sqlite3.Connection, since: int, limit: int) -> dict:
+    """Collect the tickets and comments changed after sequence `since`.
+
+    change_log keeps one row per entity with the seq of its latest change, so
+    a range scan over idx_change_log_seq returns each changed row once.
+    """
+    changes = conn.execute(
+        "SELECT entity, entity_id, seq, deleted FROM change_log WHERE seq > ? "
+        "ORDER BY seq LIMIT ?",
+        (since, limit + 1),
+    ).fetchall()
+    has_more = len(changes) > limit
+    if has_more:
+        changes.pop()
+
+    ticket_ids, comment_ids, archived = [], [], []
+    deleted = {"tickets": [], "comments": []}
+    for c in changes:
+        if c["deleted"] == 2:
+            archived.append(str(c["entity_id"]))
+        elif c["deleted"]:
+            deleted["tickets" if c["entity"] == "ticket" else "comments"].append(
+                str(c["entity_id"])
+            )
+        elif c["entity"] == "ticket":
+            ticket_ids.append(c["entity_id"])
+        else:
+            comment_ids.append(c["entity_id"])
+
+    tickets = []
+    if ticket_ids:
+        tickets = query_tickets(
+            conn,
+            "WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(ticket_ids),),
+            comments=False,
+        )[0]
+    comments = []
+    if comment_ids:
+        for row in conn.execute(
+            "SELECT ticket_id, id, author_id, text, created_at FROM comments "
+            "WHERE id IN (SELECT value FROM json_each(?)) ORDER BY id",
+            (json.dumps(comment_ids),),
+        ):
+            comment = row_to_comment(row)
+            comment["ticket_id"] = str(row["ticket_id"])
+            comments.append(comment)
+
+    if changes:
+        next_seq = changes[-1]["seq"]
+    else:
+        # Nothing new: keep the client's cursor unless it is ahead of the log.
+        next_seq = min(
+            since,
+            conn.execute("SELECT COALESCE(MAX(seq), 0) FROM change_log").fetchone()[0],
+        )
+    return {
+        "since": since,
+        "next": next_seq,
+        "hasMore": has_more,
+        "tickets": tickets,
+        "comments": comments,
+        "deleted": deleted,
+        "archived": archived,
+    }
+
+
+@app.get("/tickets/changes")
+async def ticket_changes(
+    since: int = Query(0, ge=0),
+    limit: int = Query(500, ge=1, le=MAX_PAGE_SIZE),
+    user: dict = Depends(get_current_user),
+):
+    """Incremental sync: everything created, updated or deleted after `since`.
+
+    Pass the returned `next` as `since` on the following call; while
+    `hasMore` is true there are further changes to fetch right away.
+    Deleted tickets and comments are reported as id tombstones; tickets
+    moved to the archive are listed in `archived` (still readable, e.g.
+    with GET /tickets/{id}).
+    """
+    return FastJSONResponse(await db.run(fetch_changes, since, limit))
+
+
+@app.get("/tickets/{ticket_id}")
+async def get_ticket(
+    ticket_id: int,
+    comments_limit: int = Query(50, ge=0, le=MAX_PAGE_SIZE),
+    comments_cursor: Optional[str] = None,
+    as_of: Optional[str] = None,
+    user: dict = Depends(get_current_user),
+):
+    """A single ticket with one page of comments, oldest first.
+
+    Pass the returned `nextCommentsCursor` as `comments_cursor` to load the
+    following page; `comments_limit=0` returns only the ticket and
+    `commentCount`. Archived tickets are readable here too. `as_of` (an ISO
+    date or datetime, UTC) returns the ticket as it was at that moment, with
+    its history `version`; 404 if it did not exist then, 409 if it did but
+    its history starts later.
+    """
+    cursor = decode_cursor(comments_cursor) if comments_cursor else None
+    as_of = parse_timestamp(as_of, "as_of")
+
+    async def load():
+        ticket = await db.run(
+            fetch_ticket_detail, ticket_id, comments_limit, cursor, as_of
+        )
+        if ticket is None:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        return ticket, None
+
+    return await cached_json(
+        ("ticket", user["role"], ticket_id, comments_limit, cursor, as_of), load
     )
+
+
+@app.get("/tickets/{ticket_id}/history")
+async def get_ticket_history(
+    ticket_id: int,
+    limit: int = Query(100, ge=1, le=MAX_PAGE_SIZE),
+    cursor: int = Query(0, ge=0),
+    user: dict = Depends(get_current_user),
+):
+    """Who changed what and when: the ticket's events, oldest first.
+
+    Each event has its `version`, `kind` (created, updated, deleted, or
+    snapshot for the state of a ticket older than the history), `actor_id`
+    (null for automatic changes) and only the fields it `changes`. Pass
+    `nextCursor` as `cursor` for the next page. Deleted tickets keep theirs.
+    """
+
+    async def load():
+        history = await db.run(ticket_history, ticket_id, limit, cursor)
+        if history is None:
+            raise HTTPException(status_code=404, detail="Ticket not found")
+        events, next_cursor = history
+        return {"events": events, "nextCursor": next_cursor}, None
+
+    return await cached_json(("history", user["role"], ticket_id, limit, cursor), load)
+
+
+def insert_ticket(conn: sqlite3.Connection, ticket: TicketIn, reporter_id: int) -> dict:
+    agent = assignment.take(conn, ticket.priority)
+    try:
+        row = (
+            tuple_cursor(conn)
+            .execute(
+                "INSERT INTO tickets (title, description, priority, status, "
+                "reporter_id, assignee_id, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, datetime('now'), datetime('now')) "
+                f"RETURNING {TICKET_RETURNING}",
+                (
+                    ticket.title,
+                    ticket.description,
+                    ticket.priority,
+                    "open",
+                    reporter_id,
+                    agent,
+                ),
+            )
+            .fetchone()
+        )
+        created = dict(zip(TICKET_FIELDS, row))
+        append_ticket_events(conn, [creation_event(created, reporter_id)])
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        assignment.release(agent, ticket.priority)
+        raise
+    assignment.bind(int(row[0]), agent, ticket.priority)
+    if agent is not None:
+        metrics.inc("helpdesk_auto_assignments_total")
+    return {**created, "comments": []}
+
+
+def apply_ticket_update(
+    conn: sqlite3.Connection,
+    ticket_id: int,
+    data: dict,
+    minimal: bool = False,
+    actor_id: Optional[int] = None,
+) -> Optional[dict]:
+    """Apply `data` to a ticket and return it, or None if it does not exist.
+
+    The previous row is read under the write lock so the history event can
+    hold just the fields that changed. With `minimal=True` only the id, the
+    changed fields and updatedAt are returned, so the comment thread is not
+    read back.
+    """
+    if not data:
+        if minimal:
+            row = conn.execute(
+                "SELECT updated_at FROM tickets WHERE id = ?", (ticket_id,)
+            ).fetchone()
+            return {"id": str(ticket_id), "updatedAt": row[0]} if row else None
+        return load_ticket(conn, ticket_id)
+
+    assignments = ", ".join(f"{k} = ?" for k in data)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        locked = lock_tickets(conn, "WHERE id = ?", (ticket_id,))
+        if not locked:
+            conn.rollback()
+            return None
+        old, version = locked[ticket_id]
+        row = (
+            tuple_cursor(conn)
+            .execute(
+                f"UPDATE tickets SET {assignments}, updated_at = datetime('now') "
+                f"WHERE id = ? RETURNING {TICKET_RETURNING}",
+                (*data.values(), ticket_id),
+            )
+            .fetchone()
+        )
+        ticket = dict(zip(TICKET_FIELDS, row))
+        append_ticket_events(conn, change_events(old, version, ticket, actor_id))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    if data.keys() & {"assignee_id", "status", "priority"}:
+        assignment.update(
+            ticket_id, ticket["assignee_id"], ticket["status"], ticket["priority"]
+        )
+    if minimal:
+        return {"id": str(ticket_id), **data, "updatedAt": ticket["updatedAt"]}
+
+    ticket["comments"] = [
+        {
+            "id": comment_id,
+            "author_id": author_id,
+            "text": text,
+            "createdAt": created_at,
+        }
+        for comment_id, author_id, text, created_at in tuple_cursor(conn).execute(
+            "SELECT CAST(id AS TEXT), author_id, text, created_at FROM comments "
+            "WHERE ticket_id = ? ORDER BY created_at, id",
+            (ticket_id,),
+        )
+    ]
+    return ticket
+
+
+def delete_ticket_row(
+    conn: sqlite3.Connection, ticket_id: int, actor_id: Optional[int] = None
+) -> bool:
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        locked = lock_tickets(conn, "WHERE id = ?", (ticket_id,))
+        if not locked:
+            conn.rollback()
+            return False
+        conn.execute("DELETE FROM tickets WHERE id = ?", (ticket_id,))
+        old, version = locked[ticket_id]
+        append_ticket_events(conn, change_events(old, version, None, actor_id))
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    assignment.forget(ticket_id)
+    return True
+
+
+def insert_comment(
+    conn: sqlite3.Connection, ticket_id: int, author_id: int, text: str
+) -> Optional[dict]:
+    """Add a comment; None when the ticket does not exist (foreign key violation)."""
+    try:
+        row = (
+            tuple_cursor(conn)
+            .execute(
+                "INSERT INTO comments (ticket_id, author_id, text, created_at) "
+                "VALUES (?, ?, ?, datetime('now')) "
+                "RETURNING CAST(id AS TEXT), author_id, text, created_at",
+                (ticket_id, author_id, text),
+            )
+            .fetchone()
+        )
+    except sqlite3.IntegrityError:
+        conn.rollback()
+        return None
     conn.commit()
-    ticket_id = cur.lastrowid
-    cur = conn.execute("SELECT * FROM tickets WHERE id = ?", (ticket_id,))
-    row = cur.fetchone()
-    t = row_to_ticket(row)
-    t["comments"] = []
-    conn.close()
+    comment_id, author_id, text, created_at = row
+    return {
+        "id": comment_id,
+        "author_id": author_id,
+        "text": text,
+        "createdAt": created_at,
+    }
+
+
+def validate_ticket_values(conn: sqlite3.Connection, items: list) -> dict:
+    """Check bulk items against the schema constraints up front.
+
+    A single CHECK or foreign key failure would abort the whole executemany,
+    so invalid items are reported individually instead. Returns
+    {index: error}.
+    """
+    errors = {}
+    assignees = {d["assignee_id"] for d in items if d.get("assignee_id") is not None}
+    known = set()
+    if assignees:
+        cur = conn.execute(
+            "SELECT id FROM users WHERE id IN (SELECT value FROM json_each(?))",
+            (json.dumps(list(assignees)),),
+        )
+        known = {r["id"] for r in cur}
+    for i, d in enumerate(items):
+        if "priority" in d and d["priority"] not in TICKET_PRIORITIES:
+            errors[i] = f"Invalid priority: {d['priority']}"
+        elif "status" in d and d["status"] not in TICKET_STATUSES:
+            errors[i] = f"Invalid status: {d['status']}"
+        elif "title" in d and not d["title"]:
+            errors[i] = "Missing title"
+        elif d.get("assignee_id") is not None and d["assignee_id"] not in known:
+            errors[i] = f"Unknown assignee: {d['assignee_id']}"
+    return errors
+
+
+def bulk_insert_tickets(
+    conn: sqlite3.Connection, tickets: list, reporter_id: int
+) -> list:
+    """Insert many tickets in one transaction; returns per-item results."""
+    items = [t.model_dump() for t in tickets]
+    valid = []
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        errors = validate_ticket_values(conn, items)
+        valid = [(i, d) for i, d in enumerate(items) if i not in errors]
+        # Inside BEGIN IMMEDIATE nobody else can insert, so AUTOINCREMENT hands
+        # out consecutive ids starting after the current sequence value.
+        row = conn.execute(
+            "SELECT seq FROM sqlite_sequence WHERE name = 'tickets'"
+        ).fetchone()
+        first_id = (row["seq"] if row else 0) + 1
+        for _, d in valid:
+            d["assignee_id"] = assignment.take(conn, d["priority"])
+        conn.executemany(
+            "INSERT INTO tickets (title, description, priority, status, reporter_id, "
+            "assignee_id, created_at, updated_at) "
+            "VALUES (?, ?, ?, 'open', ?, ?, datetime('now'), datetime('now'))",
+            [
+                (
+                    d["title"],
+                    d["description"],
+                    d["priority"],
+                    reporter_id,
+                    d["assignee_id"],
+                )
+                for _, d in valid
+            ],
+        )
+        created = {}
+        if valid:
+            rows, _ = query_tickets(
+                conn, "WHERE id BETWEEN ? AND ?", (first_id, first_id + len(valid) - 1)
+            )
+            created = {int(t["id"]): t for t in rows}
+            append_ticket_events(conn, [creation_event(t, reporter_id) for t in rows])
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        for _, d in valid:
+            assignment.release(d.get("assignee_id"), d["priority"])
+        raise
+    for offset, (_, d) in enumerate(valid):
+        assignment.bind(first_id + offset, d["assignee_id"], d["priority"])
+    assigned = sum(d["assignee_id"] is not None for _, d in valid)
+    if assigned:
+        metrics.inc("helpdesk_auto_assignments_total", (), assigned)
+
+    results = [None] * len(items)
+    for offset, (i, _) in enumerate(valid):
+        results[i] = {"index": i, "ok": True, "ticket": created.get(first_id + offset)}
+    for i, error in errors.items():
+        results[i] = {"index": i, "ok": False, "error": error}
+    return results
+
+
+def group_ticket_updates(ids: list, items: list, existing: dict, errors: dict) -> dict:
+    """Group valid updates by the columns they set: {columns: [row, ...]}.
+
+    Updates of missing tickets are added to `errors`; empty ones are skipped.
+    """
+    groups = {}
+    for i, (ticket_id, data) in enumerate(zip(ids, items)):
+        if i in errors:
+            continue
+        if ticket_id not in existing:
+            errors[i] = "Ticket not found"
+            continue
+        if not data:
+            continue
+        columns = tuple(sorted(data))
+        groups.setdefault(columns, []).append(
+            tuple(data[c] for c in columns) + (ticket_id,)
+        )
+    return groups
+
+
+def execute_update_groups(conn: sqlite3.Connection, groups: dict):
+    """One executemany per set of columns."""
+    for columns, rows in groups.items():
+        assignments = ", ".join(f"{c} = ?" for c in columns)
+        conn.executemany(
+            f"UPDATE tickets SET {assignments}, updated_at = datetime('now') "
+            "WHERE id = ?",
+            rows,
+        )
+
+
+def bulk_update_tickets(
+    conn: sqlite3.Connection, updates: list, actor_id: Optional[int] = None
+) -> list:
+    """Apply many partial updates in one transaction; returns per-item results.
+
+    Updates touching the same set of columns share one executemany call.
+    """
+    items = []
+    for u in updates:
+        data = u.model_dump(exclude_unset=True)
+        data.pop("id", None)
+        items.append(data)
+    ids = [u.id for u in updates]
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        existing = lock_tickets(
+            conn, "WHERE id IN (SELECT value FROM json_each(?))", (json.dumps(ids),)
+        )
+        errors = validate_ticket_values(conn, items)
+        execute_update_groups(conn, group_ticket_updates(ids, items, existing, errors))
+
+        updated_ids = [ticket_id for i, ticket_id in enumerate(ids) if i not in errors]
+        tickets = {}
+        if updated_ids:
+            rows, _ = query_tickets(
+                conn,
+                "WHERE id IN (SELECT value FROM json_each(?))",
+                (json.dumps(updated_ids),),
+                comments=False,
+            )
+            tickets = {int(t["id"]): t for t in rows}
+            # A ticket may appear more than once: diff against its original row once.
+            events = []
+            for ticket_id, t in tickets.items():
+                events.extend(change_events(*existing[ticket_id], t, actor_id))
+            append_ticket_events(conn, events)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+    for ticket_id, t in tickets.items():
+        assignment.update(ticket_id, t["assignee_id"], t["status"], t["priority"])
+    results = []
+    for i, ticket_id in enumerate(ids):
+        if i in errors:
+            results.append(
+                {"index": i, "id": str(ticket_id), "ok": False, "error": errors[i]}
+            )
+        else:
+            results.append(
+                {
+                    "index": i,
+                    "id": str(ticket_id),
+                    "ok": True,
+                    "ticket": tickets.get(ticket_id),
+                }
+            )
+    return results
+
+
+@app.post("/tickets")
+async def create_ticket(ticket: TicketIn, user: dict = Depends(get_current_user)):
+    t = await db.run(insert_ticket, ticket, user["id"])
+    event_bus.publish("ticket.created", t)
     return t
 
 
 @app.put("/tickets/{ticket_id}")
-def update_ticket(ticket_id: int, updates: TicketUpdate, user: dict = Depends(get_current_user)):
-    conn = get_db()
-    cur = conn.execute("SELECT * FROM tickets WHERE id = ?", (ticket_id,))
-    row = cur.fetchone()
-    if not row:
-        conn.close()
-        raise HTTPException(status_code=404, detail="Ticket not found")
-
+async def update_ticket(
+    ticket_id: int,
+    updates: TicketUpdate,
+    prefer: Optional[str] = Header(None, alias="Prefer"),
+    user: dict = Depends(get_current_user),
+):
+    """Update a ticket. With `Prefer: return=minimal` the response only has
+    the id, the changed fields and updatedAt instead of the full ticket."""
     try:
         data = updates.model_dump(exclude_unset=True)
     except Exception:
         data = updates.dict(exclude_unset=True)
 
-    fields = []
-    values = []
-    for k, v in data.items():
-        fields.append(f"{k} = ?")
-        values.append(v)
-
-    if fields:
-        values.append(ticket_id)
-        sql = f"UPDATE tickets SET {', '.join(fields)}, updated_at = datetime('now') WHERE id = ?"
-        conn.execute(sql, tuple(values))
-        conn.commit()
-
-    cur = conn.execute("SELECT * FROM tickets WHERE id = ?", (ticket_id,))
-    row = cur.fetchone()
-    t = row_to_ticket(row)
-    cur = conn.execute(
-        "SELECT id, author_id, text, created_at FROM comments WHERE ticket_id = ? ORDER BY created_at ASC",
-        (ticket_id,),
-    )
-    t["comments"] = [
-        {"id": str(c["id"]), "author_id": c["author_id"], "text": c["text"], "createdAt": c["created_at"]}
-        for c in cur.fetchall()
-    ]
-    conn.close()
+    minimal = "return=minimal" in split_param(prefer)
+    t = await db.run(apply_ticket_update, ticket_id, data, minimal, user["id"])
+    if t is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    if data:
+        event_bus.publish(
+            "ticket.updated", {"id": t["id"], **data, "updatedAt": t["updatedAt"]}
+        )
     return t
 
 
 @app.delete("/tickets/{ticket_id}")
-def delete_ticket(ticket_id: int, user: dict = Depends(get_current_user)):
-    conn = get_db()
-    cur = conn.execute("SELECT id FROM tickets WHERE id = ?", (ticket_id,))
-    if not cur.fetchone():
-        conn.close()
+async def delete_ticket(ticket_id: int, user: dict = Depends(get_current_user)):
+    if not await db.run(delete_ticket_row, ticket_id, user["id"]):
         raise HTTPException(status_code=404, detail="Ticket not found")
-    conn.execute("DELETE FROM tickets WHERE id = ?", (ticket_id,))
-    conn.commit()
-    conn.close()
+    event_bus.publish("ticket.deleted", {"id": str(ticket_id)})
     return {"ok": True}
 
 
 @app.post("/tickets/{ticket_id}/comments")
-def add_comment(ticket_id: int, payload: dict, user: dict = Depends(get_current_user)):
+async def add_comment(
+    ticket_id: int, payload: dict, user: dict = Depends(get_current_user)
+):
     text = payload.get("text")
     if not text:
         raise HTTPException(status_code=400, detail="Missing text")
-    conn = get_db()
-    cur = conn.execute("SELECT id FROM tickets WHERE id = ?", (ticket_id,))
-    if not cur.fetchone():
-        conn.close()
+    comment = await db.run(insert_comment, ticket_id, user["id"], text)
+    if comment is None:
         raise HTTPException(status_code=404, detail="Ticket not found")
-    cur = conn.execute(
-        "INSERT INTO comments (ticket_id, author_id, text, created_at) VALUES (?, ?, ?, datetime('now'))",
-        (ticket_id, user["id"], text),
+    event_bus.publish(
+        "comment.created", {"ticket_id": str(ticket_id), "comment": comment}
     )
-    conn.commit()
-    comment_id = cur.lastrowid
-    cur = conn.execute("SELECT id, author_id, text, created_at FROM comments WHERE id = ?", (comment_id,))
-    row = cur.fetchone()
-    comment = {"id": str(row["id"]), "author_id": row["author_id"], "text": row["text"], "createdAt": row["created_at"]}
-    conn.close()
     return comment
+
+
+@app.post("/tickets/bulk")
+async def create_tickets_bulk(
+    tickets: list[TicketIn], user: dict = Depends(get_current_user)
+):
+    """Create up to MAX_BULK_ITEMS tickets in a single transaction."""
+    if len(tickets) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_BULK_ITEMS} tickets per request"
+        )
+    results = await db.run(bulk_insert_tickets, tickets, user["id"])
+    for r in results:
+        if r["ok"]:
+            event_bus.publish("ticket.created", r["ticket"])
+    return results
+
+
+@app.patch("/tickets/bulk")
+async def update_tickets_bulk(
+    updates: list[TicketBulkUpdate], user: dict = Depends(get_current_user)
+):
+    """Update (assign, close, reprioritise...) many tickets in one transaction.
+
+    Each item is `{"id": ..., <TicketUpdate fields>}`; the response has one
+    result per item, in order, with `ok` and either `ticket` or `error`.
+    """
+    if len(updates) > MAX_BULK_ITEMS:
+        raise HTTPException(
+            status_code=413, detail=f"At most {MAX_BULK_ITEMS} updates per request"
+        )
+    results = await db.run(bulk_update_tickets, updates, user["id"])
+    for u, r in zip(updates, results):
+        data = u.model_dump(exclude_unset=True)
+        data.pop("id", None)
+        if r["ok"] and data and r["ticket"]:
+            event_bus.publish(
+                "ticket.updated",
+                {"id": r["id"], **data, "updatedAt": r["ticket"]["updatedAt"]},
+            )
+    return results
+
+
+# ============================================================
+# EXPORTACIÓN (NDJSON / CSV en streaming)
+# ============================================================
+
+EXPORT_FORMATS = {"ndjson": "application/x-ndjson", "csv": "text/csv; charset=utf-8"}
+EXPORT_COMMENT_FIELDS = (
+    "comment_id",
+    "comment_author_id",
+    "comment_text",
+    "comment_createdAt",
+)
+
+
+def export_sql(schema: str, where: list, comments: bool) -> str:
+    """Tickets of one database (main or archive) in (created_at, id) order.
+
+    The order follows idx_tickets_created, so rows come straight off the index
+    without a sort, and status is filtered with a unary + so SQLite keeps
+    using that index instead of sorting rows found through the status one.
+    With `comments` each ticket is joined with its comments, one row each.
+    """
+    columns = ", ".join(
+        "CAST(t.id AS TEXT)" if key == "id" else f"t.{column}"
+        for key, column in TICKET_FIELDS.items()
+    )
+    sql = f"SELECT {columns}"
+    if comments:
+        sql += (
+            ", CAST(c.id AS TEXT), c.author_id, c.text, c.created_at "
+            f"FROM {schema}.tickets t "
+            f"LEFT JOIN {schema}.comments c ON c.ticket_id = t.id"
+        )
+    else:
+        sql += f" FROM {schema}.tickets t"
+    clauses = list(where)
+    if schema == "archive":
+        # Skip tickets copied to the archive but not yet deleted from main.
+        clauses.append("NOT EXISTS (SELECT 1 FROM main.tickets m WHERE m.id = t.id)")
+    if clauses:
+        sql += f" WHERE {' AND '.join(clauses)}"
+    sql += " ORDER BY t.created_at, t.id"
+    if comments:
+        sql += ", c.created_at, c.id"
+    return sql
+
+
+def open_export_connection(archived: bool) -> sqlite3.Connection:
+    """A read-only connection of its own for one export.
+
+    In WAL mode a reader never blocks writers, and read-only it cannot take
+    the write lock, so a long export holds agents back at most by delaying
+    checkpoints until it finishes. It is used from worker threads one call
+    at a time, hence check_same_thread=False.
+    """
+    conn = sqlite3.connect(
+        f"file:{quote(db_pool.path)}?mode=ro",
+        uri=True,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,
+        factory=TimedConnection,
+    )
+    if archived:
+        conn.execute(
+            "ATTACH DATABASE ? AS archive",
+            (f"file:{quote(db_pool.archive_path)}?mode=ro",),
+        )
+    return conn
+
+
+def encode_export_rows(
+    rows: list, fmt: str, comments: bool, pending: Optional[dict]
+) -> tuple:
+    """Encode one batch of rows; returns `(bytes, pending)`.
+
+    For NDJSON with comments the rows of a ticket are folded into one object;
+    the last ticket of the batch may continue in the next one, so it is
+    handed back as `pending` instead of being written.
+    """
+    n = len(TICKET_FIELDS)
+    if fmt == "csv":
+        buf = io.StringIO()
+        csv.writer(buf).writerows(rows)
+        return buf.getvalue().encode("utf-8"), None
+    if not comments:
+        return (
+            b"".join(dump_json(dict(zip(TICKET_FIELDS, row))) + b"\n" for row in rows),
+            None,
+        )
+
+    out = []
+    for row in rows:
+        if pending is None or pending["id"] != row[0]:
+            if pending is not None:
+                out.append(dump_json(pending) + b"\n")
+            pending = dict(zip(TICKET_FIELDS, row[:n]))
+            pending["comments"] = []
+        if row[n] is not None:
+            comment_id, author_id, text, created_at = row[n:]
+            pending["comments"].append(
+                {
+                    "id": comment_id,
+                    "author_id": author_id,
+                    "text": text,
+                    "createdAt": created_at,
+                }
+            )
+    return b"".join(out), pending
+
+
+async def stream_export(
+    fmt: str, where: list, params: tuple, comments: bool, archived: bool
+):
+    """Yield the export in chunks of EXPORT_BATCH rows, with constant memory.
+
+    The cursor is stepped in a worker thread one batch at a time, so only a
+    batch (plus, for NDJSON, the ticket being assembled) is held at once.
+    Main and archive are read inside one read transaction, i.e. one snapshot.
+    """
+    # No archive file yet (nothing archived so far) means nothing to read there.
+    archived = archived and os.path.exists(db_pool.archive_path)
+    conn = await asyncio.to_thread(open_export_connection, archived)
+    try:
+        await asyncio.to_thread(conn.execute, "BEGIN")
+        if fmt == "csv":
+            header = tuple(TICKET_FIELDS) + (EXPORT_COMMENT_FIELDS if comments else ())
+            yield encode_export_rows([header], fmt, comments, None)[0]
+        pending = None
+        for schema in ("main", "archive") if archived else ("main",):
+            cur = tuple_cursor(conn)
+            await asyncio.to_thread(
+                cur.execute, export_sql(schema, where, comments), params
+            )
+            while True:
+                rows = await asyncio.to_thread(cur.fetchmany, EXPORT_BATCH)
+                if not rows:
+                    break
+                chunk, pending = encode_export_rows(rows, fmt, comments, pending)
+                if chunk:
+                    yield chunk
+        if pending is not None:
+            yield dump_json(pending) + b"\n"
+        metrics.inc("helpdesk_exports_total", (("format", fmt),))
+    finally:
+        # Shielded: a client disconnect cancels the generator, not the close.
+        await asyncio.shield(asyncio.to_thread(conn.close))
+
+
+@app.get("/export/tickets")
+async def export_tickets(
+    fmt: str = Query("ndjson", alias="format"),
+    status: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    include: Optional[str] = None,
+    include_archived: bool = False,
+    user: dict = Depends(get_current_user),
+):
+    """Stream every matching ticket as NDJSON (one object per line) or CSV.
+
+    Filters: `status` (comma-separated), `created_from` (inclusive) and
+    `created_to` (exclusive), as ISO dates or datetimes. `include=comments`
+    nests the comments in each NDJSON object, or adds one CSV row per
+    comment. Rows come oldest first; archived tickets follow the hot ones
+    with `include_archived=1`.
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}",
+        )
+    statuses = split_param(status)
+    unknown = [s for s in statuses if s not in TICKET_STATUSES]
+    if unknown:
+        raise HTTPException(
+            status_code=400, detail=f"Unknown status: {', '.join(unknown)}"
+        )
+
+    where = []
+    params = []
+    if statuses:
+        where.append("+t.status IN (SELECT value FROM json_each(?))")
+        params.append(json.dumps(statuses))
+    for op, value, name in (
+        (">=", created_from, "created_from"),
+        ("<", created_to, "created_to"),
+    ):
+        bound = parse_timestamp(value, name)
+        if bound:
+            where.append(f"t.created_at {op} ?")
+            params.append(bound)
+    comments = "comments" in split_param(include)
+
+    return StreamingResponse(
+        stream_export(fmt, where, tuple(params), comments, include_archived),
+        media_type=EXPORT_FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="tickets.{fmt}"'},
+    )
+
+
+# ============================================================
+# ADJUNTOS
+# ============================================================
+
+ATTACHMENT_COLUMNS = (
+    "id, ticket_id, file_name, file_path, sha256, size, content_type, "
+    "uploader_id, uploaded_at"
+)
+
+
+def attachment_relpath(sha256: str) -> str:
+    return os.path.join(sha256[:2], sha256[2:4], sha256)
+
+
+def row_to_attachment(row: sqlite3.Row) -> dict:
+    return {
+        "id": str(row["id"]),
+        "ticket_id": str(row["ticket_id"]),
+        "fileName": row["file_name"],
+        "contentType": row["content_type"],
+        "size": row["size"],
+        "sha256": row["sha256"],
+        "uploader_id": row["uploader_id"],
+        "uploadedAt": row["uploaded_at"],
+    }
+
+
+def clean_file_name(name: Optional[str]) -> str:
+    name = os.path.basename((name or "").replace("\\", "/"))
+    name = "".join(ch for ch in name if ch.isprintable() and ch not in '"')
+    return name[:255] or "attachment"
+
+
+def ticket_exists(conn: sqlite3.Connection, ticket_id: int) -> bool:
+    return (
+        conn.execute("SELECT 1 FROM tickets WHERE id = ?", (ticket_id,)).fetchone()
+        is not None
+    )
+
+
+def insert_attachment(
+    conn: sqlite3.Connection,
+    ticket_id: int,
+    file_name: str,
+    sha256: str,
+    size: int,
+    content_type: str,
+    uploader_id: int,
+) -> Optional[dict]:
+    try:
+        row = conn.execute(
+            "INSERT INTO attachments (ticket_id, file_name, file_path, sha256, size, "
+            "content_type, uploader_id) "
+            f"VALUES (?, ?, ?, ?, ?, ?, ?) RETURNING {ATTACHMENT_COLUMNS}",
+            (
+                ticket_id,
+                file_name,
+                attachment_relpath(sha256),
+                sha256,
+                size,
+                content_type,
+                uploader_id,
+            ),
+        ).fetchone()
+    except sqlite3.IntegrityError:
+        # The ticket was deleted while the file was uploading.
+        conn.rollback()
+        return None
+    conn.commit()
+    return row_to_attachment(row)
+
+
+def fetch_attachments(conn: sqlite3.Connection, ticket_id: int) -> Optional[list]:
+    """Attachments of a ticket, hot or archived; None if the ticket does not exist."""
+    rows = conn.execute(
+        f"SELECT {ATTACHMENT_COLUMNS} FROM main.attachments WHERE ticket_id = ? "
+        "ORDER BY id",
+        (ticket_id,),
+    ).fetchall()
+    if rows or ticket_exists(conn, ticket_id):
+        return [row_to_attachment(r) for r in rows]
+    if (
+        not has_archive(conn)
+        or conn.execute(
+            "SELECT 1 FROM archive.tickets WHERE id = ?", (ticket_id,)
+        ).fetchone()
+        is None
+    ):
+        return None
+    rows = conn.execute(
+        f"SELECT {ATTACHMENT_COLUMNS} FROM archive.attachments WHERE ticket_id = ? "
+        "ORDER BY id",
+        (ticket_id,),
+    ).fetchall()
+    return [row_to_attachment(r) for r in rows]
+
+
+def fetch_attachment(
+    conn: sqlite3.Connection, ticket_id: int, attachment_id: int
+) -> Optional[sqlite3.Row]:
+    for schema in ("main", "archive") if has_archive(conn) else ("main",):
+        row = conn.execute(
+            f"SELECT {ATTACHMENT_COLUMNS} FROM {schema}.attachments WHERE id = ? "
+            "AND ticket_id = ?",
+            (attachment_id, ticket_id),
+        ).fetchone()
+        if row is not None:
+            return row
+    return None
+
+
+def write_upload_chunk(f, digest, data: bytes):
+    f.write(data)
+    digest.update(data)
+
+
+def commit_blob(tmp_path: str, sha256: str):
+    """Move an uploaded temp file to its content address (or drop it if stored)."""
+    final = os.path.join(ATTACHMENTS_DIR, attachment_relpath(sha256))
+    if os.path.exists(final):
+        os.unlink(tmp_path)
+        return
+    os.makedirs(os.path.dirname(final), exist_ok=True)
+    os.replace(tmp_path, final)
+
+
+async def store_upload(request: Request) -> tuple:
+    """Stream the request body into the content-addressed store.
+
+    Chunks are hashed and written as they arrive (in ~1 MiB writes off the
+    event loop), so memory use does not depend on the file size. Returns
+    `(sha256, size)`.
+    """
+    tmp_dir = os.path.join(ATTACHMENTS_DIR, "tmp")
+    os.makedirs(tmp_dir, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=tmp_dir, prefix="upload-")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            pending = bytearray()
+            async for chunk in request.stream():
+                size += len(chunk)
+                if size > MAX_ATTACHMENT_BYTES:
+                    raise HTTPException(status_code=413, detail="Attachment too large")
+                pending += chunk
+                if len(pending) >= UPLOAD_FLUSH_BYTES:
+                    data, pending = bytes(pending), bytearray()
+                    await asyncio.to_thread(write_upload_chunk, f, digest, data)
+            if pending:
+                await asyncio.to_thread(write_upload_chunk, f, digest, bytes(pending))
+        sha256 = digest.hexdigest()
+        await asyncio.to_thread(commit_blob, tmp_path, sha256)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return sha256, size
+
+
+@app.post("/tickets/{ticket_id}/attachments")
+async def upload_attachment(
+    ticket_id: int,
+    request: Request,
+    filename: Optional[str] = Query(None, max_length=255),
+    user: dict = Depends(get_current_user),
+):
+    """Upload a file as the raw request body (`?filename=` names it).
+
+    The body is streamed to disk, never held in memory, and stored once per
+    distinct SHA-256; Content-Type is recorded as the file's type.
+    """
+    declared = request.headers.get("content-length")
+    if declared and declared.isdigit() and int(declared) > MAX_ATTACHMENT_BYTES:
+        raise HTTPException(status_code=413, detail="Attachment too large")
+    if not await db.run(ticket_exists, ticket_id):
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
+    sha256, size = await store_upload(request)
+    content_type = request.headers.get("content-type") or "application/octet-stream"
+    attachment = await db.run(
+        insert_attachment,
+        ticket_id,
+        clean_file_name(filename),
+        sha256,
+        size,
+        content_type,
+        user["id"],
+    )
+    if attachment is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    event_bus.publish(
+        "attachment.created", {"ticket_id": str(ticket_id), "attachment": attachment}
+    )
+    return attachment
+
+
+@app.get("/tickets/{ticket_id}/attachments")
+async def list_attachments(ticket_id: int, user: dict = Depends(get_current_user)):
+    attachments = await db.run(fetch_attachments, ticket_id)
+    if attachments is None:
+        raise HTTPException(status_code=404, detail="Ticket not found")
+    return attachments
+
+
+@app.get("/tickets/{ticket_id}/attachments/{attachment_id}")
+async def download_attachment(
+    ticket_id: int, attachment_id: int, user: dict = Depends(get_current_user)
+):
+    """Serve the file with FileResponse (Range requests, sendfile where supported)."""
+    row = await db.run(fetch_attachment, ticket_id, attachment_id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Attachment not found")
+    path = os.path.join(ATTACHMENTS_DIR, row["file_path"])
+    if not os.path.exists(path):
+        raise HTTPException(status_code=410, detail="Attachment file is missing")
+    return FileResponse(
+        path,
+        media_type=row["content_type"],
+        filename=row["file_name"],
+        # Content-addressed: the bytes behind this URL never change.
+        headers={"Cache-Control": "private, max-age=31536000, immutable"},
+    )
+
+
+# ============================================================
+# ARCHIVO DE TICKETS CERRADOS
+# ============================================================
+
+ARCHIVE_TICKET_COLUMNS = (
+    "id, title, description, priority, status, reporter_id, assignee_id, "
+    "created_at, updated_at"
+)
+
+
+def archive_closed_tickets(conn: sqlite3.Connection, days: int, batch: int) -> tuple:
+    """Move one batch of tickets resolved/closed more than `days` ago to the archive.
+
+    Transactions spanning two WAL databases are not atomic across files, so
+    the move is split in two, each writing to one file: copy into the
+    archive, then delete from main only the tickets that did not change in
+    between (same updated_at, comment and attachment counts). A crash in
+    between leaves a duplicate that reads ignore and the next run
+    overwrites, never a lost ticket. The dashboard counters are credited
+    back, since archived tickets still count, and their change_log rows are
+    marked archived rather than deleted. Returns `(candidates, moved)`.
+    """
+    ids = [
+        r[0]
+        for r in conn.execute(
+            "SELECT id FROM main.tickets WHERE status IN ('resolved', 'closed') "
+            "AND updated_at < datetime('now', ?) ORDER BY id LIMIT ?",
+            (f"{-int(days)} days", batch),
+        )
+    ]
+    if not ids:
+        return 0, 0
+    ids_json = json.dumps(ids)
+
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.execute(
+            f"INSERT OR REPLACE INTO archive.tickets ({ARCHIVE_TICKET_COLUMNS}) "
+            f"SELECT {ARCHIVE_TICKET_COLUMNS} FROM main.tickets "
+            "WHERE id IN (SELECT value FROM json_each(?))",
+            (ids_json,),
+        )
+        conn.execute(
+            "INSERT OR REPLACE INTO archive.comments "
+            "(id, ticket_id, author_id, text, created_at) "
+            "SELECT id, ticket_id, author_id, text, created_at FROM main.comments "
+            "WHERE ticket_id IN (SELECT value FROM json_each(?))",
+            (ids_json,),
+        )
+        conn.execute(
+            f"INSERT OR REPLACE INTO archive.attachments ({ATTACHMENT_COLUMNS}) "
+            f"SELECT {ATTACHMENT_COLUMNS} FROM main.attachments "
+            "WHERE ticket_id IN (SELECT value FROM json_each(?))",
+            (ids_json,),
+        )
+        conn.commit()
+
+        conn.execute("BEGIN IMMEDIATE")
+        moved = [
+            r[0]
+            for r in conn.execute(
+                "DELETE FROM main.tickets WHERE id IN (SELECT value FROM json_each(?)) "
+                "AND updated_at = (SELECT a.updated_at FROM archive.tickets a "
+                "WHERE a.id = tickets.id) "
+                "AND (SELECT COUNT(*) FROM main.comments c "
+                "WHERE c.ticket_id = tickets.id) = "
+                "    (SELECT COUNT(*) FROM archive.comments a "
+                "WHERE a.ticket_id = tickets.id) "
+                "AND (SELECT COUNT(*) FROM main.attachments f "
+                "WHERE f.ticket_id = tickets.id) = "
+                "    (SELECT COUNT(*) FROM archive.attachments a "
+                "WHERE a.ticket_id = tickets.id) "
+                "RETURNING id",
+                (ids_json,),
+            ).fetchall()
+        ]
+        if moved:
+            for dimension, column in (
+                ("status", "status"),
+                ("priority", "priority"),
+                ("assignee", "CAST(COALESCE(assignee_id, 'unassigned') AS TEXT)"),
+            ):
+                conn.execute(
+                    f"INSERT INTO main.ticket_counts (dimension, value, count) "
+                    f"SELECT '{dimension}', {column}, COUNT(*) FROM archive.tickets "
+                    f"WHERE id IN (SELECT value FROM json_each(?)) GROUP BY 2 "
+                    "ON CONFLICT (dimension, value) DO UPDATE "
+                    "SET count = count + excluded.count",
+                    (json.dumps(moved),),
+                )
+            # The delete left tombstones; the tickets still exist, only elsewhere.
+            conn.execute(
+                "UPDATE main.change_log SET deleted = 2 "
+                "WHERE entity = 'ticket' "
+                "AND entity_id IN (SELECT value FROM json_each(?))",
+                (json.dumps(moved),),
+            )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    metrics.inc("helpdesk_archived_tickets_total", (), len(moved))
+    return len(ids), len(moved)
+
+
+async def archive_loop():
+    """Periodically archive old closed tickets, one batch transaction at a time."""
+    while True:
+        await asyncio.sleep(ARCHIVE_INTERVAL_SECONDS)
+        try:
+            total = 0
+            while True:
+                candidates, moved = await db.run(
+                    archive_closed_tickets, ARCHIVE_AFTER_DAYS, ARCHIVE_BATCH
+                )
+                total += moved
+                if candidates < ARCHIVE_BATCH or not moved:
+                    break
+            if total:
+                logger.info(
+                    "archived %d tickets closed more than %d days ago",
+                    total,
+                    ARCHIVE_AFTER_DAYS,
+                )
+        except Exception:
+            logger.exception("ticket archiver failed")
+
+
+# ============================================================
+# ESCALADO POR SLA
+# ============================================================
+
+NEXT_PRIORITY = {
+    "low": "normal",
+    "normal": "high",
+    "high": "urgent",
+    "urgent": "urgent",
+}
+
+
+def sql_time(epoch: float) -> str:
+    """Format like SQLite's datetime('now') (UTC), so it compares with created_at."""
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(epoch))
+
+
+class SlaScheduler:
+    """Escalate open tickets whose SLA (created_at + SLA_HOURS[priority]) expired.
+
+    Deadlines sit in a min-heap, but only those due within the next `horizon`
+    seconds: each (status, priority) pair is read in created_at order through
+    idx_tickets_status_priority_created, and the window moves forward by
+    reading just the created_at range it newly covers. Tickets created or
+    changed (priority, status) inside an already loaded range are picked up by
+    following change_log, so the tickets table is never scanned again.
+
+    Heap entries are not removed when a ticket changes; `escalate` re-checks
+    each ticket in SQL inside the batch transaction, which also makes several
+    worker processes running the scheduler harmless (a ticket is escalated
+    once, see sla_escalations).
+
+    The first window starts `backlog` seconds before startup: tickets whose
+    SLA expired earlier (a first boot against an existing database, a long
+    downtime) are left alone instead of all being escalated at once, unless
+    a later change to them goes through follow_changes.
+    """
+
+    def __init__(
+        self,
+        hours: dict,
+        horizon: int = SLA_HORIZON_SECONDS,
+        batch: int = SLA_BATCH,
+        backlog: int = SLA_BACKLOG_SECONDS,
+    ):
+        self.sla = {
+            priority: int(h * 3600)
+            for priority, h in hours.items()
+            if priority in TICKET_PRIORITIES
+        }
+        self.horizon = horizon
+        self.batch = batch
+        self.backlog = backlog
+        self.loaded_until = None
+        self.last_seq = 0
+        self._heap = []
+
+    def pending(self) -> int:
+        return len(self._heap)
+
+    def next_due(self) -> Optional[float]:
+        return self._heap[0][0] if self._heap else None
+
+    def _push(self, ticket_id: int, created: int, priority: str):
+        due = created + self.sla[priority]
+        if due <= self.loaded_until:
+            heapq.heappush(self._heap, (due, ticket_id))
+
+    def advance(self, conn: sqlite3.Connection, now: float):
+        """Load the deadlines due up to now + horizon that are not loaded yet."""
+        until = int(now) + self.horizon
+        if self.loaded_until is None:
+            self.last_seq = write_generation(conn)
+        start = (
+            self.loaded_until
+            if self.loaded_until is not None
+            else int(now) - self.backlog
+        )
+        for priority, seconds in self.sla.items():
+            low = sql_time(start - seconds)
+            high = sql_time(until - seconds)
+            for status in OPEN_STATUSES:
+                for ticket_id, created in tuple_cursor(conn).execute(
+                    "SELECT id, CAST(strftime('%s', created_at) AS INTEGER) "
+                    "FROM tickets "
+                    "WHERE status = ? AND priority = ? AND created_at > ? "
+                    "AND created_at <= ? "
+                    "AND NOT EXISTS (SELECT 1 FROM sla_escalations e "
+                    "WHERE e.ticket_id = tickets.id)",
+                    (status, priority, low, high),
+                ):
+                    self._heap.append((created + seconds, ticket_id))
+        heapq.heapify(self._heap)
+        self.loaded_until = until
+
+    def follow_changes(self, conn: sqlite3.Connection):
+        """Queue deadlines of tickets created or changed since the last call."""
+        # "+c.entity" keeps SQLite on idx_change_log_seq instead of walking
+        # every ticket entry of the primary key.
+        rows = (
+            tuple_cursor(conn)
+            .execute(
+                "SELECT c.seq, t.id, t.status, t.priority, "
+                "CAST(strftime('%s', t.created_at) AS INTEGER), "
+                "EXISTS (SELECT 1 FROM sla_escalations e WHERE e.ticket_id = t.id) "
+                "FROM change_log c LEFT JOIN tickets t ON t.id = c.entity_id "
+                "WHERE c.seq > ? AND +c.entity = 'ticket' ORDER BY c.seq",
+                (self.last_seq,),
+            )
+            .fetchall()
+        )
+        for seq, ticket_id, status, priority, created, escalated in rows:
+            self.last_seq = seq
+            if (
+                ticket_id is not None
+                and status in OPEN_STATUSES
+                and priority in self.sla
+                and not escalated
+            ):
+                self._push(ticket_id, created, priority)
+
+    def escalate(self, conn: sqlite3.Connection, now: float) -> list:
+        """Escalate up to `batch` tickets now due in one transaction.
+
+        Returns (ticket change, comment) pairs for the ones escalated.
+        """
+        ids = set()
+        while self._heap and self._heap[0][0] <= now and len(ids) < self.batch:
+            ids.add(heapq.heappop(self._heap)[1])
+        if not ids:
+            return []
+
+        deadline = " ".join(f"WHEN '{p}' THEN ?" for p in self.sla)
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            due = lock_tickets(
+                conn,
+                "WHERE id IN (SELECT value FROM json_each(?)) "
+                "AND status IN ('open', 'in_progress') "
+                f"AND created_at <= CASE priority {deadline} END "
+                "AND NOT EXISTS (SELECT 1 FROM sla_escalations e "
+                "WHERE e.ticket_id = tickets.id)",
+                (
+                    json.dumps(sorted(ids)),
+                    *(sql_time(now - seconds) for seconds in self.sla.values()),
+                ),
+            )
+            escalated = []
+            events = []
+            for ticket_id, (old, version) in due.items():
+                priority = old["priority"]
+                raised = NEXT_PRIORITY[priority]
+                row = (
+                    tuple_cursor(conn)
+                    .execute(
+                        "UPDATE tickets SET priority = ?, updated_at = datetime('now') "
+                        f"WHERE id = ? RETURNING {TICKET_RETURNING}",
+                        (raised, ticket_id),
+                    )
+                    .fetchone()
+                )
+                new = dict(zip(TICKET_FIELDS, row))
+                assignee_id, status, updated_at = (
+                    new["assignee_id"],
+                    new["status"],
+                    new["updatedAt"],
+                )
+                # No actor: the escalation is the system's doing.
+                events.extend(change_events(old, version, new, None))
+                hours = f"{self.sla[priority] / 3600:g}"
+                if raised == priority:
+                    text = f"SLA de {hours} h vencido con prioridad {priority}."
+                else:
+                    text = f"SLA de {hours} h vencido: prioridad {priority} → {raised}."
+                comment_id, created_at = conn.execute(
+                    "INSERT INTO comments (ticket_id, author_id, text, created_at) "
+                    "VALUES (?, NULL, ?, datetime('now')) "
+                    "RETURNING CAST(id AS TEXT), created_at",
+                    (ticket_id, text),
+                ).fetchone()
+                conn.execute(
+                    "INSERT INTO sla_escalations "
+                    "(ticket_id, from_priority, to_priority) VALUES (?, ?, ?)",
+                    (ticket_id, priority, raised),
+                )
+                ticket = {
+                    "id": str(ticket_id),
+                    "priority": raised,
+                    "updatedAt": updated_at,
+                }
+                comment = {
+                    "id": comment_id,
+                    "author_id": None,
+                    "text": text,
+                    "createdAt": created_at,
+                }
+                escalated.append((ticket, comment, priority, assignee_id, status))
+            append_ticket_events(conn, events)
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+
+        results = []
+        for ticket, comment, priority, assignee_id, status in escalated:
+            assignment.update(
+                int(ticket["id"]), assignee_id, status, ticket["priority"]
+            )
+            metrics.inc("helpdesk_sla_escalations_total", (("priority", priority),))
+            results.append((ticket, comment))
+        return results
+
+    def step(self, conn: sqlite3.Connection, now: float) -> tuple:
+        """One scheduler round: returns (escalations, seconds until the next round)."""
+        if self.loaded_until is None or now + self.horizon / 2 >= self.loaded_until:
+            self.advance(conn, now)
+        self.follow_changes(conn)
+        escalated = self.escalate(conn, now)
+        metrics.set_gauge("helpdesk_sla_pending", (), self.pending())
+        next_due = self.next_due()
+        if next_due is not None and next_due <= now:
+            return escalated, 0
+        wait = (
+            SLA_POLL_SECONDS
+            if next_due is None
+            else min(SLA_POLL_SECONDS, next_due - now)
+        )
+        return escalated, wait
+
+
+sla = SlaScheduler(SLA_HOURS)
+
+
+async def sla_loop():
+    """Escalate tickets as their SLA deadlines come, one batch transaction per round."""
+    while True:
+        try:
+            escalated, wait = await db.run(sla.step, time.time())
+            for ticket, comment in escalated:
+                event_bus.publish("ticket.updated", ticket)
+                event_bus.publish(
+                    "comment.created", {"ticket_id": ticket["id"], "comment": comment}
+                )
+            if escalated:
+                logger.info("escalated %d tickets past their SLA", len(escalated))
+        except Exception:
+            logger.exception("SLA scheduler failed")
+            wait = SLA_POLL_SECONDS
+        await asyncio.sleep(wait)
+
+
+# ============================================================
+# ENDPOINTS DE ESTADÍSTICAS
+# ============================================================
+
+# (etiqueta, edad mínima en días naturales UTC) de los tickets abiertos, de mayor
+# a menor
+OPEN_AGE_BUCKETS = (("30d+", 30), ("7-30d", 7), ("3-7d", 3), ("1-3d", 1), ("<1d", 0))
+
+
+def stats_version(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT version FROM stats_version WHERE id = 1").fetchone()
+    return row["version"]
+
+
+def stats_etag(version: int) -> str:
+    # Age buckets move with the calendar day, so the tag also changes daily.
+    return f'W/"stats-{version}-{time.strftime("%Y%m%d", time.gmtime())}"'
+
+
+def fetch_stats(
+    conn: sqlite3.Connection, days: int, if_none_match: Optional[str]
+) -> tuple:
+    """Read the dashboard counters; returns `(etag, stats)`, stats None if unchanged."""
+    conn.execute("BEGIN")
+    try:
+        etag = stats_etag(stats_version(conn))
+        if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+            return etag, None
+
+        by = {"status": {}, "priority": {}, "assignee": {}}
+        for r in conn.execute(
+            "SELECT dimension, value, count FROM ticket_counts WHERE count != 0"
+        ):
+            by[r["dimension"]][r["value"]] = r["count"]
+
+        # Open tickets per creation day (UTC), one row per day: ages are
+        # counted in whole calendar days, not hours.
+        now = time.time()
+        bounds = [
+            time.strftime("%Y-%m-%d", time.gmtime(now - d * 86400))
+            for _, d in OPEN_AGE_BUCKETS
+        ]
+        sums = ", ".join("SUM(count * (day <= ?))" for _ in bounds)
+        row = conn.execute(f"SELECT {sums} FROM ticket_open_days", bounds).fetchone()
+        cumulative = [v or 0 for v in row]
+        open_age = {}
+        previous = 0
+        for (label, _), count in zip(OPEN_AGE_BUCKETS, cumulative):
+            open_age[label] = count - previous
+            previous = count
+
+        daily = [
+            {"day": r["day"], "created": r["created"], "resolved": r["resolved"]}
+            for r in conn.execute(
+                "SELECT day, created, resolved FROM ticket_daily "
+                "WHERE day > date('now', ?) ORDER BY day",
+                (f"-{days} days",),
+            )
+        ]
+    finally:
+        conn.rollback()
+
+    return etag, {
+        "total": sum(by["status"].values()),
+        "byStatus": by["status"],
+        "byPriority": by["priority"],
+        "byAssignee": by["assignee"],
+        "openAge": open_age,
+        "daily": daily,
+    }
+
+
+@app.get("/stats")
+async def get_stats(
+    days: int = Query(30, ge=1, le=365),
+    if_none_match: Optional[str] = Header(None, alias="If-None-Match"),
+    user: dict = Depends(get_current_user),
+):
+    """Dashboard counters from the trigger-maintained summary tables.
+
+    Supports If-None-Match: while nothing changed the response is an empty
+    304 that costs a single-row read.
+    """
+    etag, stats = await db.run(fetch_stats, days, if_none_match)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if stats is None:
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(stats, headers=headers)
+
+
+# ============================================================
+# ENDPOINTS DE EVENTOS (Server-Sent Events)
+# ============================================================
+
+
+def format_sse(event: tuple) -> str:
+    event_id, event_type, data = event
+    return f"id: {event_id}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n"
+
+
+@app.get("/events")
+async def ticket_events(
+    request: Request,
+    token: Optional[str] = None,
+    last_event_id: Optional[str] = Header(None, alias="Last-Event-ID"),
+    authorization: Optional[str] = Header(None, alias="Authorization"),
+):
+    """Stream ticket changes as Server-Sent Events.
+
+    EventSource cannot send headers, so the token may also be passed as
+    `?token=`. Events: ticket.created, ticket.updated (changed fields only),
+    ticket.deleted, comment.created and reset (the client should refetch).
+    """
+    await get_current_user(authorization or token)
+    resume_from = request.query_params.get("last_event_id") or last_event_id
+    try:
+        resume_from = int(resume_from) if resume_from else None
+    except ValueError:
+        resume_from = None
+
+    async def stream():
+        queue, backlog = event_bus.subscribe(resume_from)
+        try:
+            # Tell EventSource how long to wait before reconnecting.
+            yield "retry: 3000\n\n"
+            for event in backlog:
+                yield format_sse(event)
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), EVENT_HEARTBEAT_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"
+                    continue
+                yield format_sse(event)
+        finally:
+            event_bus.unsubscribe(queue)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# ============================================================
+# MÉTRICAS (Prometheus)
+# ============================================================
+
+
+@app.get("/metrics")
+async def get_metrics():
+    """Metrics in the Prometheus text exposition format (restrict it at the proxy)."""
+    cache = user_cache.stats()
+    for key in ("size", "hits", "misses"):
+        metrics.set_gauge("helpdesk_token_cache", (("stat", key),), cache[key])
+    for key, value in response_cache.stats().items():
+        metrics.set_gauge("helpdesk_response_cache", (("stat", key),), value)
+    metrics.set_gauge("helpdesk_login_pending", (), password_pool.pending)
+    metrics.set_gauge("helpdesk_rate_limit_buckets", (), len(rate_limiter))
+    metrics.set_gauge("helpdesk_sse_subscribers", (), event_bus.subscriber_count)
+    return Response(metrics.render(), media_type="text/plain; version=0.0.4")
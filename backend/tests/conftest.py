@@ -8,6 +8,8 @@ so add the repository root to sys.path early during collection.
 import os
 import sys
 
+import pytest
+
 # backend/tests -> repo root is two levels up
 TEST_DIR = os.path.dirname(__file__)
 REPO_ROOT = os.path.abspath(os.path.join(TEST_DIR, "..", ".."))
@@ -15,3 +17,17 @@ REPO_ROOT = os.path.abspath(os.path.join(TEST_DIR, "..", ".."))
 if REPO_ROOT not in sys.path:
     # Insert at front to prefer local package over installed ones
     sys.path.insert(0, REPO_ROOT)
+
+
+@pytest.fixture
+def headers():
+    """Authorization headers for the seeded admin user."""
+    from fastapi.testclient import TestClient
+
+    import backend.server as server_module
+
+    r = TestClient(server_module.app).post(
+        "/auth/login", json={"username": "admin", "password": "admin123"}
+    )
+    assert r.status_code == 200
+    return {"Authorization": f"Bearer {r.json()['token']}"}
@@ -0,0 +1,149 @@
+import os
+import subprocess
+import sys
+
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+SCRIPT = os.path.join(os.path.dirname(__file__), "..", "..", "base", "init_db.py")
+
+
+def make_pool(tmp_path):
+    path = str(tmp_path / "hot.db")
+    subprocess.run(
+        [sys.executable, SCRIPT, "--seed", "--out", path],
+        check=True,
+        capture_output=True,
+    )
+    return server_module.ConnectionPool(path)
+
+
+def test_archiver_moves_closed_tickets_with_comments(tmp_path):
+    pool = make_pool(tmp_path)
+    conn = pool.connection()
+    assert pool.archive_path == str(tmp_path / "hot-archive.db")
+    conn.execute("UPDATE tickets SET status = 'closed' WHERE id = 1")
+    conn.commit()
+    counts_before = conn.execute(
+        "SELECT * FROM ticket_counts ORDER BY dimension, value"
+    ).fetchall()
+
+    # Nothing is old enough yet.
+    assert server_module.archive_closed_tickets(conn, 30, 100) == (0, 0)
+    # A negative age makes every closed ticket eligible.
+    assert server_module.archive_closed_tickets(conn, -1, 100) == (1, 1)
+
+    assert (
+        conn.execute("SELECT COUNT(*) FROM main.tickets WHERE id = 1").fetchone()[0]
+        == 0
+    )
+    assert (
+        conn.execute(
+            "SELECT COUNT(*) FROM main.comments WHERE ticket_id = 1"
+        ).fetchone()[0]
+        == 0
+    )
+    assert (
+        conn.execute("SELECT status FROM archive.tickets WHERE id = 1").fetchone()[0]
+        == "closed"
+    )
+    assert (
+        conn.execute("SELECT text FROM archive.comments WHERE ticket_id = 1")
+        .fetchone()[0]
+        .startswith("Revisando")
+    )
+    # Archived tickets still count on the dashboard.
+    assert (
+        conn.execute("SELECT * FROM ticket_counts ORDER BY dimension, value").fetchall()
+        == counts_before
+    )
+
+    hot = server_module.query_tickets(conn)[0]
+    everything = server_module.query_tickets(conn, archived=True)[0]
+    assert [t["id"] for t in hot] == ["2"]
+    assert sorted(t["id"] for t in everything) == ["1", "2"]
+    archived = next(t for t in everything if t["id"] == "1")
+    assert archived["status"] == "closed" and len(archived["comments"]) == 1
+
+    closed_only, _ = server_module.query_tickets(
+        conn, "WHERE status = ?", ("closed",), 10, archived=True
+    )
+    assert [t["id"] for t in closed_only] == ["1"]
+    pool.close_all()
+
+
+def test_changes_report_archived_tickets_apart_from_deletions(tmp_path):
+    pool = make_pool(tmp_path)
+    conn = pool.connection()
+    conn.execute("UPDATE tickets SET status = 'closed' WHERE id = 1")
+    conn.commit()
+    since = server_module.fetch_changes(conn, 0, 1000)["next"]
+
+    assert server_module.archive_closed_tickets(conn, -1, 100) == (1, 1)
+    changes = server_module.fetch_changes(conn, since, 1000)
+    assert changes["archived"] == ["1"]
+    assert changes["deleted"] == {"tickets": [], "comments": []}
+    assert changes["tickets"] == [] and changes["next"] > since
+
+    # Deleting another ticket is still a tombstone.
+    conn.execute("DELETE FROM tickets WHERE id = 2")
+    conn.commit()
+    changes = server_module.fetch_changes(conn, since, 1000)
+    assert changes["archived"] == ["1"] and changes["deleted"]["tickets"] == ["2"]
+    pool.close_all()
+
+
+def test_archiver_keeps_tickets_that_changed_after_the_copy(tmp_path):
+    pool = make_pool(tmp_path)
+    conn = pool.connection()
+    conn.execute("UPDATE tickets SET status = 'resolved' WHERE id = 1")
+    # An archived comment the hot ticket does not have: the copy no longer
+    # matches (as when a comment lands between copy and delete).
+    conn.execute(
+        "INSERT INTO archive.comments (id, ticket_id, author_id, text, created_at) "
+        "VALUES (999, 1, 1, 'stale', '2000-01-01 00:00:00')"
+    )
+    conn.commit()
+
+    assert server_module.archive_closed_tickets(conn, -1, 100) == (1, 0)
+    assert (
+        conn.execute("SELECT COUNT(*) FROM main.tickets WHERE id = 1").fetchone()[0]
+        == 1
+    )
+    # While both copies exist, reads use the hot one and its comments.
+    everything = server_module.query_tickets(conn, archived=True)[0]
+    ticket = [t for t in everything if t["id"] == "1"]
+    assert len(ticket) == 1
+    assert [c["text"] for c in ticket[0]["comments"]] == [
+        "Revisando el problema, pidan logs por favor."
+    ]
+    pool.close_all()
+
+
+def test_list_tickets_accepts_include_archived():
+    r = client.post("/auth/login", json={"username": "admin", "password": "admin123"})
+    headers = {"Authorization": f"Bearer {r.json()['token']}"}
+    hot = client.get("/tickets", params={"fields": "id"}, headers=headers)
+    both = client.get(
+        "/tickets", params={"fields": "id", "include_archived": 1}, headers=headers
+    )
+    assert both.status_code == 200
+    assert {t["id"] for t in hot.json()} <= {t["id"] for t in both.json()}
+
+
+def test_archive_is_not_attached_while_disabled_and_absent(tmp_path, monkeypatch):
+    monkeypatch.setattr(server_module, "ARCHIVE_AFTER_DAYS", 0)
+    pool = make_pool(tmp_path)
+    conn = pool.connection()
+    assert not server_module.has_archive(conn)
+    assert not os.path.exists(pool.archive_path)
+    # Archive-aware reads fall back to the hot tables.
+    assert sorted(
+        t["id"] for t in server_module.query_tickets(conn, archived=True)[0]
+    ) == ["1", "2"]
+    assert server_module.fetch_ticket_detail(conn, 999, 10, None) is None
+    assert server_module.fetch_attachments(conn, 999) is None
+    assert server_module.ticket_history(conn, 999, 10) is None
+    pool.close_all()
@@ -0,0 +1,86 @@
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+
+
+def test_new_tickets_go_to_an_agent_and_closing_frees_the_load(headers):
+    engine = server_module.assignment
+    ticket = client.post(
+        "/tickets", json={"title": "Route me", "priority": "urgent"}, headers=headers
+    ).json()
+    agent = ticket["assignee_id"]
+    conn = server_module.get_db()
+    assert (
+        conn.execute("SELECT role FROM users WHERE id = ?", (agent,)).fetchone()[0]
+        == "agent"
+    )
+    before = engine.loads[agent]
+
+    client.put(f"/tickets/{ticket['id']}", json={"status": "closed"}, headers=headers)
+    assert engine.loads[agent] == before - server_module.PRIORITY_LOAD["urgent"]
+    client.put(f"/tickets/{ticket['id']}", json={"status": "open"}, headers=headers)
+    assert engine.loads[agent] == before
+    client.delete(f"/tickets/{ticket['id']}", headers=headers)
+    assert engine.loads[agent] == before - server_module.PRIORITY_LOAD["urgent"]
+
+    # The incremental state matches a reload from the database.
+    loads = dict(engine.loads)
+    engine.load(conn)
+    assert engine.loads == loads
+
+
+def test_policies_pick_agents_by_load():
+    engine = server_module.AssignmentEngine(server_module.PriorityAwarePolicy())
+    engine.rebuild([10, 20, 30], [(1, 10, "urgent"), (2, 20, "low"), (3, 20, "low")])
+    assert engine.take(None, "normal") == 30
+    assert (
+        engine.take(None, "normal") == 20
+    )  # 2 + 0 vs. 30's 2: the earlier load change ranks first
+    engine.bind(4, 30, "normal")
+    engine.update(1, 10, "closed", "urgent")
+    assert engine.loads == {10: 0, 20: 4, 30: 2}
+    engine.update(4, 10, "open", "high")  # reassigned and escalated
+    assert engine.loads == {10: 4, 20: 4, 30: 0}
+    engine.forget(4)
+    assert engine.least_loaded() in (10, 30)
+
+    counting = server_module.AssignmentEngine(server_module.LeastLoadedPolicy())
+    counting.rebuild([10, 20], [(1, 10, "urgent")])
+    assert [counting.take(None, "urgent") for _ in range(3)] == [20, 10, 20]
+
+    turns = server_module.AssignmentEngine(server_module.RoundRobinPolicy())
+    turns.rebuild([30, 10, 20], [(1, 10, "low")])
+    assert [turns.take(None, "low") for _ in range(4)] == [10, 20, 30, 10]
+
+    empty = server_module.AssignmentEngine(server_module.LeastLoadedPolicy())
+    empty.rebuild([], [])
+    assert empty.take(None, "low") is None
+
+
+def test_rebuild_between_take_and_bind_keeps_the_charge_once():
+    engine = server_module.AssignmentEngine(server_module.PriorityAwarePolicy())
+    engine.rebuild([10, 20], [(1, 20, "high")])
+
+    # The resync's snapshot was read before the new ticket was stored.
+    assert engine.take(None, "normal") == 10
+    engine.rebuild([10, 20], [(1, 20, "high")])
+    engine.bind(2, 10, "normal")
+    assert engine.loads == {10: 2, 20: 4}
+
+    # ... or after it: the snapshot already counts the ticket.
+    assert engine.take(None, "normal") == 10
+    engine.rebuild([10, 20], [(1, 20, "high"), (2, 10, "normal"), (3, 10, "normal")])
+    engine.bind(3, 10, "normal")
+    assert engine.loads == {10: 4, 20: 4}
+
+    # A failed insert after a rebuild gives the charge back.
+    assert engine.take(None, "low") == 20
+    engine.rebuild([10, 20], [(1, 20, "high"), (2, 10, "normal"), (3, 10, "normal")])
+    engine.release(20, "low")
+    assert engine.loads == {10: 4, 20: 4} and not engine.pending
+
+    for ticket_id in (1, 2, 3):
+        engine.forget(ticket_id)
+    assert engine.loads == {10: 0, 20: 0}
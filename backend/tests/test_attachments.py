@@ -0,0 +1,182 @@
+import asyncio
+import hashlib
+import os
+import resource
+
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+
+LARGE_FILE_MB = int(os.environ.get("HELPDESK_TEST_LARGE_FILE_MB", "200"))
+
+
+@pytest.fixture(autouse=True)
+def attachments_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(server_module, "ATTACHMENTS_DIR", str(tmp_path / "attachments"))
+    return tmp_path / "attachments"
+
+
+def new_ticket(headers):
+    return client.post(
+        "/tickets", json={"title": "With files", "priority": "low"}, headers=headers
+    ).json()["id"]
+
+
+def test_upload_dedupes_by_sha256_and_downloads_with_range(attachments_dir, headers):
+    ticket_id = new_ticket(headers)
+    body = b"line of a log file\n" * 5000
+    sha = hashlib.sha256(body).hexdigest()
+
+    first = client.post(
+        f"/tickets/{ticket_id}/attachments",
+        params={"filename": "../../server.log"},
+        content=body,
+        headers={**headers, "Content-Type": "text/plain"},
+    )
+    assert first.status_code == 200
+    meta = first.json()
+    assert meta["fileName"] == "server.log"
+    assert meta["sha256"] == sha and meta["size"] == len(body)
+    second = client.post(
+        f"/tickets/{ticket_id}/attachments",
+        params={"filename": "copy.log"},
+        content=body,
+        headers=headers,
+    )
+    assert second.json()["sha256"] == sha
+
+    stored = [f for _, _, files in os.walk(attachments_dir) for f in files]
+    assert stored == [sha]
+    listed = client.get(f"/tickets/{ticket_id}/attachments", headers=headers).json()
+    assert [a["fileName"] for a in listed] == ["server.log", "copy.log"]
+
+    url = f"/tickets/{ticket_id}/attachments/{meta['id']}"
+    full = client.get(url, headers=headers)
+    assert full.content == body
+    assert 'filename="server.log"' in full.headers["content-disposition"]
+    part = client.get(url, headers={**headers, "Range": "bytes=19-37"})
+    assert part.status_code == 206
+    assert part.content == body[19:38]
+    assert part.headers["content-range"] == f"bytes 19-37/{len(body)}"
+
+    client.delete(f"/tickets/{ticket_id}", headers=headers)
+    assert client.get(url, headers=headers).status_code == 404
+
+
+def test_upload_rejects_missing_ticket_and_oversized_files(
+    monkeypatch, attachments_dir, headers
+):
+    r = client.post(
+        "/tickets/999999/attachments",
+        params={"filename": "a.txt"},
+        content=b"x",
+        headers=headers,
+    )
+    assert r.status_code == 404
+
+    ticket_id = new_ticket(headers)
+    monkeypatch.setattr(server_module, "MAX_ATTACHMENT_BYTES", 10)
+    r = client.post(
+        f"/tickets/{ticket_id}/attachments",
+        params={"filename": "a.txt"},
+        content=b"x" * 11,
+        headers=headers,
+    )
+    assert r.status_code == 413
+    assert [f for _, _, files in os.walk(attachments_dir) for f in files] == []
+    client.delete(f"/tickets/{ticket_id}", headers=headers)
+
+
+async def call_app(method, path, headers, body_chunks=None, query=b""):
+    """Drive the ASGI app directly so neither side buffers the whole body."""
+    chunks = iter(body_chunks or ())
+    status = None
+    received = 0
+    first_bytes = b""
+    body_sent = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal body_sent
+        if body_sent:
+            await done.wait()
+            return {"type": "http.disconnect"}
+        chunk = next(chunks, None)
+        if chunk is None:
+            body_sent = True
+            return {"type": "http.request", "body": b"", "more_body": False}
+        return {"type": "http.request", "body": chunk, "more_body": True}
+
+    async def send(message):
+        nonlocal status, received, first_bytes
+        if message["type"] == "http.response.start":
+            status = message["status"]
+        elif message["type"] == "http.response.body":
+            if len(first_bytes) < 64:
+                first_bytes += message.get("body", b"")[:64]
+            received += len(message.get("body", b""))
+            if not message.get("more_body", False):
+                done.set()
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query,
+        "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        "client": ("test", 1),
+        "server": ("test", 80),
+    }
+    await server_module.app(scope, receive, send)
+    return status, received, first_bytes
+
+
+def peak_rss_mb() -> float:
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def test_large_upload_and_download_keep_memory_flat(headers):
+    ticket_id = new_ticket(headers)
+    chunk = os.urandom(1024 * 1024)
+    digest = hashlib.sha256()
+
+    def body():
+        for i in range(LARGE_FILE_MB):
+            piece = chunk[i % 256 :] + chunk[: i % 256]
+            digest.update(piece)
+            yield piece
+
+    before = peak_rss_mb()
+    status, _, first = asyncio.run(
+        call_app(
+            "POST",
+            f"/tickets/{ticket_id}/attachments",
+            headers,
+            body(),
+            b"filename=big.bin",
+        )
+    )
+    assert status == 200, first
+    meta = client.get(f"/tickets/{ticket_id}/attachments", headers=headers).json()[0]
+    assert meta["size"] == LARGE_FILE_MB * 1024 * 1024
+    assert meta["sha256"] == digest.hexdigest()
+
+    status, received, _ = asyncio.run(
+        call_app(
+            "GET",
+            f"/tickets/{ticket_id}/attachments/{meta['id']}",
+            {**headers, "Accept-Encoding": "identity"},
+        )
+    )
+    assert status == 200 and received == meta["size"]
+    # Neither direction held the file in memory.
+    assert peak_rss_mb() - before < 64
+
+    client.delete(f"/tickets/{ticket_id}", headers=headers)
@@ -0,0 +1,65 @@
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+
+
+def test_bulk_create_reports_per_item_results(headers):
+    r = client.post(
+        "/tickets/bulk",
+        json=[
+            {"title": "Bulk 1", "priority": "low"},
+            {"title": "Bulk 2", "priority": "medium"},
+            {"title": "Bulk 3", "priority": "high", "description": "third"},
+        ],
+        headers=headers,
+    )
+    assert r.status_code == 200
+    results = r.json()
+    assert [x["ok"] for x in results] == [True, False, True]
+    assert "priority" in results[1]["error"]
+    assert results[0]["ticket"]["title"] == "Bulk 1"
+    assert results[2]["ticket"]["description"] == "third"
+    assert results[2]["ticket"]["comments"] == []
+
+    for x in results:
+        if x["ok"]:
+            client.delete(f"/tickets/{x['ticket']['id']}", headers=headers)
+
+
+def test_bulk_update_assigns_and_closes_in_one_call(headers):
+    created = client.post(
+        "/tickets/bulk",
+        json=[{"title": f"Triage {i}", "priority": "low"} for i in range(3)],
+        headers=headers,
+    ).json()
+    ids = [int(x["ticket"]["id"]) for x in created]
+
+    r = client.patch(
+        "/tickets/bulk",
+        json=[
+            {"id": ids[0], "status": "closed"},
+            {"id": ids[1], "status": "closed", "assignee_id": 1},
+            {"id": ids[2], "status": "bogus"},
+            {"id": 999999, "status": "closed"},
+        ],
+        headers=headers,
+    )
+    assert r.status_code == 200
+    results = r.json()
+    assert [x["ok"] for x in results] == [True, True, False, False]
+    assert results[0]["ticket"]["status"] == "closed"
+    assert results[1]["ticket"]["assignee_id"] == 1
+    assert results[3]["error"] == "Ticket not found"
+
+    tickets = {t["id"]: t for t in client.get("/tickets", headers=headers).json()}
+    assert tickets[str(ids[2])]["status"] == "open"
+
+    for tid in ids:
+        client.delete(f"/tickets/{tid}", headers=headers)
+
+
+def test_bulk_rejects_oversized_batches(headers):
+    items = [{"title": "x", "priority": "low"}] * (server_module.MAX_BULK_ITEMS + 1)
+    assert client.post("/tickets/bulk", json=items, headers=headers).status_code == 413
@@ -0,0 +1,87 @@
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+
+
+def current_seq(headers):
+    return client.get(
+        "/tickets/changes", params={"since": 10**12}, headers=headers
+    ).json()["next"]
+
+
+def test_changes_since_returns_only_new_rows_and_tombstones(headers):
+    since = current_seq(headers)
+
+    a = client.post(
+        "/tickets", json={"title": "Delta A", "priority": "low"}, headers=headers
+    ).json()
+    b = client.post(
+        "/tickets", json={"title": "Delta B", "priority": "high"}, headers=headers
+    ).json()
+    client.post(
+        f"/tickets/{a['id']}/comments", json={"text": "delta note"}, headers=headers
+    )
+    client.put(f"/tickets/{a['id']}", json={"status": "closed"}, headers=headers)
+    client.delete(f"/tickets/{b['id']}", headers=headers)
+
+    r = client.get("/tickets/changes", params={"since": since}, headers=headers)
+    assert r.status_code == 200
+    body = r.json()
+    assert [t["id"] for t in body["tickets"]] == [a["id"]]
+    assert body["tickets"][0]["status"] == "closed"
+    assert [(c["ticket_id"], c["text"]) for c in body["comments"]] == [
+        (a["id"], "delta note")
+    ]
+    assert body["deleted"] == {"tickets": [b["id"]], "comments": []}
+    assert body["hasMore"] is False
+
+    again = client.get(
+        "/tickets/changes", params={"since": body["next"]}, headers=headers
+    ).json()
+    assert again["tickets"] == [] and again["next"] == body["next"]
+
+    client.delete(f"/tickets/{a['id']}", headers=headers)
+    final = client.get(
+        "/tickets/changes", params={"since": body["next"]}, headers=headers
+    ).json()
+    # The cascaded comment is covered by the ticket tombstone.
+    assert final["deleted"] == {"tickets": [a["id"]], "comments": []}
+
+
+def test_changes_pages_with_limit(headers):
+    since = current_seq(headers)
+    ids = [
+        client.post(
+            "/tickets", json={"title": f"Page {i}", "priority": "low"}, headers=headers
+        ).json()["id"]
+        for i in range(3)
+    ]
+
+    first = client.get(
+        "/tickets/changes", params={"since": since, "limit": 2}, headers=headers
+    ).json()
+    assert first["hasMore"] is True
+    second = client.get(
+        "/tickets/changes", params={"since": first["next"], "limit": 2}, headers=headers
+    ).json()
+    assert second["hasMore"] is False
+    assert sorted(t["id"] for t in first["tickets"] + second["tickets"]) == sorted(ids)
+
+    for ticket_id in ids:
+        client.delete(f"/tickets/{ticket_id}", headers=headers)
+
+
+def test_deleting_a_ticket_moves_the_write_generation(headers):
+    tid = client.post(
+        "/tickets", json={"title": "Gen", "priority": "low"}, headers=headers
+    ).json()["id"]
+    # The comment holds the highest seq; the cascade forgets it with the ticket.
+    client.post(
+        f"/tickets/{tid}/comments", json={"text": "last write"}, headers=headers
+    )
+    conn = server_module.get_db()
+    before = server_module.write_generation(conn)
+    client.delete(f"/tickets/{tid}", headers=headers)
+    assert server_module.write_generation(conn) > before
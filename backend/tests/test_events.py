@@ -0,0 +1,54 @@
+import asyncio
+import threading
+
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+
+
+def test_event_bus_delivers_across_threads_and_replays_backlog():
+    bus = server_module.EventBus(history=3, queue_size=8)
+
+    async def scenario():
+        queue, backlog = bus.subscribe()
+        assert backlog == []
+        publisher = threading.Thread(
+            target=bus.publish, args=("ticket.created", {"id": "1"})
+        )
+        publisher.start()
+        publisher.join()
+        event = await asyncio.wait_for(queue.get(), 1)
+        assert event == (1, "ticket.created", {"id": "1"})
+        bus.unsubscribe(queue)
+
+        for i in range(2, 6):
+            bus.publish("ticket.updated", {"id": str(i)})
+        _, backlog = bus.subscribe(last_event_id=3)
+        assert [e[0] for e in backlog] == [4, 5]
+        _, backlog = bus.subscribe(last_event_id=1)
+        assert [e[1] for e in backlog] == [bus.RESET]
+
+    asyncio.run(scenario())
+
+
+def test_event_bus_resets_slow_consumers():
+    bus = server_module.EventBus(history=10, queue_size=2)
+
+    async def scenario():
+        queue, _ = bus.subscribe()
+        for i in range(3):
+            bus.publish("ticket.updated", {"id": str(i)})
+        await asyncio.sleep(0)
+        events = []
+        while not queue.empty():
+            events.append(queue.get_nowait())
+        assert events[-1][1] == bus.RESET
+
+    asyncio.run(scenario())
+
+
+def test_events_stream_requires_auth():
+    assert client.get("/events").status_code == 401
+    assert client.get("/events", params={"token": "bogus"}).status_code == 401
@@ -0,0 +1,149 @@
+import asyncio
+import csv
+import io
+import json
+import sqlite3
+
+import anyio
+import pytest
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+
+
+def make_ticket(headers, title, comments=()):
+    tid = client.post(
+        "/tickets", json={"title": title, "priority": "low"}, headers=headers
+    ).json()["id"]
+    for text in comments:
+        client.post(f"/tickets/{tid}/comments", json={"text": text}, headers=headers)
+    return tid
+
+
+def test_ndjson_export_nests_comments_across_batches(monkeypatch, headers):
+    tid = make_ticket(headers, "Export me", ["uno", "dos", "tres"])
+    # One row per batch: the ticket's comment rows span several batches.
+    monkeypatch.setattr(server_module, "EXPORT_BATCH", 1)
+
+    r = client.get("/export/tickets", params={"include": "comments"}, headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert len({t["id"] for t in lines}) == len(lines)
+    exported = next(t for t in lines if t["id"] == tid)
+    assert [c["text"] for c in exported["comments"]] == ["uno", "dos", "tres"]
+    assert [(t["createdAt"], int(t["id"])) for t in lines] == sorted(
+        (t["createdAt"], int(t["id"])) for t in lines
+    )
+
+    closed = client.get(
+        "/export/tickets", params={"status": "closed"}, headers=headers
+    ).text.splitlines()
+    assert all(json.loads(line)["status"] == "closed" for line in closed)
+    future = client.get(
+        "/export/tickets", params={"created_from": "2999-01-01"}, headers=headers
+    )
+    assert future.text == ""
+    client.delete(f"/tickets/{tid}", headers=headers)
+
+
+def test_csv_export_has_one_row_per_comment(headers):
+    tid = make_ticket(headers, 'Coma, "comillas"', ["a", "b"])
+    r = client.get(
+        "/export/tickets",
+        params={"format": "csv", "include": "comments"},
+        headers=headers,
+    )
+    assert r.headers["content-disposition"] == 'attachment; filename="tickets.csv"'
+    rows = list(csv.DictReader(io.StringIO(r.text)))
+    mine = [row for row in rows if row["id"] == tid]
+    assert [row["comment_text"] for row in mine] == ["a", "b"]
+    assert mine[0]["title"] == 'Coma, "comillas"'
+
+    plain = list(
+        csv.DictReader(
+            io.StringIO(
+                client.get(
+                    "/export/tickets", params={"format": "csv"}, headers=headers
+                ).text
+            )
+        )
+    )
+    assert "comment_id" not in plain[0]
+    assert sum(row["id"] == tid for row in plain) == 1
+
+    assert (
+        client.get(
+            "/export/tickets", params={"format": "xml"}, headers=headers
+        ).status_code
+        == 400
+    )
+    assert (
+        client.get(
+            "/export/tickets", params={"created_to": "ayer"}, headers=headers
+        ).status_code
+        == 400
+    )
+    assert (
+        client.get(
+            "/export/tickets", params={"status": "lost"}, headers=headers
+        ).status_code
+        == 400
+    )
+    client.delete(f"/tickets/{tid}", headers=headers)
+
+
+def test_export_reads_a_snapshot_without_blocking_writers(monkeypatch):
+    monkeypatch.setattr(server_module, "EXPORT_BATCH", 1)
+
+    async def run():
+        export = server_module.stream_export("ndjson", [], (), False, False)
+        first = await export.__anext__()
+        # Mid-export, a writer commits immediately (no busy wait allowed).
+        writer = sqlite3.connect(server_module.db_pool.path, timeout=0)
+        new_id = writer.execute(
+            "INSERT INTO tickets "
+            "(title, priority, status, reporter_id, created_at, updated_at) "
+            "VALUES ('During export', 'low', 'open', 1, "
+            "datetime('now'), datetime('now'))"
+        ).lastrowid
+        writer.commit()
+        rest = [chunk async for chunk in export]
+        writer.execute("DELETE FROM tickets WHERE id = ?", (new_id,))
+        writer.commit()
+        writer.close()
+        return [
+            json.loads(line) for chunk in [first, *rest] for line in chunk.splitlines()
+        ], new_id
+
+    tickets, new_id = asyncio.run(run())
+    assert tickets
+    # The export sees the database as of its start.
+    assert str(new_id) not in {t["id"] for t in tickets}
+
+
+def test_cancelled_export_still_closes_its_connection(monkeypatch):
+    monkeypatch.setattr(server_module, "EXPORT_BATCH", 1)
+    opened = []
+
+    def open_connection(archived):
+        opened.append(open_export_connection(archived))
+        return opened[-1]
+
+    open_export_connection = server_module.open_export_connection
+    monkeypatch.setattr(server_module, "open_export_connection", open_connection)
+
+    async def run():
+        export = server_module.stream_export("ndjson", [], (), False, False)
+        # As when the client disconnects: the scope keeps cancelling every await.
+        with anyio.CancelScope() as scope:
+            await export.__anext__()
+            scope.cancel()
+            await export.__anext__()
+        await asyncio.sleep(0.2)
+
+    asyncio.run(run())
+    with pytest.raises(sqlite3.ProgrammingError):
+        opened[0].execute("SELECT 1")
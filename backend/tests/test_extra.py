@@ -1,3 +1,6 @@
+import hashlib
+import threading
+
 from fastapi.testclient import TestClient
 
 import backend.server as server_module
@@ -49,3 +52,206 @@ def test_create_update_comment_delete_ticket():
     r4 = client.delete(f"/tickets/{tid}", headers=headers)
     assert r4.status_code == 200
     assert r4.json().get("ok") is True
+
+
+def test_single_statement_writes_match_reads_and_report_missing_tickets():
+    headers = {"Authorization": f"Bearer {login_token()}"}
+    created = client.post(
+        "/tickets", json={"title": "Returning", "priority": "high"}, headers=headers
+    ).json()
+    tid = created["id"]
+    fresh = client.get(f"/tickets/{tid}", headers=headers).json()
+    assert created["comments"] == []
+    assert {k: created[k] for k in server_module.TICKET_FIELDS} == {
+        k: fresh[k] for k in server_module.TICKET_FIELDS
+    }
+
+    comment = client.post(
+        f"/tickets/{tid}/comments", json={"text": "first"}, headers=headers
+    ).json()
+    updated = client.put(
+        f"/tickets/{tid}",
+        json={"status": "in_progress", "assignee_id": 1},
+        headers=headers,
+    ).json()
+    detail = client.get(f"/tickets/{tid}", headers=headers).json()
+    assert updated["comments"] == [comment]
+    for key in server_module.TICKET_FIELDS:
+        assert updated[key] == detail[key]
+    assert updated["assignee_id"] == 1 and updated["updatedAt"] >= created["updatedAt"]
+
+    # No separate existence check: the write itself reports the missing row.
+    assert (
+        client.put(
+            "/tickets/999999", json={"status": "closed"}, headers=headers
+        ).status_code
+        == 404
+    )
+    assert (
+        client.post(
+            "/tickets/999999/comments", json={"text": "x"}, headers=headers
+        ).status_code
+        == 404
+    )
+    assert client.delete(f"/tickets/{tid}", headers=headers).status_code == 200
+    assert client.delete(f"/tickets/{tid}", headers=headers).status_code == 404
+
+
+def test_list_tickets_embeds_comments_in_order():
+    headers = {"Authorization": f"Bearer {login_token()}"}
+    r = client.post(
+        "/tickets", json={"title": "With comments", "priority": "low"}, headers=headers
+    )
+    tid = r.json()["id"]
+    for text in ("first", "second"):
+        client.post(f"/tickets/{tid}/comments", json={"text": text}, headers=headers)
+
+    tickets = client.get("/tickets", headers=headers).json()
+    ticket = next(t for t in tickets if t["id"] == tid)
+    assert [c["text"] for c in ticket["comments"]] == ["first", "second"]
+    assert all("comments" in t for t in tickets)
+
+    client.delete(f"/tickets/{tid}", headers=headers)
+
+
+def test_list_tickets_cursor_pagination_filters_and_fields():
+    headers = {"Authorization": f"Bearer {login_token()}"}
+    ids = []
+    for i in range(3):
+        r = client.post(
+            "/tickets",
+            json={"title": f"Page {i}", "priority": "urgent"},
+            headers=headers,
+        )
+        ids.append(r.json()["id"])
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"priority": "urgent", "limit": 2, "fields": "id,title"}
+        if cursor:
+            params["cursor"] = cursor
+        r = client.get("/tickets", params=params, headers=headers)
+        assert r.status_code == 200
+        page = r.json()
+        assert all(set(t) == {"id", "title"} for t in page)
+        seen.extend(t["id"] for t in page)
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert sorted(seen) == sorted(ids)
+
+    r = client.get(
+        "/tickets",
+        params={"fields": "id", "include": "comments", "limit": 1},
+        headers=headers,
+    )
+    assert set(r.json()[0]) == {"id", "comments"}
+    assert (
+        client.get("/tickets", params={"fields": "bogus"}, headers=headers).status_code
+        == 400
+    )
+    assert (
+        client.get("/tickets", params={"cursor": "%%%"}, headers=headers).status_code
+        == 400
+    )
+
+    for tid in ids:
+        client.delete(f"/tickets/{tid}", headers=headers)
+
+
+def test_db_connections_are_pooled_per_thread_in_wal_mode():
+    conn = server_module.get_db()
+    assert server_module.get_db() is conn
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    other = []
+    worker = threading.Thread(target=lambda: other.append(server_module.get_db()))
+    worker.start()
+    worker.join()
+    assert other[0] is not conn
+
+
+def test_token_cache_hits_and_invalidation():
+    cache = server_module.user_cache
+    token = login_token()
+    headers = {"Authorization": f"Bearer {token}"}
+    client.get("/users", headers=headers)
+    before = cache.stats()
+    client.get("/users", headers=headers)
+    after = cache.stats()
+    assert after["hits"] == before["hits"] + 1
+    assert after["misses"] == before["misses"]
+
+    user = cache.get(token)
+    cache.invalidate_user(user["id"])
+    assert cache.get(token) is None
+    assert client.get("/users", headers=headers).status_code == 200
+    assert cache.get(token) is not None
+
+
+def test_user_cache_is_bounded_and_expires():
+    cache = server_module.UserCache(maxsize=2, ttl=60)
+    for i in range(3):
+        cache.put(f"t{i}", {"id": i})
+    assert cache.get("t0") is None
+    assert cache.get("t2") == {"id": 2}
+
+    expired = server_module.UserCache(maxsize=2, ttl=0)
+    expired.put("t", {"id": 1})
+    assert expired.get("t") is None
+
+
+def test_login_rehashes_legacy_sha256_password():
+    conn = server_module.get_db()
+    legacy = hashlib.sha256(b"legacy-pass").hexdigest()
+    conn.execute(
+        "INSERT INTO users (username, full_name, password_hash, role) "
+        "VALUES (?, ?, ?, ?)",
+        ("legacy", "Legacy User", legacy, "user"),
+    )
+    conn.commit()
+    try:
+        login_token("legacy", "legacy-pass")
+        stored = conn.execute(
+            "SELECT password_hash FROM users WHERE username = 'legacy'"
+        ).fetchone()[0]
+        assert server_module.is_bcrypt_hash(stored)
+        login_token("legacy", "legacy-pass")
+    finally:
+        conn.execute("DELETE FROM users WHERE username = 'legacy'")
+        conn.commit()
+
+
+def test_login_rejected_with_503_when_password_pool_is_saturated():
+    pool = server_module.password_pool
+    limit = pool.max_pending
+    pool.max_pending = 0
+    try:
+        r = client.post(
+            "/auth/login", json={"username": "admin", "password": "admin123"}
+        )
+    finally:
+        pool.max_pending = limit
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+
+def test_large_ticket_lists_are_gzipped_and_match_row_to_ticket():
+    headers = {"Authorization": f"Bearer {login_token()}", "Accept-Encoding": "gzip"}
+    r = client.get("/tickets", headers=headers)
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/json"
+    if len(r.content) >= server_module.GZIP_MIN_SIZE:
+        assert r.headers["content-encoding"] == "gzip"
+
+    conn = server_module.get_db()
+    expected = [
+        server_module.row_to_ticket(row)
+        for row in conn.execute("SELECT * FROM tickets")
+    ]
+    by_id = {t["id"]: {k: v for k, v in t.items() if k != "comments"} for t in r.json()}
+    assert by_id == {t["id"]: t for t in expected}
+
+    small = client.get("/tickets", params={"limit": 1, "fields": "id"}, headers=headers)
+    assert "content-encoding" not in small.headers
@@ -0,0 +1,198 @@
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+
+
+def space_events(conn, tid):
+    """Give the ticket's events one second each from 2000-01-01 00:00:01, by version."""
+    conn.execute(
+        "UPDATE ticket_events "
+        "SET created_at = '2000-01-01 00:00:' || printf('%02d', version) "
+        "WHERE ticket_id = ?",
+        (tid,),
+    )
+    conn.commit()
+
+
+def test_history_records_only_changed_fields_and_who_changed_them(monkeypatch, headers):
+    monkeypatch.setattr(server_module, "HISTORY_SNAPSHOT_EVERY", 3)
+    admin = (
+        server_module.get_db()
+        .execute("SELECT id FROM users WHERE username = 'admin'")
+        .fetchone()[0]
+    )
+    tid = client.post(
+        "/tickets", json={"title": "Audit me", "priority": "low"}, headers=headers
+    ).json()["id"]
+    client.put(f"/tickets/{tid}", json={"status": "in_progress"}, headers=headers)
+    client.put(
+        f"/tickets/{tid}", json={"status": "in_progress"}, headers=headers
+    )  # no-op: no event
+    client.put(
+        f"/tickets/{tid}",
+        json={"priority": "high", "title": "Audit me"},
+        headers=headers,
+    )
+    client.put(f"/tickets/{tid}", json={"title": "Audited"}, headers=headers)
+    client.put(
+        f"/tickets/{tid}",
+        json={"status": "closed"},
+        headers={**headers, "Prefer": "return=minimal"},
+    )
+
+    history = client.get(f"/tickets/{tid}/history", headers=headers).json()
+    events = history["events"]
+    assert [e["version"] for e in events] == [1, 2, 3, 4, 5]
+    assert [e["kind"] for e in events] == [
+        "created",
+        "updated",
+        "updated",
+        "updated",
+        "updated",
+    ]
+    assert (
+        events[0]["changes"]["title"] == "Audit me" and events[0]["actor_id"] == admin
+    )
+    assert [e["changes"] for e in events[1:]] == [
+        {"status": "in_progress"},
+        {"priority": "high"},
+        {"title": "Audited"},
+        {"status": "closed"},
+    ]
+    assert history["nextCursor"] is None
+    page = client.get(
+        f"/tickets/{tid}/history", params={"limit": 2, "cursor": 2}, headers=headers
+    ).json()
+    assert [e["version"] for e in page["events"]] == [3, 4] and page["nextCursor"] == 4
+
+    # Version 3 carries a snapshot, so as_of after it replays from there.
+    conn = server_module.get_db()
+    assert (
+        conn.execute(
+            "SELECT version FROM ticket_events WHERE ticket_id = ? "
+            "AND snapshot IS NOT NULL",
+            (tid,),
+        ).fetchall()[0][0]
+        == 3
+    )
+    space_events(conn, tid)
+    client.post(
+        f"/tickets/{tid}/comments", json={"text": "after the fact"}, headers=headers
+    )
+    expected = {
+        "2000-01-01T00:00:01": ("Audit me", "low", "open", 1),
+        "2000-01-01 00:00:02": ("Audit me", "low", "in_progress", 2),
+        "2000-01-01T00:00:04": ("Audited", "high", "in_progress", 4),
+        # Offsets are converted to UTC, the timezone of the stored times.
+        "2000-01-01T02:00:02+02:00": ("Audit me", "low", "in_progress", 2),
+        "1999-12-31T23:00:04-01:00": ("Audited", "high", "in_progress", 4),
+        "2000-01-01T00:00:01Z": ("Audit me", "low", "open", 1),
+        "2030-01-01": ("Audited", "high", "closed", 5),
+    }
+    for as_of, (title, priority, status, version) in expected.items():
+        t = client.get(
+            f"/tickets/{tid}", params={"as_of": as_of}, headers=headers
+        ).json()
+        assert (t["title"], t["priority"], t["status"], t["version"]) == (
+            title,
+            priority,
+            status,
+            version,
+        )
+    assert (
+        client.get(
+            f"/tickets/{tid}", params={"as_of": "2000-01-01 00:00:02"}, headers=headers
+        ).json()["comments"]
+        == []
+    )
+    assert (
+        client.get(
+            f"/tickets/{tid}", params={"as_of": "1999-12-31"}, headers=headers
+        ).status_code
+        == 404
+    )
+    assert (
+        client.get(
+            f"/tickets/{tid}", params={"as_of": "ayer"}, headers=headers
+        ).status_code
+        == 400
+    )
+
+    client.delete(f"/tickets/{tid}", headers=headers)
+    assert (
+        client.get(
+            f"/tickets/{tid}", params={"as_of": "2030-01-01"}, headers=headers
+        ).status_code
+        == 404
+    )
+    assert (
+        client.get(
+            f"/tickets/{tid}", params={"as_of": "2000-01-01T00:00:05"}, headers=headers
+        ).json()["status"]
+        == "closed"
+    )
+    events = client.get(f"/tickets/{tid}/history", headers=headers).json()["events"]
+    assert events[-1]["kind"] == "deleted"
+    assert client.get("/tickets/999999/history", headers=headers).status_code == 404
+
+
+def test_tickets_without_history_start_from_a_snapshot(headers):
+    conn = server_module.get_db()
+    tid = conn.execute(
+        "INSERT INTO tickets "
+        "(title, priority, status, reporter_id, created_at, updated_at) "
+        "VALUES ('Imported', 'normal', 'open', 1, "
+        "'2001-01-01 00:00:00', '2001-02-01 00:00:00')"
+    ).lastrowid
+    conn.commit()
+    assert client.get(f"/tickets/{tid}/history", headers=headers).json()["events"] == []
+    assert (
+        client.get(
+            f"/tickets/{tid}", params={"as_of": "2001-03-01"}, headers=headers
+        ).json()["version"]
+        is None
+    )
+    # It existed on 2001-01-15, but its state then is unknown: only the last update is.
+    r = client.get(f"/tickets/{tid}", params={"as_of": "2001-01-15"}, headers=headers)
+    assert (
+        r.status_code == 409
+        and r.json()["detail"] == "Ticket history starts at 2001-02-01 00:00:00"
+    )
+    assert (
+        client.get(
+            f"/tickets/{tid}", params={"as_of": "2000-12-31"}, headers=headers
+        ).status_code
+        == 404
+    )
+
+    client.put(f"/tickets/{tid}", json={"priority": "urgent"}, headers=headers)
+    events = client.get(f"/tickets/{tid}/history", headers=headers).json()["events"]
+    assert [(e["kind"], e["createdAt"]) for e in events][0] == (
+        "snapshot",
+        "2001-02-01 00:00:00",
+    )
+    assert events[0]["changes"]["priority"] == "normal" and events[1]["changes"] == {
+        "priority": "urgent"
+    }
+    assert (
+        client.get(
+            f"/tickets/{tid}", params={"as_of": "2001-03-01"}, headers=headers
+        ).json()["priority"]
+        == "normal"
+    )
+    # Still the case once the PUT has written the baseline snapshot.
+    assert (
+        client.get(
+            f"/tickets/{tid}", params={"as_of": "2001-01-15"}, headers=headers
+        ).status_code
+        == 409
+    )
+    assert (
+        client.get(
+            f"/tickets/{tid}", params={"as_of": "2000-12-31"}, headers=headers
+        ).status_code
+        == 404
+    )
+    client.delete(f"/tickets/{tid}", headers=headers)
@@ -0,0 +1,300 @@
+import importlib.util
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(__file__))
+SCRIPT = os.path.join(ROOT, "..", "base", "init_db.py")
+
+
+spec = importlib.util.spec_from_file_location("init_db", SCRIPT)
+init_db = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(init_db)
+
+
+def run_init(*args):
+    subprocess.run([sys.executable, SCRIPT, *args], check=True, capture_output=True)
+
+
+def test_synthetic_generator_fills_tables_and_derived_data(tmp_path):
+    db = tmp_path / "synthetic.db"
+    run_init(
+        "--out",
+        str(db),
+        "--synthetic",
+        "--tickets",
+        "300",
+        "--comments-per-ticket",
+        "2",
+        "--users",
+        "20",
+        "--batch",
+        "100",
+    )
+
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 21
+    assert conn.execute("SELECT COUNT(*) FROM tickets").fetchone()[0] == 300
+    comments = conn.execute("SELECT COUNT(*) FROM comments").fetchone()[0]
+    assert comments > 300
+    assert (
+        conn.execute(
+            "SELECT COUNT(*) FROM tickets WHERE updated_at < created_at"
+        ).fetchone()[0]
+        == 0
+    )
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+
+    # Derived tables were rebuilt and the triggers recreated.
+    counts = dict(
+        conn.execute(
+            "SELECT value, count FROM ticket_counts WHERE dimension = 'status'"
+        ).fetchall()
+    )
+    assert counts == dict(
+        conn.execute("SELECT status, COUNT(*) FROM tickets GROUP BY status").fetchall()
+    )
+    assert (
+        conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0] == 300 + comments
+    )
+    word = conn.execute("SELECT title FROM tickets LIMIT 1").fetchone()[0].split()[0]
+    assert (
+        conn.execute(
+            "SELECT COUNT(*) FROM tickets_fts WHERE tickets_fts MATCH ?", (f'"{word}"',)
+        ).fetchone()[0]
+        > 0
+    )
+    triggers = {
+        r[0]
+        for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+    }
+    assert {
+        "trg_tickets_fts_insert",
+        "trg_stats_ticket_insert",
+        "trg_change_log_ticket_insert",
+    } <= triggers
+    conn.close()
+
+
+def test_seed_parser_streams_statements_and_parses_literals():
+    lines = [
+        "-- comment; not a statement\n",
+        "INSERT INTO users (username, full_name, password_hash, role)\n",
+        "VALUES ('o''brien', 'Semi; colon', 'pw', 'user'), ('b', 'B', 'pw2', 'agent'); "
+        "-- trailing\n",
+        "INSERT INTO tickets (title, reporter_id) VALUES ('x', 1);\n",
+    ]
+    statements = list(init_db.iter_sql_statements(lines))
+    assert len(statements) == 2
+    m = init_db.USERS_INSERT.match(statements[0])
+    assert init_db.parse_sql_values(m.group(2)) == [
+        ("o'brien", "Semi; colon", "pw", "user"),
+        ("b", "B", "pw2", "agent"),
+    ]
+    assert init_db.parse_sql_values("(1, NULL, -2.5)") == [(1, None, -2.5)]
+
+
+def test_import_users_csv_and_tickets_ndjson(tmp_path):
+    users = tmp_path / "users.csv"
+    users.write_text(
+        "username,full_name,password,role\nmigrated,Migrated User,secret,agent\n",
+        encoding="utf-8",
+    )
+    tickets = tmp_path / "tickets.ndjson"
+    tickets.write_text(
+        "\n".join(
+            json.dumps(t)
+            for t in (
+                {
+                    "id": 900,
+                    "title": "Old",
+                    "status": "closed",
+                    "reporter": "MIGRATED",
+                    "comments": [{"author": "admin", "text": "done"}],
+                },
+                {"title": "New id"},
+                {"title": "Bad", "priority": "medium"},
+            )
+        ),
+        encoding="utf-8",
+    )
+    db = tmp_path / "import.db"
+    run_init(
+        "--out",
+        str(db),
+        "--import-users",
+        str(users),
+        "--import-tickets",
+        str(tickets),
+        "--hash-workers",
+        "2",
+    )
+
+    conn = sqlite3.connect(db)
+    user_id, password_hash = conn.execute(
+        "SELECT id, password_hash FROM users WHERE username = 'migrated'"
+    ).fetchone()
+    assert init_db.bcrypt.checkpw(b"secret", password_hash.encode("utf-8"))
+    rows = conn.execute(
+        "SELECT id, title, reporter_id FROM tickets ORDER BY id"
+    ).fetchall()
+    assert rows == [(900, "Old", user_id), (901, "New id", None)]
+    assert conn.execute("SELECT ticket_id, text FROM comments").fetchall() == [
+        (900, "done")
+    ]
+    assert conn.execute(
+        "SELECT count FROM ticket_counts WHERE dimension = 'status' "
+        "AND value = 'closed'"
+    ).fetchone() == (1,)
+    conn.close()
+
+
+def test_import_skips_bad_rows_instead_of_aborting(tmp_path, monkeypatch):
+    users = tmp_path / "users.ndjson"
+    users.write_text(
+        "\n".join(
+            json.dumps(u)
+            for u in (
+                {"username": "first", "password": "x"},
+                {"username": "ADMIN", "password": "y"},
+                {"username": "First"},
+            )
+        ),
+        encoding="utf-8",
+    )
+    tickets = tmp_path / "tickets.csv"
+    with open(tickets, "w", encoding="utf-8", newline="") as f:
+        writer = init_db.csv.writer(f)
+        writer.writerow(["id", "title", "comments"])
+        writer.writerow(
+            [10, "With comments", json.dumps([{"text": "hola"}, {"text": None}])]
+        )
+        writer.writerow([11, "Broken comments", "hola"])
+        writer.writerow([12, "Later batch", ""])
+        writer.writerow([10, "Duplicate id", ""])
+    db = tmp_path / "import.db"
+    init_db.init_db(out_path=str(db), hash_workers=1)
+    # One row per transaction: the duplicates come after earlier batches have committed.
+    monkeypatch.setattr(init_db, "IMPORT_BATCH", 1)
+
+    conn = sqlite3.connect(db)
+    assert init_db.import_users(conn, users, workers=1) == 1
+    assert init_db.import_tickets(conn, tickets) == (2, 1, 2)
+    assert conn.execute("SELECT id, title FROM tickets ORDER BY id").fetchall() == [
+        (10, "With comments"),
+        (12, "Later batch"),
+    ]
+    assert conn.execute("SELECT ticket_id, text FROM comments").fetchall() == [
+        (10, "hola")
+    ]
+    assert conn.execute(
+        "SELECT COUNT(*) FROM users WHERE username = 'first'"
+    ).fetchone() == (1,)
+    conn.close()
+
+
+def test_import_skips_rows_referencing_unknown_users(tmp_path):
+    tickets = tmp_path / "tickets.ndjson"
+    tickets.write_text(
+        "\n".join(
+            json.dumps(t)
+            for t in (
+                {"id": 20, "title": "Known", "reporter_id": 1},
+                {"id": 21, "title": "Unknown reporter", "reporter_id": 99999},
+                {"id": 22, "title": "Unknown assignee", "assignee": "ghost"},
+                {
+                    "id": 23,
+                    "title": "Unknown author",
+                    "comments": [{"author_id": 99999, "text": "hola"}],
+                },
+                {"id": 24, "title": "After", "assignee": "ADMIN"},
+            )
+        ),
+        encoding="utf-8",
+    )
+    db = tmp_path / "import.db"
+    run_init("--out", str(db), "--import-tickets", str(tickets))
+
+    conn = sqlite3.connect(db)
+    assert conn.execute(
+        "SELECT id, reporter_id, assignee_id FROM tickets ORDER BY id"
+    ).fetchall() == [(20, 1, None), (24, None, 1)]
+    assert conn.execute("SELECT COUNT(*) FROM comments").fetchone() == (0,)
+    conn.close()
+
+
+def test_backfills_are_kept_when_a_later_step_fails(tmp_path):
+    db = tmp_path / "upgrade.db"
+    run_init("--out", str(db), "--seed")
+    conn = sqlite3.connect(db)
+    tickets = conn.execute("SELECT COUNT(*) FROM tickets").fetchone()[0]
+    # An older database: the derived tables do not exist yet.
+    conn.execute("DROP TABLE ticket_counts")
+    conn.execute("DROP TABLE change_log")
+    conn.execute("DROP TABLE tickets_fts")
+    conn.commit()
+    conn.close()
+
+    # --seed again fails on the existing usernames, after the backfills ran.
+    failed = subprocess.run(
+        [sys.executable, SCRIPT, "--out", str(db), "--seed"], capture_output=True
+    )
+    assert failed.returncode != 0
+
+    conn = sqlite3.connect(db)
+    assert conn.execute(
+        "SELECT SUM(count) FROM ticket_counts WHERE dimension = 'status'"
+    ).fetchone() == (tickets,)
+    assert conn.execute(
+        "SELECT COUNT(*) FROM change_log WHERE entity = 'ticket'"
+    ).fetchone() == (tickets,)
+    assert conn.execute("SELECT COUNT(*) FROM tickets_fts_docsize").fetchone() == (
+        tickets,
+    )
+    conn.execute("DELETE FROM ticket_counts")
+    conn.execute("DELETE FROM change_log")
+    conn.execute("INSERT INTO tickets_fts (tickets_fts) VALUES ('delete-all')")
+    conn.commit()
+    conn.close()
+
+    # Tables left empty by an earlier failure are filled on the next run.
+    run_init("--out", str(db))
+    conn = sqlite3.connect(db)
+    assert conn.execute("SELECT COUNT(*) FROM ticket_counts").fetchone()[0] > 0
+    assert conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0] > 0
+    assert conn.execute("SELECT COUNT(*) FROM tickets_fts_docsize").fetchone() == (
+        tickets,
+    )
+    conn.close()
+
+
+def test_rebuild_stats_counts_archived_tickets(tmp_path):
+    db = tmp_path / "helpdesk.db"
+    run_init("--out", str(db), "--seed")
+    archive = sqlite3.connect(tmp_path / "helpdesk-archive.db")
+    archive.execute(
+        "CREATE TABLE tickets (id INTEGER PRIMARY KEY, title TEXT, description TEXT, "
+        "priority TEXT, status TEXT, reporter_id INTEGER, assignee_id INTEGER, "
+        "created_at TEXT, updated_at TEXT, archived_at TEXT)"
+    )
+    # Ticket 1 was copied but not yet deleted from main: counted once.
+    archive.executemany(
+        "INSERT INTO tickets VALUES (?, 'Old', NULL, 'low', 'closed', 1, NULL, "
+        "'2020-01-01 10:00:00', '2020-01-02 10:00:00', '2020-04-01 00:00:00')",
+        [(1,), (500,)],
+    )
+    archive.commit()
+    archive.close()
+
+    run_init("--out", str(db), "--rebuild-stats")
+    conn = sqlite3.connect(db)
+    tickets = conn.execute("SELECT COUNT(*) FROM tickets").fetchone()[0]
+    assert conn.execute(
+        "SELECT SUM(count) FROM ticket_counts WHERE dimension = 'status'"
+    ).fetchone() == (tickets + 1,)
+    assert conn.execute(
+        "SELECT created, resolved FROM ticket_daily WHERE day = '2020-01-01'"
+    ).fetchone() == (1, 0)
+    conn.close()
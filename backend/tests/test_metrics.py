@@ -0,0 +1,46 @@
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+
+
+def test_metrics_expose_route_latency_status_and_sql_timing():
+    r = client.post("/auth/login", json={"username": "admin", "password": "admin123"})
+    headers = {"Authorization": f"Bearer {r.json()['token']}"}
+    client.get("/tickets", headers=headers)
+    client.get("/tickets/999999", headers=headers)
+
+    text = client.get("/metrics").text
+    assert "# TYPE helpdesk_http_request_duration_seconds histogram" in text
+    assert (
+        'helpdesk_http_request_duration_seconds_count{method="GET",route="/tickets"}'
+        in text
+    )
+    assert (
+        'helpdesk_http_responses_total{method="GET",route="/tickets/{ticket_id}",status="404"}'
+        in text
+    )
+    assert 'helpdesk_password_verify_seconds_count{scheme="bcrypt"}' in text
+    assert 'helpdesk_db_call_seconds_count{function="query_tickets"}' in text
+    assert "FROM tickets ORDER BY created_at DESC, id DESC" in text
+    assert "helpdesk_http_requests_in_flight 1" in text
+
+
+def test_histogram_buckets_are_cumulative_and_labels_escaped():
+    m = server_module.Metrics()
+    m.describe("h", "histogram", "test", (0.1, 1.0))
+    for v in (0.05, 0.5, 5):
+        m.observe("h", (("q", 'a"b'),), v)
+    lines = m.render().splitlines()
+    assert 'h_bucket{q="a\\"b",le="0.1"} 1' in lines
+    assert 'h_bucket{q="a\\"b",le="1.0"} 2' in lines
+    assert 'h_bucket{q="a\\"b",le="+Inf"} 3' in lines
+    assert m.value("h", (("q", 'a"b'),)) == (3, 5.55)
+
+
+def test_slow_statements_are_logged(caplog, monkeypatch):
+    monkeypatch.setattr(server_module, "SLOW_QUERY_MS", 0.000001)
+    with caplog.at_level("WARNING", logger="helpdesk.sql"):
+        server_module.record_sql("SELECT  1", 0.5)
+    assert "slow query (500.0 ms): SELECT 1" in caplog.text
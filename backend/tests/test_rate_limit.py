@@ -0,0 +1,101 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+
+def limited_app(spec, maxsize=100):
+    inner = FastAPI()
+
+    @inner.get("/tickets")
+    @inner.get("/tickets/{ticket_id}")
+    @inner.post("/auth/login")
+    def ok():
+        return {"ok": True}
+
+    limiter = server_module.RateLimiter(maxsize)
+    app = server_module.RateLimitMiddleware(
+        inner, server_module.parse_rate_limits(spec), limiter
+    )
+    return TestClient(app), limiter
+
+
+def test_buckets_per_client_and_route_with_retry_after():
+    client, limiter = limited_app("POST /auth/login=0.01:2,GET /tickets=0.5:3")
+    assert [client.post("/auth/login").status_code for _ in range(3)] == [200, 200, 429]
+    r = client.post("/auth/login")
+    assert r.status_code == 429 and r.json() == {"detail": "Too many requests"}
+    assert 1 <= int(r.headers["Retry-After"]) <= 100
+
+    # Another route group has its own budget.
+    assert [client.get("/tickets").status_code for _ in range(4)] == [
+        200,
+        200,
+        200,
+        429,
+    ]
+    assert client.get("/tickets").headers["Retry-After"] == "2"
+    # The list rule matches its path exactly: /tickets/{id} is not throttled by it.
+    assert [client.get("/tickets/7").status_code for _ in range(5)] == [200] * 5
+    assert client.get("/ticketsx").status_code == 404  # no rule matches: not limited
+
+    # A signed token is its own client; a forged one falls back to the IP.
+    token = server_module.create_token("agent1")
+    assert (
+        client.get("/tickets", headers={"Authorization": f"Bearer {token}"}).status_code
+        == 200
+    )
+    assert (
+        client.get("/tickets", headers={"Authorization": "Bearer forged"}).status_code
+        == 429
+    )
+    assert len(limiter) == 3
+
+
+def test_rule_paths_match_whole_segments():
+    rules = server_module.parse_rate_limits(
+        "GET /tickets/*/history=1,GET /tickets/*=2,POST /auth/login=3,*=4"
+    )
+    middleware = server_module.RateLimitMiddleware(
+        None, rules, server_module.RateLimiter(10)
+    )
+    matched = {
+        (method, path): middleware.match(method, path)[0]
+        for method, path in (
+            ("GET", "/tickets/7/history"),
+            ("GET", "/tickets/7"),
+            ("GET", "/tickets/7/attachments/3"),
+            ("GET", "/tickets"),
+            ("POST", "/auth/login"),
+            ("POST", "/auth/login/x"),
+        )
+    }
+    assert matched == {
+        ("GET", "/tickets/7/history"): "GET /tickets/*/history",
+        ("GET", "/tickets/7"): "GET /tickets/*",
+        ("GET", "/tickets/7/attachments/3"): "GET /tickets/*",
+        ("GET", "/tickets"): "*",
+        ("POST", "/auth/login"): "POST /auth/login",
+        ("POST", "/auth/login/x"): "*",
+    }
+
+
+def test_rules_that_could_never_serve_a_request_are_refused():
+    for spec in ("*=0", "GET /tickets=5:0.5", "*=-1:10", "*=fast", "/tickets"):
+        with pytest.raises(RuntimeError, match="HELPDESK_RATE_LIMITS"):
+            server_module.parse_rate_limits(spec)
+    assert server_module.parse_rate_limits("*=0.5:1")[0][3:] == (0.5, 1.0)
+
+
+def test_limiter_is_bounded_and_forgets_idle_buckets():
+    limiter = server_module.RateLimiter(maxsize=2)
+    assert limiter.acquire("a", 1, 2, now=0) == 0
+    assert limiter.acquire("a", 1, 2, now=0) == 0
+    assert limiter.acquire("a", 1, 2, now=0.5) == 0.5
+    limiter.acquire("b", 1, 2, now=0.5)
+    limiter.acquire("c", 1, 2, now=0.5)  # over maxsize: "a", least recently used, goes
+    assert len(limiter) == 2
+    # By t=10 "b" and "c" are full again, so touching "d" drops both.
+    limiter.acquire("d", 1, 2, now=10)
+    assert len(limiter) == 1
@@ -0,0 +1,67 @@
+import sqlite3
+
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+
+
+def test_reads_are_cached_until_any_write_bumps_the_generation(headers):
+    params = {"limit": 5, "fields": "id,title,status"}
+    first = client.get("/tickets", params=params, headers=headers)
+    second = client.get("/tickets", params=params, headers=headers)
+    assert (first.headers["X-Cache"], second.headers["X-Cache"]) == ("MISS", "HIT")
+    assert second.content == first.content
+    assert second.headers.get("X-Next-Cursor") == first.headers.get("X-Next-Cursor")
+
+    tid = client.post(
+        "/tickets", json={"title": "Cache buster", "priority": "low"}, headers=headers
+    ).json()["id"]
+    fresh = client.get("/tickets", params=params, headers=headers)
+    assert fresh.headers["X-Cache"] == "MISS"
+    assert fresh.json()[0]["id"] == tid
+
+    assert client.get(f"/tickets/{tid}", headers=headers).headers["X-Cache"] == "MISS"
+    assert client.get(f"/tickets/{tid}", headers=headers).headers["X-Cache"] == "HIT"
+    client.post(f"/tickets/{tid}/comments", json={"text": "nuevo"}, headers=headers)
+    detail = client.get(f"/tickets/{tid}", headers=headers)
+    assert detail.headers["X-Cache"] == "MISS"
+    assert [c["text"] for c in detail.json()["comments"]] == ["nuevo"]
+
+    # A write from another process (its own connection) invalidates as well.
+    other = sqlite3.connect(server_module.db_pool.path)
+    other.execute(
+        "UPDATE tickets SET title = 'Renamed elsewhere', updated_at = datetime('now') "
+        "WHERE id = ?",
+        (tid,),
+    )
+    other.commit()
+    other.close()
+    renamed = client.get(f"/tickets/{tid}", headers=headers)
+    assert renamed.headers["X-Cache"] == "MISS"
+    assert renamed.json()["title"] == "Renamed elsewhere"
+
+    client.delete(f"/tickets/{tid}", headers=headers)
+    assert client.get(f"/tickets/{tid}", headers=headers).status_code == 404
+    text = client.get("/metrics").text
+    assert 'helpdesk_response_cache{stat="hit_ratio"}' in text
+
+
+def test_response_cache_is_lru_bounded_by_entries_and_bytes():
+    cache = server_module.ResponseCache(maxsize=3, max_bytes=10)
+    cache.put(("a",), 1, b"aaaa", None)
+    cache.put(("b",), 1, b"bbbb", {"X-Next-Cursor": "c"})
+    assert cache.get(("a",), 1) == (b"aaaa", None)
+    cache.put(("c",), 1, b"cccc", None)  # 12 bytes: evicts "b", the least recently used
+    assert cache.get(("b",), 1) is None
+    assert cache.get(("a",), 1) is not None
+    assert cache.get(("c",), 2) is None  # generation moved on: stale entry dropped
+    cache.put(("big",), 1, b"x" * 11, None)  # larger than the whole budget: not cached
+    assert cache.get(("big",), 1) is None
+
+    stats = cache.stats()
+    assert stats["size"] == 1 and stats["bytes"] == 4
+    assert stats["evictions"] == 1
+    assert stats["hits"] == 2 and stats["misses"] == 3
+    assert stats["hit_ratio"] == 2 / 5
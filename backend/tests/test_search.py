@@ -0,0 +1,62 @@
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+
+
+def test_search_ranks_tickets_and_comments_and_tracks_changes(headers):
+    r = client.post(
+        "/tickets",
+        json={
+            "title": "Impresora atascada",
+            "description": "La impresora del piso 3",
+            "priority": "low",
+        },
+        headers=headers,
+    )
+    by_title = r.json()["id"]
+    r = client.post(
+        "/tickets", json={"title": "Otro problema", "priority": "low"}, headers=headers
+    )
+    by_comment = r.json()["id"]
+    client.post(
+        f"/tickets/{by_comment}/comments",
+        json={"text": "parece la impresora de red"},
+        headers=headers,
+    )
+
+    r = client.get("/tickets/search", params={"q": "impresora"}, headers=headers)
+    assert r.status_code == 200
+    results = r.json()
+    assert [t["id"] for t in results][:2] == [by_title, by_comment]
+    assert results[0]["matchedIn"] == "ticket"
+    assert results[1]["matchedIn"] == "comment"
+    assert "<mark>impresora</mark>" in results[1]["snippet"]
+
+    # prefix match on the last word and pagination
+    r = client.get(
+        "/tickets/search", params={"q": "impres", "limit": 1}, headers=headers
+    )
+    assert len(r.json()) == 1
+    assert r.headers["X-Next-Offset"] == "1"
+
+    # triggers keep the index in sync with updates and deletes
+    client.put(f"/tickets/{by_title}", json={"title": "Monitor roto"}, headers=headers)
+    client.delete(f"/tickets/{by_comment}", headers=headers)
+    r = client.get("/tickets/search", params={"q": "impresora"}, headers=headers)
+    assert [t["id"] for t in r.json()] == [by_title]
+    assert r.json()[0]["snippet"].startswith("La <mark>impresora</mark>")
+
+    client.delete(f"/tickets/{by_title}", headers=headers)
+    assert (
+        client.get("/tickets/search", params={"q": "impresora"}, headers=headers).json()
+        == []
+    )
+
+
+def test_search_rejects_empty_queries(headers):
+    assert (
+        client.get("/tickets/search", params={"q": "***"}, headers=headers).status_code
+        == 400
+    )
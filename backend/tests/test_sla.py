@@ -0,0 +1,89 @@
+import time
+
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+
+HOURS = {"urgent": 4, "high": 24, "normal": 72, "low": 168}
+
+
+def backdate(conn, ticket_id, hours):
+    conn.execute(
+        "UPDATE tickets SET created_at = datetime('now', ?) WHERE id = ?",
+        (f"-{hours} hours", ticket_id),
+    )
+    conn.commit()
+
+
+def test_overdue_tickets_are_escalated_once_with_a_comment(headers):
+    conn = server_module.get_db()
+    scheduler = server_module.SlaScheduler(HOURS)
+    # As after startup: the window is loaded, new changes arrive through change_log.
+    scheduler.loaded_until = int(time.time()) + scheduler.horizon
+    scheduler.last_seq = server_module.write_generation(conn)
+
+    late = client.post(
+        "/tickets", json={"title": "Late", "priority": "high"}, headers=headers
+    ).json()["id"]
+    backdate(conn, late, 30)
+    on_time = client.post(
+        "/tickets", json={"title": "On time", "priority": "high"}, headers=headers
+    ).json()["id"]
+    escalated, _ = scheduler.step(conn, time.time())
+    assert [t["id"] for t, _ in escalated] == [late]
+    detail = client.get(f"/tickets/{late}", headers=headers).json()
+    assert detail["priority"] == "urgent"
+    assert (
+        detail["comments"][-1]["text"]
+        == "SLA de 24 h vencido: prioridad high → urgent."
+    )
+
+    client.put(f"/tickets/{on_time}", json={"priority": "urgent"}, headers=headers)
+    backdate(conn, on_time, 5)
+    escalated, wait = scheduler.step(conn, time.time())
+    assert [t["id"] for t, _ in escalated] == [on_time]
+    assert escalated[0][1]["text"] == "SLA de 4 h vencido con prioridad urgent."
+    assert 0 < wait <= server_module.SLA_POLL_SECONDS
+
+    # Stale or duplicate heap entries (another worker, a restart) are re-checked in SQL.
+    scheduler._push(late, 0, "urgent")
+    assert scheduler.step(conn, time.time())[0] == []
+    for tid in (late, on_time):
+        client.delete(f"/tickets/{tid}", headers=headers)
+
+
+def test_first_run_leaves_tickets_overdue_before_the_backlog_window(headers):
+    conn = server_module.get_db()
+    ids = {}
+    for title, hours in (("Long overdue", 30), ("Just overdue", 24.5)):
+        ids[title] = client.post(
+            "/tickets", json={"title": title, "priority": "high"}, headers=headers
+        ).json()["id"]
+        backdate(conn, ids[title], hours)
+
+    # A fresh scheduler (first boot) only escalates the last hour's breaches.
+    escalated, _ = server_module.SlaScheduler(HOURS, backlog=3600).step(
+        conn, time.time()
+    )
+    escalated_ids = {t["id"] for t, _ in escalated}
+    assert ids["Just overdue"] in escalated_ids
+    assert ids["Long overdue"] not in escalated_ids
+
+    escalated, _ = server_module.SlaScheduler(HOURS, backlog=8 * 3600).step(
+        conn, time.time()
+    )
+    assert [t["id"] for t, _ in escalated] == [ids["Long overdue"]]
+    for tid in ids.values():
+        client.delete(f"/tickets/{tid}", headers=headers)
+
+
+def test_deadlines_are_read_through_the_status_priority_index():
+    conn = server_module.get_db()
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM tickets "
+        "WHERE status = 'open' AND priority = 'low' AND created_at > '' "
+        "AND created_at <= '2030-01-01'"
+    ).fetchall()
+    assert "idx_tickets_status_priority_created" in " ".join(row[-1] for row in plan)
@@ -0,0 +1,79 @@
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+
+
+def test_stats_track_writes_incrementally(headers):
+    before = client.get("/stats", headers=headers).json()
+
+    tid = client.post(
+        "/tickets", json={"title": "Stats", "priority": "urgent"}, headers=headers
+    ).json()["id"]
+    client.put(
+        f"/tickets/{tid}", json={"status": "closed", "assignee_id": 1}, headers=headers
+    )
+    after = client.get("/stats", headers=headers).json()
+
+    assert after["total"] == before["total"] + 1
+    assert after["byStatus"].get("closed", 0) == before["byStatus"].get("closed", 0) + 1
+    assert after["byPriority"]["urgent"] == before["byPriority"].get("urgent", 0) + 1
+    assert after["byAssignee"]["1"] == before["byAssignee"].get("1", 0) + 1
+    by_status = after["byStatus"]
+    still_open = by_status.get("open", 0) + by_status.get("in_progress", 0)
+    assert sum(after["openAge"].values()) == still_open
+    today = after["daily"][-1]
+    assert today["created"] >= 1 and today["resolved"] >= 1
+
+    client.delete(f"/tickets/{tid}", headers=headers)
+    assert (
+        client.get("/stats", headers=headers).json()["byStatus"] == before["byStatus"]
+    )
+
+
+def test_open_age_follows_status_and_created_at(headers):
+    conn = server_module.get_db()
+    before = client.get("/stats", headers=headers).json()["openAge"]
+
+    tid = client.post(
+        "/tickets", json={"title": "Aging", "priority": "low"}, headers=headers
+    ).json()["id"]
+    conn.execute(
+        "UPDATE tickets SET created_at = datetime('now', '-10 days') WHERE id = ?",
+        (tid,),
+    )
+    conn.commit()
+    aged = client.get("/stats", headers=headers).json()["openAge"]
+    assert aged == {**before, "7-30d": before["7-30d"] + 1}
+
+    client.put(f"/tickets/{tid}", json={"status": "resolved"}, headers=headers)
+    assert client.get("/stats", headers=headers).json()["openAge"] == before
+    client.put(f"/tickets/{tid}", json={"status": "in_progress"}, headers=headers)
+    assert client.get("/stats", headers=headers).json()["openAge"] == aged
+    client.delete(f"/tickets/{tid}", headers=headers)
+    assert client.get("/stats", headers=headers).json()["openAge"] == before
+    rows = conn.execute(
+        "SELECT day, count FROM ticket_open_days WHERE count != 0 ORDER BY day"
+    ).fetchall()
+    expected = conn.execute(
+        "SELECT date(created_at), COUNT(*) FROM tickets "
+        "WHERE status IN ('open', 'in_progress') GROUP BY 1 ORDER BY 1"
+    ).fetchall()
+    assert [tuple(r) for r in rows] == [tuple(r) for r in expected]
+
+
+def test_stats_etag_returns_304_until_something_changes(headers):
+    r = client.get("/stats", headers=headers)
+    etag = r.headers["ETag"]
+    r = client.get("/stats", headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 304
+    assert r.content == b""
+
+    tid = client.post(
+        "/tickets", json={"title": "Etag", "priority": "low"}, headers=headers
+    ).json()["id"]
+    r = client.get("/stats", headers={**headers, "If-None-Match": etag})
+    assert r.status_code == 200
+    assert r.headers["ETag"] != etag
+    client.delete(f"/tickets/{tid}", headers=headers)
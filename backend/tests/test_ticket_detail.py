@@ -0,0 +1,78 @@
+from fastapi.testclient import TestClient
+
+import backend.server as server_module
+
+client = TestClient(server_module.app)
+
+
+def test_ticket_detail_pages_comments_with_keyset_cursor(headers):
+    tid = client.post(
+        "/tickets", json={"title": "Long incident", "priority": "high"}, headers=headers
+    ).json()["id"]
+    posted = [
+        client.post(
+            f"/tickets/{tid}/comments", json={"text": f"update {i}"}, headers=headers
+        ).json()["id"]
+        for i in range(7)
+    ]
+
+    seen = []
+    cursor = None
+    while True:
+        params = {"comments_limit": 3}
+        if cursor:
+            params["comments_cursor"] = cursor
+        r = client.get(f"/tickets/{tid}", params=params, headers=headers)
+        assert r.status_code == 200
+        body = r.json()
+        assert body["id"] == tid and body["title"] == "Long incident"
+        assert body["commentCount"] == 7
+        assert len(body["comments"]) <= 3
+        seen += [c["id"] for c in body["comments"]]
+        cursor = body["nextCommentsCursor"]
+        if cursor is None:
+            break
+    assert seen == posted
+
+    only_ticket = client.get(
+        f"/tickets/{tid}", params={"comments_limit": 0}, headers=headers
+    ).json()
+    assert only_ticket["comments"] == [] and only_ticket["commentCount"] == 7
+
+    assert (
+        client.get(
+            f"/tickets/{tid}", params={"comments_cursor": "garbage"}, headers=headers
+        ).status_code
+        == 400
+    )
+    assert client.get("/tickets/999999", headers=headers).status_code == 404
+    client.delete(f"/tickets/{tid}", headers=headers)
+
+
+def test_update_with_return_minimal_sends_only_changed_fields(headers):
+    tid = client.post(
+        "/tickets", json={"title": "Flip me", "priority": "low"}, headers=headers
+    ).json()["id"]
+    client.post(f"/tickets/{tid}/comments", json={"text": "context"}, headers=headers)
+
+    r = client.put(
+        f"/tickets/{tid}",
+        json={"status": "in_progress"},
+        headers={**headers, "Prefer": "return=minimal"},
+    )
+    assert r.status_code == 200
+    assert set(r.json()) == {"id", "status", "updatedAt"}
+    assert r.json()["status"] == "in_progress"
+
+    full = client.put(
+        f"/tickets/{tid}", json={"priority": "high"}, headers=headers
+    ).json()
+    assert full["status"] == "in_progress" and len(full["comments"]) == 1
+
+    missing = client.put(
+        "/tickets/999999",
+        json={"status": "closed"},
+        headers={**headers, "Prefer": "return=minimal"},
+    )
+    assert missing.status_code == 404
+    client.delete(f"/tickets/{tid}", headers=headers)
@@ -6,15 +6,31 @@ Usage:
   python init_db.py --seed      # also loads and hashes users from seed.sql
   python init_db.py --reset     # deletes old DB first
   python init_db.py --out /path/to/db  # custom DB location
+  python init_db.py --rebuild-fts  # rebuilds the full-text search index
+  python init_db.py --rebuild-stats  # recomputes the dashboard counters
+  python init_db.py --synthetic --tickets 1000000 --comments-per-ticket 5 --users 500
+                                # bulk-generates realistic volumes for load tests
+  python init_db.py --import-users users.csv --import-tickets tickets.ndjson
+                                # loads CSV/NDJSON dumps from another system
+  python init_db.py --reset-admin-password  # restores admin / admin123
 """
 
-import sqlite3
-import os
 import argparse
-import bcrypt
+import csv
+import json
+import os
+import random
 import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
 from pathlib import Path
 
+import bcrypt
+
 # --- Paths ---
 HERE = Path(__file__).resolve().parent
 DEFAULT_DB = HERE / "helpdesk.db"
@@ -23,6 +39,27 @@ SEED = HERE / "seed.sql"
 
 DB_PATH = Path(os.getenv("HELPDESK_DB_PATH", DEFAULT_DB))
 
+# --- Synthetic data ---
+SYNTHETIC_PASSWORD = "synthetic123"
+SYNTHETIC_BATCH = 50_000
+SYNTHETIC_DAYS = 365
+WORDS = (
+    "impresora red correo vpn acceso usuario contraseña servidor lento error pantalla "
+    "teclado licencia factura reporte backup disco memoria actualizacion instalar "
+    "permiso carpeta compartida wifi telefono camara audio navegador certificado "
+    "sesion bloqueo sistema base datos aplicacion movil portal ventas dashboard"
+).split()
+PRIORITY_WEIGHTS = {"low": 30, "normal": 50, "high": 15, "urgent": 5}
+
+# --- Bulk loading ---
+ADMIN_USERNAME = "admin"
+ADMIN_PASSWORD = "admin123"
+HASH_WORKERS = os.cpu_count() or 1
+IMPORT_BATCH = 10_000
+ROLES = ("admin", "agent", "user")
+PRIORITIES = tuple(PRIORITY_WEIGHTS)
+STATUSES = ("open", "in_progress", "resolved", "closed")
+
 
 # --- Utils ---
 def hash_password(plain: str) -> str:
@@ -40,91 +77,756 @@ def run_sql_file(conn: sqlite3.Connection, path: Path):
     conn.executescript(sql)
 
 
-def hash_seed_users(conn: sqlite3.Connection, seed_path: Path):
+def is_bcrypt_hash(value) -> bool:
+    return isinstance(value, str) and value.startswith(("$2a$", "$2b$", "$2y$"))
+
+
+@contextmanager
+def hashing_pool(workers: int = HASH_WORKERS):
+    """Process pool for bcrypt (CPU bound, so processes rather than threads)."""
+    if workers <= 1:
+        yield None
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield pool
+
+
+def hash_passwords(passwords: list, pool: ProcessPoolExecutor | None = None) -> list:
+    """bcrypt-hash many passwords, fanned out over `pool` when one is given."""
+    if pool is None or len(passwords) < 4:
+        return [hash_password(p) for p in passwords]
+    return list(pool.map(hash_password, passwords, chunksize=8))
+
+
+def iter_sql_statements(lines):
+    """Yield the statements of a SQL script one at a time, reading it line by line.
+
+    Statements end at a `;` outside string literals; `--` comments are dropped.
+    """
+    buf = []
+    in_string = False
+    for line in lines:
+        start = 0
+        i = 0
+        while i < len(line):
+            ch = line[i]
+            if ch == "'":
+                in_string = not in_string  # '' escapes toggle twice
+            elif not in_string and ch == "-" and line.startswith("--", i):
+                buf.append(line[start:i] + "\n")
+                start = len(line)
+                break
+            elif not in_string and ch == ";":
+                buf.append(line[start:i])
+                statement = "".join(buf).strip()
+                if statement:
+                    yield statement
+                buf = []
+                start = i + 1
+            i += 1
+        buf.append(line[start:])
+    statement = "".join(buf).strip()
+    if statement:
+        yield statement
+
+
+SQL_TOKEN = re.compile(
+    r"\s*(?:'((?:[^']|'')*)'|(NULL)\b|(-?\d+(?:\.\d+)?)|([(),]))", re.IGNORECASE
+)
+USERS_INSERT = re.compile(
+    r"INSERT\s+INTO\s+users\s*\(([^)]*)\)\s*VALUES\s*(.*)$", re.IGNORECASE | re.DOTALL
+)
+
+
+def parse_sql_values(text: str) -> list:
+    """Parse `(...), (...)` literal tuples (strings, numbers, NULL) into tuples."""
+    rows, row, pos = [], None, 0
+    while pos < len(text.rstrip()):
+        m = SQL_TOKEN.match(text, pos)
+        if not m:
+            raise ValueError(f"Valor SQL no soportado: {text[pos:pos + 40]!r}")
+        pos = m.end()
+        string, null, number, punct = m.groups()
+        if punct == "(":
+            row = []
+        elif punct == ")":
+            rows.append(tuple(row))
+            row = None
+        elif punct == ",":
+            continue
+        elif string is not None:
+            row.append(string.replace("''", "'"))
+        elif null:
+            row.append(None)
+        else:
+            row.append(float(number) if "." in number else int(number))
+    return rows
+
+
+def insert_users(
+    conn: sqlite3.Connection, users: list, pool: ProcessPoolExecutor | None = None
+) -> int:
+    """Insert user dicts (username, full_name, role and password or password_hash).
+
+    Plaintext passwords are hashed in parallel; values that already are
+    bcrypt hashes are stored as they are.
     """
-    Detect and hash plaintext passwords from seed.sql before inserting them.
+    plain = [
+        i
+        for i, u in enumerate(users)
+        if not is_bcrypt_hash(u.get("password_hash") or u.get("password"))
+    ]
+    hashes = hash_passwords(
+        [
+            users[i].get("password") or users[i].get("password_hash") or ""
+            for i in plain
+        ],
+        pool,
+    )
+    for i, hashed in zip(plain, hashes):
+        users[i]["password_hash"] = hashed
+    conn.executemany(
+        "INSERT INTO users (username, full_name, password_hash, role) "
+        "VALUES (?, ?, ?, ?)",
+        [
+            (
+                u["username"],
+                u.get("full_name") or u["username"],
+                u.get("password_hash") or u["password"],
+                u.get("role") or "user",
+            )
+            for u in users
+        ],
+    )
+    return len(users)
+
+
+def hash_seed_users(
+    conn: sqlite3.Connection, seed_path: Path, workers: int = HASH_WORKERS
+):
+    """
+    Load seed.sql, hashing the plaintext passwords of its users before inserting them.
     Example line handled:
-      INSERT INTO users (username, full_name, password_hash, role) VALUES ('admin', 'Julian', 'changeme', 'admin');
+      INSERT INTO users (username, full_name, password_hash, role)
+        VALUES ('admin', 'Julian', 'changeme', 'admin');
+
+    The file is read statement by statement; user rows are collected, hashed
+    in parallel and inserted with one executemany, every other statement
+    (tickets, comments) runs as is, after the users it may reference.
     """
     if not seed_path.exists():
         print("⚠️  seed.sql no encontrado, omitiendo datos iniciales.")
         return
 
+    users = []
+    others = []
     with open(seed_path, "r", encoding="utf-8") as f:
-        content = f.read()
-
-    # Find all INSERT INTO users statements
-    pattern = r"INSERT INTO users\s*\([^)]*\)\s*VALUES\s*\(([^;]*)\);"
-    matches = re.findall(pattern, content, flags=re.IGNORECASE)
-
-    if not matches:
+        for statement in iter_sql_statements(f):
+            m = USERS_INSERT.match(statement)
+            if not m:
+                others.append(statement)
+                continue
+            columns = [c.strip() for c in m.group(1).split(",")]
+            for values in parse_sql_values(m.group(2)):
+                row = dict(zip(columns, values))
+                # seed.sql keeps plaintext passwords in the password_hash column.
+                row["password"] = row.pop("password_hash", None)
+                users.append(row)
+
+    if not users:
         print("ℹ️  No se encontraron usuarios en seed.sql.")
-        return
-
-    for match in matches:
-        # Split fields safely by comma (naive but fine for seed)
-        fields = [x.strip().strip("'\"") for x in match.split(",")]
-        if len(fields) < 4:
-            continue
-        username, full_name, password, role = fields[:4]
-        hashed = hash_password(password)
-        print(f"🔐 Usuario '{username}' -> password '{password}' hasheado.")
-        conn.execute(
-            "INSERT INTO users (username, full_name, password_hash, role) VALUES (?, ?, ?, ?)",
-            (username, full_name, hashed, role),
-        )
+    else:
+        with hashing_pool(min(workers, len(users))) as pool:
+            insert_users(conn, users, pool)
+        print(f"🔐 {len(users)} usuarios de seed.sql con contraseña hasheada.")
 
-    # Insert tickets/comments (everything else)
-    other_lines = []
-    in_block = False
-    for line in content.splitlines():
-        if "INSERT INTO users" in line or line.strip().startswith("--"):
-            continue
-        if "INSERT INTO tickets" in line or "INSERT INTO comments" in line:
-            in_block = True
-        if in_block:
-            other_lines.append(line)
-
-    other_sql = "\n".join(other_lines)
-    if other_sql.strip():
-        conn.executescript(other_sql)
+    for statement in others:
+        conn.execute(statement)
+    if others:
         print("🗃️  Tickets y comentarios cargados desde seed.sql")
 
 
-def ensure_admin_user(conn: sqlite3.Connection):
-    """Crea o actualiza el usuario admin con contraseña y rol por defecto."""
-    username = "admin"
-    default_password = "admin123"
-    default_role = "admin"
-
+def ensure_admin_user(conn: sqlite3.Connection, reset_password: bool = False):
+    """Crea el usuario admin si falta y asegura su rol.
 
+    The password is only rehashed when the admin is created or on an explicit
+    `reset_password`, so a plain re-run of init_db does no bcrypt work.
+    """
     cur = conn.cursor()
-    cur.execute("SELECT password_hash, role FROM users WHERE username = ?", (username,))
+    cur.execute("SELECT role FROM users WHERE username = ?", (ADMIN_USERNAME,))
     row = cur.fetchone()
 
     if not row:
-        hashed = hash_password(default_password)
+        hashed = hash_password(ADMIN_PASSWORD)
         cur.execute(
-            "INSERT INTO users (username, full_name, password_hash, role) VALUES (?, ?, ?, ?)",
-            (username, "Administrador del sistema", hashed, default_role),
+            "INSERT INTO users (username, full_name, password_hash, role) "
+            "VALUES (?, ?, ?, ?)",
+            (ADMIN_USERNAME, "Administrador del sistema", hashed, "admin"),
+        )
+        print(f"✅ Usuario '{ADMIN_USERNAME}' creado con contraseña '{ADMIN_PASSWORD}'")
+        return
+    if reset_password:
+        cur.execute(
+            "UPDATE users SET password_hash=? WHERE username=?",
+            (hash_password(ADMIN_PASSWORD), ADMIN_USERNAME),
+        )
+        print(f"🔄 Contraseña del admin restablecida a '{ADMIN_PASSWORD}'")
+    if row[0] != "admin":
+        cur.execute("UPDATE users SET role='admin' WHERE username=?", (ADMIN_USERNAME,))
+        print("🔧 Rol del admin actualizado a 'Administrador'")
+
+
+def iter_records(path: Path):
+    """Stream dicts from a .csv (header row) or .ndjson/.jsonl file."""
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if path.suffix.lower() == ".csv":
+            for row in csv.DictReader(f):
+                yield {k: (v if v != "" else None) for k, v in row.items()}
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def batched(records, size: int):
+    batch = []
+    for record in records:
+        batch.append(record)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def import_users(
+    conn: sqlite3.Connection, path: Path, workers: int = HASH_WORKERS
+) -> int:
+    """Import users (username, full_name, role, password or password_hash).
+
+    bcrypt hashes from the old system are kept; plaintext passwords are
+    hashed over the process pool. One transaction per IMPORT_BATCH rows.
+    Rows without a username, or repeating one already in the database or
+    earlier in the file, are skipped and reported.
+    """
+    total = 0
+    skipped = []
+    seen = set()
+    with hashing_pool(workers) as pool:
+        for batch in batched(iter_records(path), IMPORT_BATCH):
+            names = [u.get("username") for u in batch if u.get("username")]
+            taken = {
+                name.lower()
+                for (name,) in conn.execute(
+                    "SELECT username FROM users "
+                    "WHERE username IN (SELECT value FROM json_each(?))",
+                    (json.dumps(names),),
+                )
+            }
+            valid = []
+            for u in batch:
+                key = (u.get("username") or "").lower()
+                if not key or key in taken or key in seen:
+                    skipped.append(u.get("username"))
+                    continue
+                seen.add(key)
+                if u.get("role") not in ROLES:
+                    u["role"] = "user"
+                valid.append(u)
+            total += insert_users(conn, valid, pool)
+            conn.commit()
+    print(f"👥 {total} usuarios importados desde {path}")
+    if skipped:
+        print(
+            f"⚠️  {len(skipped)} usuarios omitidos por nombre vacío o repetido (p. ej. "
+            f"{skipped[:5]})"
         )
-        print("✅ Usuario 'admin' creado con contraseña 'admin123'")
+    return total
+
+
+def user_ref(record: dict, key: str, user_ids: dict):
+    """Resolve `<key>_id` or a `<key>` username to a user id (None if absent).
+
+    `user_ids` maps known ids and lowercased usernames to ids; a reference to
+    any other user raises ValueError so the row is skipped.
+    """
+    value = record.get(f"{key}_id")
+    if value is None:
+        value = record.get(key)
+        if not value:
+            return None
+        value = value.lower()
     else:
-        db_hash, db_role = row
-        try:
-            same_pass = bcrypt.checkpw(default_password.encode("utf-8"), db_hash.encode("utf-8"))
-        except Exception:
-            same_pass = False
-        if not same_pass:
-            new_hash = hash_password(default_password)
-            cur.execute("UPDATE users SET password_hash=? WHERE username=?", (new_hash, username))
-            print("🔄 Contraseña del admin restablecida a 'admin123'")
-        if db_role != default_role:
-            cur.execute("UPDATE users SET role=? WHERE username=?", (default_role, username))
-            print("🔧 Rol del admin actualizado a 'Administrador'")
-
-
-def init_db(seed: bool = False, reset: bool = False, out_path: str | None = None):
+        value = int(value)
+    if value not in user_ids:
+        raise ValueError(f"unknown {key}")
+    return user_ids[value]
+
+
+def record_comments(value) -> list:
+    """Comments of an imported ticket: a list, or a JSON array in a CSV cell."""
+    if value is None:
+        return []
+    if isinstance(value, str):
+        value = json.loads(value)
+    if not isinstance(value, list) or not all(isinstance(c, dict) for c in value):
+        raise ValueError("comments must be a list of objects")
+    return value
+
+
+def ticket_import_rows(record: dict, ticket_id: int, user_ids: dict) -> tuple:
+    """The tickets row and comments rows for one valid imported record."""
+    comments = [
+        (ticket_id, user_ref(c, "author", user_ids), c["text"], c.get("created_at"))
+        for c in record_comments(record.get("comments"))
+        if (c.get("text") or "").strip()
+    ]
+    ticket = (
+        ticket_id,
+        record["title"],
+        record.get("description"),
+        record.get("priority") or "normal",
+        record.get("status") or "open",
+        user_ref(record, "reporter", user_ids),
+        user_ref(record, "assignee", user_ids),
+        record.get("created_at"),
+        record.get("updated_at") or record.get("created_at"),
+    )
+    return ticket, comments
+
+
+def import_tickets(conn: sqlite3.Connection, path: Path) -> tuple:
+    """Import tickets, and their comments (`"comments": [...]`, a JSON array in CSV).
+
+    Users may be referenced by id (`reporter_id`) or username (`reporter`).
+    Ticket ids are preserved when present. Rows with an unknown priority or
+    status, without a title, with malformed comments, with an id already
+    taken or referencing a user that does not exist (reporter, assignee or
+    comment author) are skipped and counted, so one bad row never aborts the
+    load.
+    Triggers are off for the load (see bulk_load). Returns
+    `(tickets, comments, skipped)`.
+    """
+    user_ids = {}
+    for uid, name in conn.execute("SELECT id, username FROM users"):
+        user_ids[uid] = user_ids[name.lower()] = uid
+    next_id = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM tickets").fetchone()[0]
+    tickets = comments = 0
+    skipped = []
+    seen = set()
+    with bulk_load(conn):
+        for batch in batched(iter_records(path), IMPORT_BATCH):
+            ids = [r["id"] for r in batch if r.get("id") is not None]
+            taken = {
+                row[0]
+                for row in conn.execute(
+                    "SELECT id FROM tickets "
+                    "WHERE id IN (SELECT value FROM json_each(?))",
+                    (json.dumps(ids),),
+                )
+            }
+            ticket_rows, comment_rows = [], []
+            for record in batch:
+                try:
+                    if (
+                        not record.get("title")
+                        or (record.get("priority") or "normal") not in PRIORITIES
+                    ):
+                        raise ValueError("invalid title or priority")
+                    if (record.get("status") or "open") not in STATUSES:
+                        raise ValueError("invalid status")
+                    ticket_id = (
+                        int(record["id"]) if record.get("id") is not None else next_id
+                    )
+                    if ticket_id in taken or ticket_id in seen:
+                        raise ValueError("duplicate id")
+                    ticket, ticket_comments = ticket_import_rows(
+                        record, ticket_id, user_ids
+                    )
+                except (ValueError, TypeError, KeyError):
+                    skipped.append(record.get("id") or record.get("title"))
+                    continue
+                seen.add(ticket_id)
+                next_id = max(next_id, ticket_id + 1)
+                ticket_rows.append(ticket)
+                comment_rows.extend(ticket_comments)
+            conn.executemany(
+                "INSERT INTO tickets (id, title, description, priority, status, "
+                "reporter_id, assignee_id, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, datetime('now')), "
+                "COALESCE(?, datetime('now')))",
+                ticket_rows,
+            )
+            conn.executemany(
+                "INSERT INTO comments (ticket_id, author_id, text, created_at) "
+                "VALUES (?, ?, ?, COALESCE(?, datetime('now')))",
+                comment_rows,
+            )
+            conn.commit()
+            tickets += len(ticket_rows)
+            comments += len(comment_rows)
+    print(f"🎫 {tickets} tickets y {comments} comentarios importados desde {path}")
+    if skipped:
+        print(
+            f"⚠️  {len(skipped)} tickets omitidos por datos inválidos (p. ej. "
+            f"{skipped[:5]})"
+        )
+    return tickets, comments, len(skipped)
+
+
+def rebuild_search_index(conn: sqlite3.Connection):
+    """Rebuild the FTS5 indexes from the tickets and comments tables."""
+    conn.execute("INSERT INTO tickets_fts (tickets_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO comments_fts (comments_fts) VALUES ('rebuild')")
+    conn.execute("INSERT INTO tickets_fts (tickets_fts) VALUES ('optimize')")
+    conn.execute("INSERT INTO comments_fts (comments_fts) VALUES ('optimize')")
+    print("🔎 Índice de búsqueda (FTS5) reconstruido")
+
+
+def archive_path(conn: sqlite3.Connection) -> Path | None:
+    """The backend's archive database for `conn`'s file, if it exists.
+
+    Same rule as the backend: HELPDESK_ARCHIVE_PATH, else `<db>-archive.db`.
+    """
+    main = next(r[2] for r in conn.execute("PRAGMA database_list") if r[1] == "main")
+    if os.getenv("HELPDESK_ARCHIVE_PATH"):
+        path = Path(os.getenv("HELPDESK_ARCHIVE_PATH"))
+    elif main:
+        path = Path(main)
+        path = path.with_name(f"{path.stem}-archive{path.suffix or '.db'}")
+    else:
+        return None
+    return path if path.exists() else None
+
+
+# Archived tickets keep counting in /stats; rows copied to the archive but not
+# yet deleted from main are counted once.
+STATS_TICKETS_WITH_ARCHIVE = (
+    "(SELECT status, priority, assignee_id, created_at, updated_at FROM main.tickets "
+    "UNION ALL "
+    "SELECT status, priority, assignee_id, created_at, updated_at "
+    "FROM archive.tickets a "
+    "WHERE NOT EXISTS (SELECT 1 FROM main.tickets t WHERE t.id = a.id))"
+)
+
+
+def rebuild_ticket_stats(conn: sqlite3.Connection):
+    """Recompute the trigger-maintained dashboard counters from scratch.
+
+    Tickets in the archive database (see archive_path) are included, as the
+    archiver leaves them in the counters. Must run outside a transaction so
+    the archive can be attached.
+    """
+    archive = archive_path(conn)
+    if archive:
+        conn.execute("ATTACH DATABASE ? AS archive", (str(archive),))
+    tickets = STATS_TICKETS_WITH_ARCHIVE if archive else "tickets"
+    try:
+        conn.execute("DELETE FROM ticket_counts")
+        for dimension, column in (
+            ("status", "status"),
+            ("priority", "priority"),
+            ("assignee", "COALESCE(assignee_id, 'unassigned')"),
+        ):
+            conn.execute(
+                f"INSERT INTO ticket_counts (dimension, value, count) "
+                f"SELECT '{dimension}', {column}, COUNT(*) FROM {tickets} "
+                f"GROUP BY {column}"
+            )
+        conn.execute("DELETE FROM ticket_daily")
+        # Resolution dates are not stored; updated_at of resolved/closed tickets
+        # is the best available approximation.
+        conn.execute(
+            "INSERT INTO ticket_daily (day, created, resolved) "
+            "SELECT day, SUM(created), SUM(resolved) FROM ("
+            "  SELECT date(created_at) AS day, 1 AS created, 0 AS resolved "
+            f"  FROM {tickets}"
+            "  UNION ALL"
+            f"  SELECT date(updated_at), 0, 1 FROM {tickets} "
+            "WHERE status IN ('resolved', 'closed')"
+            ") GROUP BY day"
+        )
+        conn.execute("DELETE FROM ticket_open_days")
+        conn.execute(
+            "INSERT INTO ticket_open_days (day, count) "
+            f"SELECT date(created_at), COUNT(*) FROM {tickets} "
+            "WHERE status IN ('open', 'in_progress') GROUP BY 1"
+        )
+        conn.execute("UPDATE stats_version SET version = version + 1 WHERE id = 1")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    finally:
+        if archive:
+            conn.execute("DETACH DATABASE archive")
+    print("📊 Estadísticas del dashboard recalculadas")
+
+
+def seed_change_log(conn: sqlite3.Connection):
+    """Give every existing ticket and comment an initial change sequence."""
+    conn.execute(
+        "INSERT OR IGNORE INTO change_log (entity, entity_id, ticket_id, seq, deleted) "
+        "SELECT 'ticket', id, id, "
+        "  (SELECT COALESCE(MAX(seq), 0) FROM change_log) "
+        "  + ROW_NUMBER() OVER (ORDER BY id), 0 "
+        "FROM tickets"
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO change_log (entity, entity_id, ticket_id, seq, deleted) "
+        "SELECT 'comment', id, ticket_id, "
+        "  (SELECT COALESCE(MAX(seq), 0) FROM change_log) "
+        "  + ROW_NUMBER() OVER (ORDER BY id), 0 "
+        "FROM comments"
+    )
+
+
+@contextmanager
+def bulk_load(conn: sqlite3.Connection):
+    """Drop the triggers for the duration of a bulk insert and rebuild after.
+
+    The search, stats and change-log triggers would otherwise run per row;
+    recreating them from schema.sql and rebuilding the tables they maintain
+    once is far cheaper. Only inserts are safe inside the block.
+    """
+    conn.commit()
+    conn.execute("PRAGMA synchronous = OFF")
+    conn.execute("PRAGMA cache_size = -262144")
+    for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+    ).fetchall():
+        conn.execute(f"DROP TRIGGER {name}")
+    try:
+        yield
+    finally:
+        conn.commit()
+        run_sql_file(conn, SCHEMA)
+        rebuild_ticket_stats(conn)
+        rebuild_search_index(conn)
+        seed_change_log(conn)
+        conn.commit()
+        conn.execute("ANALYZE")
+        conn.execute("PRAGMA synchronous = FULL")
+
+
+def zipf_weights(n: int, s: float = 1.1) -> list:
+    """Cumulative Zipf weights (for random.choices(cum_weights=...))."""
+    return list(accumulate(1 / (rank + 1) ** s for rank in range(n)))
+
+
+def synthetic_text(rng: random.Random, words: int, word_weights: list) -> str:
+    return " ".join(rng.choices(WORDS, cum_weights=word_weights, k=words))
+
+
+def synthetic_status(rng: random.Random, age_days: float) -> str:
+    """Older tickets are mostly resolved or closed; recent ones still open."""
+    done = min(0.97, age_days / 30)
+    if rng.random() < done:
+        return "closed" if rng.random() < 0.7 else "resolved"
+    return "open" if rng.random() < 0.6 else "in_progress"
+
+
+def generate_synthetic(
+    conn: sqlite3.Connection,
+    tickets: int,
+    comments_per_ticket: float = 5,
+    users: int = 500,
+    days: int = SYNTHETIC_DAYS,
+    batch: int = SYNTHETIC_BATCH,
+    seed: int = 42,
+):
+    """Bulk-insert synthetic users, tickets and comments with a realistic skew.
+
+    - Roles: ~10% agents, a few admins, the rest end users.
+    - Reporters and assignees follow a Zipf distribution (a handful of agents
+      carry most of the queue), ~15% of open tickets are unassigned.
+    - Volume grows over the last `days` days; old tickets are mostly closed.
+    - Comments per ticket are exponentially distributed around the mean.
+
+    Rows go in through executemany, `batch` tickets (and their comments) per
+    transaction, inside `bulk_load`. All synthetic users share the password
+    SYNTHETIC_PASSWORD (hashed once).
+    """
+    started = time.perf_counter()
+    with bulk_load(conn):
+        comments = insert_synthetic_rows(
+            conn, tickets, comments_per_ticket, users, days, batch, seed, started
+        )
+    print(
+        f"🧪 Datos sintéticos: {users} usuarios, {tickets} tickets, "
+        f"{comments} comentarios en {time.perf_counter() - started:.1f}s "
+        f"(contraseña '{SYNTHETIC_PASSWORD}')"
+    )
+
+
+def insert_synthetic_rows(
+    conn, tickets, comments_per_ticket, users, days, batch, seed, started
+) -> int:
+    """Body of generate_synthetic; returns the number of comments inserted."""
+    rng = random.Random(seed)
+    word_weights = zipf_weights(len(WORDS))
+
+    # Users
+    first_user = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM users").fetchone()[
+        0
+    ]
+    shared_hash = hash_password(SYNTHETIC_PASSWORD)
+    user_rows = []
+    for i in range(users):
+        roll = rng.random()
+        role = "admin" if roll < 0.02 else "agent" if roll < 0.12 else "user"
+        user_rows.append(
+            (
+                first_user + i,
+                f"synth{first_user + i}",
+                f"Usuario Sintético {first_user + i}",
+                shared_hash,
+                role,
+            )
+        )
+    conn.executemany(
+        "INSERT INTO users (id, username, full_name, password_hash, role) "
+        "VALUES (?, ?, ?, ?, ?)",
+        user_rows,
+    )
+    conn.commit()
+    all_users = [r[0] for r in conn.execute("SELECT id FROM users ORDER BY id")]
+    agents = [
+        r[0]
+        for r in conn.execute(
+            "SELECT id FROM users WHERE role IN ('agent', 'admin') ORDER BY id"
+        )
+    ]
+    rng.shuffle(all_users)
+    rng.shuffle(agents)
+    reporter_weights = zipf_weights(len(all_users), 0.8)
+    agent_weights = zipf_weights(len(agents), 1.2)
+    priorities, priority_weights = list(PRIORITY_WEIGHTS), list(
+        accumulate(PRIORITY_WEIGHTS.values())
+    )
+
+    now = datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    span = days * 86400
+    first_ticket = conn.execute(
+        "SELECT COALESCE(MAX(id), 0) + 1 FROM tickets"
+    ).fetchone()[0]
+    comment_id = first_comment = conn.execute(
+        "SELECT COALESCE(MAX(id), 0) + 1 FROM comments"
+    ).fetchone()[0]
+    fmt = "%Y-%m-%d %H:%M:%S"
+
+    for start in range(0, tickets, batch):
+        ticket_rows, comment_rows = [], []
+        for i in range(start, min(start + batch, tickets)):
+            ticket_id = first_ticket + i
+            # Created times increase with the id; fraction**0.7 packs more tickets
+            # into recent months.
+            offset = span * (1 - ((i + rng.random()) / tickets) ** 0.7)
+            created = now - timedelta(seconds=offset)
+            status = synthetic_status(rng, offset / 86400)
+            if status in ("resolved", "closed"):
+                updated = min(
+                    now, created + timedelta(seconds=rng.expovariate(1 / 172800))
+                )
+            else:
+                updated = created + timedelta(seconds=rng.random() * min(offset, 86400))
+            reporter = rng.choices(all_users, cum_weights=reporter_weights)[0]
+            assignee = None
+            if status != "open" or rng.random() >= 0.15:
+                assignee = rng.choices(agents, cum_weights=agent_weights)[0]
+            ticket_rows.append(
+                (
+                    ticket_id,
+                    f"{synthetic_text(rng, 3, word_weights).capitalize()} "
+                    f"({ticket_id})",
+                    synthetic_text(rng, rng.randint(8, 40), word_weights),
+                    rng.choices(priorities, cum_weights=priority_weights)[0],
+                    status,
+                    reporter,
+                    assignee,
+                    created.strftime(fmt),
+                    updated.strftime(fmt),
+                )
+            )
+            window = max(1.0, (updated - created).total_seconds())
+            count = (
+                round(rng.expovariate(1 / comments_per_ticket))
+                if comments_per_ticket > 0
+                else 0
+            )
+            for _ in range(count):
+                comment_rows.append(
+                    (
+                        comment_id,
+                        ticket_id,
+                        assignee if assignee and rng.random() < 0.5 else reporter,
+                        synthetic_text(rng, rng.randint(4, 25), word_weights),
+                        (created + timedelta(seconds=rng.random() * window)).strftime(
+                            fmt
+                        ),
+                    )
+                )
+                comment_id += 1
+        conn.executemany(
+            "INSERT INTO tickets (id, title, description, priority, status, "
+            "reporter_id, assignee_id, created_at, updated_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            ticket_rows,
+        )
+        conn.executemany(
+            "INSERT INTO comments (id, ticket_id, author_id, text, created_at) "
+            "VALUES (?, ?, ?, ?, ?)",
+            comment_rows,
+        )
+        conn.commit()
+        print(
+            f"  … {start + len(ticket_rows)}/{tickets} tickets "
+            f"({time.perf_counter() - started:.0f}s)"
+        )
+
+    return comment_id - first_comment
+
+
+def load_bulk_data(
+    conn: sqlite3.Connection,
+    users_path: str | None,
+    tickets_path: str | None,
+    synthetic: dict | None,
+    hash_workers: int,
+):
+    """Load the --import-users / --import-tickets dumps, then synthetic data."""
+    if users_path:
+        import_users(conn, Path(users_path), hash_workers)
+    if tickets_path:
+        import_tickets(conn, Path(tickets_path))
+    if synthetic:
+        generate_synthetic(conn, **synthetic)
+
+
+def needs_backfill(conn: sqlite3.Connection, table: str, source: str) -> bool:
+    """Whether `table` is empty while `source` has rows, i.e. it was never filled.
+
+    Checking the data rather than whether the table existed before the schema
+    ran means a backfill lost to a later failure is retried on the next run.
+    """
+    return conn.execute(
+        f"SELECT EXISTS (SELECT 1 FROM {source}) "
+        f"AND NOT EXISTS (SELECT 1 FROM {table})"
+    ).fetchone()[0]
+
+
+def init_db(
+    seed: bool = False,
+    reset: bool = False,
+    out_path: str | None = None,
+    rebuild_fts: bool = False,
+    rebuild_stats: bool = False,
+    synthetic: dict | None = None,
+    import_users_path: str | None = None,
+    import_tickets_path: str | None = None,
+    reset_admin_password: bool = False,
+    hash_workers: int = HASH_WORKERS,
+):
     """Initialize the helpdesk database from schema and optional seed data."""
     target = Path(out_path) if out_path else DB_PATH
     os.makedirs(target.parent, exist_ok=True)
@@ -132,6 +834,10 @@ def init_db(seed: bool = False, reset: bool = False, out_path: str | None = None
     if reset and target.exists():
         target.unlink()
         print(f"🗑️  Eliminada base existente: {target}")
+    if reset:
+        # The backend opens the DB in WAL mode; drop its side files as well.
+        for suffix in ("-wal", "-shm"):
+            Path(f"{target}{suffix}").unlink(missing_ok=True)
 
     conn = sqlite3.connect(target)
     conn.execute("PRAGMA foreign_keys = ON;")
@@ -140,14 +846,42 @@ def init_db(seed: bool = False, reset: bool = False, out_path: str | None = None
     run_sql_file(conn, SCHEMA)
     print(f"✅ Esquema base cargado en {target}")
 
+    # Derived tables are filled once, the first run that finds them empty. The
+    # FTS tables read through to their content, so check their docsize tables.
+    if (
+        rebuild_fts
+        or needs_backfill(conn, "tickets_fts_docsize", "tickets")
+        or needs_backfill(conn, "comments_fts_docsize", "comments")
+    ):
+        rebuild_search_index(conn)
+        conn.commit()
+    if (
+        rebuild_stats
+        or needs_backfill(conn, "ticket_counts", "tickets")
+        or needs_backfill(
+            conn,
+            "ticket_open_days",
+            "tickets WHERE status IN ('open', 'in_progress')",
+        )
+    ):
+        rebuild_ticket_stats(conn)
+        conn.commit()
+    if needs_backfill(conn, "change_log", "tickets"):
+        seed_change_log(conn)
+        conn.commit()
+
     # Load and hash seed
     if seed:
-        hash_seed_users(conn, SEED)
+        hash_seed_users(conn, SEED, hash_workers)
     else:
         print("ℹ️  Seed omitido (usar --seed para cargar datos iniciales)")
 
     # Ensure admin user
-    ensure_admin_user(conn)
+    ensure_admin_user(conn, reset_password=reset_admin_password)
+
+    load_bulk_data(
+        conn, import_users_path, import_tickets_path, synthetic, hash_workers
+    )
 
     conn.commit()
     conn.close()
@@ -156,10 +890,93 @@ def init_db(seed: bool = False, reset: bool = False, out_path: str | None = None
 
 # --- CLI ---
 if __name__ == "__main__":
-    parser = argparse.ArgumentParser(description="Inicializa la base de datos del Helpdesk.")
-    parser.add_argument("--seed", action="store_true", help="Cargar seed.sql y hashear usuarios automáticamente")
-    parser.add_argument("--reset", action="store_true", help="Eliminar base existente antes de crearla")
-    parser.add_argument("--out", type=str, default=None, help="Ruta personalizada del archivo .db")
+    parser = argparse.ArgumentParser(
+        description="Inicializa la base de datos del Helpdesk."
+    )
+    parser.add_argument(
+        "--seed",
+        action="store_true",
+        help="Cargar seed.sql y hashear usuarios automáticamente",
+    )
+    parser.add_argument(
+        "--reset", action="store_true", help="Eliminar base existente antes de crearla"
+    )
+    parser.add_argument(
+        "--out", type=str, default=None, help="Ruta personalizada del archivo .db"
+    )
+    parser.add_argument(
+        "--rebuild-fts",
+        action="store_true",
+        help="Reconstruir el índice de búsqueda FTS5",
+    )
+    parser.add_argument(
+        "--rebuild-stats",
+        action="store_true",
+        help="Recalcular las estadísticas del dashboard",
+    )
+    parser.add_argument(
+        "--import-users", default=None, help="Importar usuarios desde un .csv o .ndjson"
+    )
+    parser.add_argument(
+        "--import-tickets",
+        default=None,
+        help="Importar tickets (y comentarios) desde un .csv o .ndjson",
+    )
+    parser.add_argument(
+        "--reset-admin-password",
+        action="store_true",
+        help="Restablecer la contraseña del admin",
+    )
+    parser.add_argument(
+        "--hash-workers", type=int, default=HASH_WORKERS, help="Procesos para bcrypt"
+    )
+    parser.add_argument(
+        "--synthetic", action="store_true", help="Generar datos sintéticos masivos"
+    )
+    parser.add_argument(
+        "--tickets",
+        type=int,
+        default=100_000,
+        help="Tickets sintéticos (con --synthetic)",
+    )
+    parser.add_argument(
+        "--comments-per-ticket",
+        type=float,
+        default=5,
+        help="Media de comentarios por ticket",
+    )
+    parser.add_argument("--users", type=int, default=500, help="Usuarios sintéticos")
+    parser.add_argument(
+        "--days", type=int, default=SYNTHETIC_DAYS, help="Días de historia a repartir"
+    )
+    parser.add_argument(
+        "--batch", type=int, default=SYNTHETIC_BATCH, help="Tickets por transacción"
+    )
+    parser.add_argument(
+        "--random-seed", type=int, default=42, help="Semilla del generador"
+    )
     args = parser.parse_args()
 
-    init_db(seed=args.seed, reset=args.reset, out_path=args.out)
+    synthetic = None
+    if args.synthetic:
+        synthetic = {
+            "tickets": args.tickets,
+            "comments_per_ticket": args.comments_per_ticket,
+            "users": args.users,
+            "days": args.days,
+            "batch": args.batch,
+            "seed": args.random_seed,
+        }
+
+    init_db(
+        seed=args.seed,
+        reset=args.reset,
+        out_path=args.out,
+        rebuild_fts=args.rebuild_fts,
+        rebuild_stats=args.rebuild_stats,
+        synthetic=synthetic,
+        import_users_path=args.import_users,
+        import_tickets_path=args.import_tickets,
+        reset_admin_password=args.reset_admin_password,
+        hash_workers=args.hash_workers,
+    )
@@ -48,16 +48,57 @@ CREATE TABLE IF NOT EXISTS comments (
 );
 
 -- ============================================================================
--- OPTIONAL: ATTACHMENTS TABLE (for future expansion)
+-- ATTACHMENTS TABLE
+-- Files live in a content-addressed store (file_path is relative to the
+-- backend's attachments directory and derived from sha256), so identical
+-- uploads share one file on disk.
 -- ============================================================================
--- CREATE TABLE IF NOT EXISTS attachments (
---   id INTEGER PRIMARY KEY AUTOINCREMENT,
---   ticket_id INTEGER NOT NULL,
---   file_name TEXT NOT NULL,
---   file_path TEXT NOT NULL,
---   uploaded_at TEXT NOT NULL DEFAULT (datetime('now')),
---   FOREIGN KEY (ticket_id) REFERENCES tickets(id) ON DELETE CASCADE
--- );
+CREATE TABLE IF NOT EXISTS attachments (
+  id INTEGER PRIMARY KEY AUTOINCREMENT,
+  ticket_id INTEGER NOT NULL,
+  file_name TEXT NOT NULL,
+  file_path TEXT NOT NULL,
+  sha256 TEXT NOT NULL,
+  size INTEGER NOT NULL,
+  content_type TEXT NOT NULL DEFAULT 'application/octet-stream',
+  uploader_id INTEGER,
+  uploaded_at TEXT NOT NULL DEFAULT (datetime('now')),
+  FOREIGN KEY (ticket_id) REFERENCES tickets(id) ON DELETE CASCADE,
+  FOREIGN KEY (uploader_id) REFERENCES users(id) ON DELETE SET NULL
+);
+
+-- ============================================================================
+-- SLA ESCALATIONS
+-- Tickets the backend escalated for breaching their SLA (one row each, so a
+-- ticket is escalated only once). Dropped with the ticket.
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS sla_escalations (
+  ticket_id INTEGER PRIMARY KEY,
+  from_priority TEXT NOT NULL,
+  to_priority TEXT NOT NULL,
+  escalated_at TEXT NOT NULL DEFAULT (datetime('now')),
+  FOREIGN KEY (ticket_id) REFERENCES tickets(id) ON DELETE CASCADE
+);
+
+-- ============================================================================
+-- TICKET HISTORY
+-- Append-only: one row per creation, change or deletion of a ticket, written
+-- by the backend in the same transaction. `changes` holds only the fields
+-- that changed (JSON); every few versions `snapshot` holds the whole ticket,
+-- so rebuilding a past state replays a handful of rows. Clustered on
+-- (ticket_id, version): an append writes a single B-tree and a ticket's
+-- history is contiguous. No foreign key: the history outlives the ticket.
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS ticket_events (
+  ticket_id INTEGER NOT NULL,
+  version INTEGER NOT NULL,
+  kind TEXT NOT NULL CHECK(kind IN ('snapshot', 'created', 'updated', 'deleted')),
+  actor_id INTEGER,
+  changes TEXT NOT NULL,
+  snapshot TEXT,
+  created_at TEXT NOT NULL,
+  PRIMARY KEY (ticket_id, version)
+) WITHOUT ROWID;
 
 -- ============================================================================
 -- INDEXES
@@ -66,16 +107,291 @@ CREATE INDEX IF NOT EXISTS idx_tickets_reporter ON tickets(reporter_id);
 CREATE INDEX IF NOT EXISTS idx_tickets_assignee ON tickets(assignee_id);
 CREATE INDEX IF NOT EXISTS idx_tickets_status ON tickets(status);
 CREATE INDEX IF NOT EXISTS idx_comments_ticket ON comments(ticket_id);
+CREATE INDEX IF NOT EXISTS idx_attachments_ticket ON attachments(ticket_id);
+CREATE INDEX IF NOT EXISTS idx_attachments_sha256 ON attachments(sha256);
+-- Covers the batched comment loader: comments grouped by ticket, oldest first
+CREATE INDEX IF NOT EXISTS idx_comments_ticket_created ON comments(ticket_id, created_at);
 CREATE INDEX IF NOT EXISTS idx_users_role ON users(role);
+-- Keyset pagination of GET /tickets on (created_at, id), alone or filtered
+CREATE INDEX IF NOT EXISTS idx_tickets_created ON tickets(created_at);
+CREATE INDEX IF NOT EXISTS idx_tickets_status_created ON tickets(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_tickets_assignee_created ON tickets(assignee_id, created_at);
+-- SLA deadlines: open tickets of one status and priority, oldest first
+CREATE INDEX IF NOT EXISTS idx_tickets_status_priority_created ON tickets(status, priority, created_at);
+
+-- ============================================================================
+-- FULL-TEXT SEARCH (FTS5)
+-- External-content indexes over tickets and comments, kept in sync by the
+-- triggers below. Rebuild them with: python init_db.py --rebuild-fts
+-- ============================================================================
+CREATE VIRTUAL TABLE IF NOT EXISTS tickets_fts USING fts5(
+  title,
+  description,
+  content = 'tickets',
+  content_rowid = 'id',
+  tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS comments_fts USING fts5(
+  text,
+  content = 'comments',
+  content_rowid = 'id',
+  tokenize = 'unicode61 remove_diacritics 2'
+);
+
+CREATE TRIGGER IF NOT EXISTS trg_tickets_fts_insert
+AFTER INSERT ON tickets
+FOR EACH ROW
+BEGIN
+  INSERT INTO tickets_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tickets_fts_delete
+AFTER DELETE ON tickets
+FOR EACH ROW
+BEGIN
+  INSERT INTO tickets_fts (tickets_fts, rowid, title, description)
+  VALUES ('delete', OLD.id, OLD.title, OLD.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_tickets_fts_update
+AFTER UPDATE OF title, description ON tickets
+FOR EACH ROW
+BEGIN
+  INSERT INTO tickets_fts (tickets_fts, rowid, title, description)
+  VALUES ('delete', OLD.id, OLD.title, OLD.description);
+  INSERT INTO tickets_fts (rowid, title, description) VALUES (NEW.id, NEW.title, NEW.description);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_comments_fts_insert
+AFTER INSERT ON comments
+FOR EACH ROW
+BEGIN
+  INSERT INTO comments_fts (rowid, text) VALUES (NEW.id, NEW.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_comments_fts_delete
+AFTER DELETE ON comments
+FOR EACH ROW
+BEGIN
+  INSERT INTO comments_fts (comments_fts, rowid, text) VALUES ('delete', OLD.id, OLD.text);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_comments_fts_update
+AFTER UPDATE OF text ON comments
+FOR EACH ROW
+BEGIN
+  INSERT INTO comments_fts (comments_fts, rowid, text) VALUES ('delete', OLD.id, OLD.text);
+  INSERT INTO comments_fts (rowid, text) VALUES (NEW.id, NEW.text);
+END;
+
+-- ============================================================================
+-- DASHBOARD STATISTICS
+-- Counters maintained by triggers so GET /stats never scans tickets.
+-- ticket_counts: current number of tickets per status / priority / assignee
+-- ticket_daily:  tickets created and resolved per day (history, never decremented)
+-- ticket_open_days: open / in_progress tickets by creation day (openAge buckets)
+-- stats_version: bumped on every change; used as the ETag of GET /stats
+-- Rebuild them with: python init_db.py --rebuild-stats
+-- ============================================================================
+CREATE TABLE IF NOT EXISTS ticket_counts (
+  dimension TEXT NOT NULL CHECK(dimension IN ('status', 'priority', 'assignee')),
+  value TEXT NOT NULL,
+  count INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (dimension, value)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ticket_daily (
+  day TEXT PRIMARY KEY,
+  created INTEGER NOT NULL DEFAULT 0,
+  resolved INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS ticket_open_days (
+  day TEXT PRIMARY KEY,
+  count INTEGER NOT NULL DEFAULT 0
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS stats_version (
+  id INTEGER PRIMARY KEY CHECK(id = 1),
+  version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO stats_version (id, version) VALUES (1, 0);
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_ticket_insert
+AFTER INSERT ON tickets
+FOR EACH ROW
+BEGIN
+  INSERT INTO ticket_counts (dimension, value, count) VALUES ('status', NEW.status, 1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+  INSERT INTO ticket_counts (dimension, value, count) VALUES ('priority', NEW.priority, 1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+  INSERT INTO ticket_counts (dimension, value, count) VALUES ('assignee', COALESCE(NEW.assignee_id, 'unassigned'), 1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+  INSERT INTO ticket_daily (day, created, resolved)
+    VALUES (date(NEW.created_at), 1, NEW.status IN ('resolved', 'closed'))
+    ON CONFLICT (day) DO UPDATE SET created = created + 1, resolved = resolved + excluded.resolved;
+  UPDATE stats_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_ticket_delete
+AFTER DELETE ON tickets
+FOR EACH ROW
+BEGIN
+  UPDATE ticket_counts SET count = count - 1 WHERE dimension = 'status' AND value = OLD.status;
+  UPDATE ticket_counts SET count = count - 1 WHERE dimension = 'priority' AND value = OLD.priority;
+  UPDATE ticket_counts SET count = count - 1
+    WHERE dimension = 'assignee' AND value = CAST(COALESCE(OLD.assignee_id, 'unassigned') AS TEXT);
+  UPDATE stats_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_ticket_update
+AFTER UPDATE OF status, priority, assignee_id ON tickets
+FOR EACH ROW
+WHEN OLD.status IS NOT NEW.status OR OLD.priority IS NOT NEW.priority OR OLD.assignee_id IS NOT NEW.assignee_id
+BEGIN
+  UPDATE ticket_counts SET count = count - 1 WHERE dimension = 'status' AND value = OLD.status;
+  UPDATE ticket_counts SET count = count - 1 WHERE dimension = 'priority' AND value = OLD.priority;
+  UPDATE ticket_counts SET count = count - 1
+    WHERE dimension = 'assignee' AND value = CAST(COALESCE(OLD.assignee_id, 'unassigned') AS TEXT);
+  INSERT INTO ticket_counts (dimension, value, count) VALUES ('status', NEW.status, 1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+  INSERT INTO ticket_counts (dimension, value, count) VALUES ('priority', NEW.priority, 1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+  INSERT INTO ticket_counts (dimension, value, count) VALUES ('assignee', COALESCE(NEW.assignee_id, 'unassigned'), 1)
+    ON CONFLICT (dimension, value) DO UPDATE SET count = count + 1;
+  INSERT INTO ticket_daily (day, created, resolved)
+    SELECT date('now'), 0, 1
+    WHERE OLD.status NOT IN ('resolved', 'closed') AND NEW.status IN ('resolved', 'closed')
+    ON CONFLICT (day) DO UPDATE SET resolved = resolved + 1;
+  UPDATE stats_version SET version = version + 1 WHERE id = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_open_day_insert
+AFTER INSERT ON tickets
+FOR EACH ROW
+WHEN NEW.status IN ('open', 'in_progress')
+BEGIN
+  INSERT INTO ticket_open_days (day, count) VALUES (date(NEW.created_at), 1)
+    ON CONFLICT (day) DO UPDATE SET count = count + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_open_day_delete
+AFTER DELETE ON tickets
+FOR EACH ROW
+WHEN OLD.status IN ('open', 'in_progress')
+BEGIN
+  UPDATE ticket_open_days SET count = count - 1 WHERE day = date(OLD.created_at);
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_stats_open_day_update
+AFTER UPDATE OF status, created_at ON tickets
+FOR EACH ROW
+WHEN (OLD.status IN ('open', 'in_progress')) IS NOT (NEW.status IN ('open', 'in_progress'))
+  OR date(OLD.created_at) IS NOT date(NEW.created_at)
+BEGIN
+  UPDATE ticket_open_days SET count = count - 1
+    WHERE day = date(OLD.created_at) AND OLD.status IN ('open', 'in_progress');
+  INSERT INTO ticket_open_days (day, count)
+    SELECT date(NEW.created_at), 1 WHERE NEW.status IN ('open', 'in_progress')
+    ON CONFLICT (day) DO UPDATE SET count = count + 1;
+  UPDATE stats_version SET version = version + 1 WHERE id = 1;
+END;
 
 -- ============================================================================
--- TRIGGER TO AUTO-UPDATE UPDATED_AT FIELD
+-- CHANGE LOG (delta sync for GET /tickets/changes)
+-- One row per ticket/comment holding the sequence number of its latest
+-- change; deleted rows stay as tombstones (deleted = 1), tickets moved to the
+-- archive database are marked deleted = 2 by the archiver. seq is indexed, so
+-- "what changed since N" is a range scan and MAX(seq) is a single index lookup.
 -- ============================================================================
-CREATE TRIGGER IF NOT EXISTS trg_tickets_updated_at
+CREATE TABLE IF NOT EXISTS change_log (
+  entity TEXT NOT NULL CHECK(entity IN ('ticket', 'comment')),
+  entity_id INTEGER NOT NULL,
+  ticket_id INTEGER NOT NULL,
+  seq INTEGER NOT NULL,
+  deleted INTEGER NOT NULL DEFAULT 0,
+  PRIMARY KEY (entity, entity_id)
+) WITHOUT ROWID;
+
+CREATE UNIQUE INDEX IF NOT EXISTS idx_change_log_seq ON change_log(seq);
+
+CREATE TRIGGER IF NOT EXISTS trg_change_log_ticket_insert
+AFTER INSERT ON tickets
+FOR EACH ROW
+BEGIN
+  INSERT INTO change_log (entity, entity_id, ticket_id, seq, deleted)
+  VALUES ('ticket', NEW.id, NEW.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM change_log), 0)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET seq = excluded.seq, deleted = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_log_ticket_update
 AFTER UPDATE ON tickets
 FOR EACH ROW
 BEGIN
-  UPDATE tickets
-  SET updated_at = datetime('now')
-  WHERE id = OLD.id;
+  INSERT INTO change_log (entity, entity_id, ticket_id, seq, deleted)
+  VALUES ('ticket', NEW.id, NEW.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM change_log), 0)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET seq = excluded.seq, deleted = 0;
 END;
+
+-- BEFORE DELETE: the tombstone must take its seq before the cascade below
+-- forgets the ticket's comments, or it could reuse the seq of the latest one
+-- and MAX(seq) would not move, leaving cached reads and delta syncs behind.
+-- trg_change_log_ticket_delete was the AFTER DELETE version; existing
+-- databases drop it here.
+DROP TRIGGER IF EXISTS trg_change_log_ticket_delete;
+CREATE TRIGGER IF NOT EXISTS trg_change_log_ticket_tombstone
+BEFORE DELETE ON tickets
+FOR EACH ROW
+BEGIN
+  INSERT INTO change_log (entity, entity_id, ticket_id, seq, deleted)
+  VALUES ('ticket', OLD.id, OLD.id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM change_log), 1)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET seq = excluded.seq, deleted = 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_log_comment_insert
+AFTER INSERT ON comments
+FOR EACH ROW
+BEGIN
+  INSERT INTO change_log (entity, entity_id, ticket_id, seq, deleted)
+  VALUES ('comment', NEW.id, NEW.ticket_id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM change_log), 0)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET seq = excluded.seq, deleted = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_log_comment_update
+AFTER UPDATE OF text ON comments
+FOR EACH ROW
+BEGIN
+  INSERT INTO change_log (entity, entity_id, ticket_id, seq, deleted)
+  VALUES ('comment', NEW.id, NEW.ticket_id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM change_log), 0)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET seq = excluded.seq, deleted = 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_change_log_comment_delete
+AFTER DELETE ON comments
+FOR EACH ROW
+WHEN EXISTS (SELECT 1 FROM tickets WHERE id = OLD.ticket_id)
+BEGIN
+  INSERT INTO change_log (entity, entity_id, ticket_id, seq, deleted)
+  VALUES ('comment', OLD.id, OLD.ticket_id, (SELECT COALESCE(MAX(seq), 0) + 1 FROM change_log), 1)
+  ON CONFLICT (entity, entity_id) DO UPDATE SET seq = excluded.seq, deleted = 1;
+END;
+
+-- Comments removed by the cascade of a ticket delete are covered by the
+-- ticket's tombstone; just forget them.
+CREATE TRIGGER IF NOT EXISTS trg_change_log_comment_cascade
+AFTER DELETE ON comments
+FOR EACH ROW
+WHEN NOT EXISTS (SELECT 1 FROM tickets WHERE id = OLD.ticket_id)
+BEGIN
+  DELETE FROM change_log WHERE entity = 'comment' AND entity_id = OLD.id;
+END;
+
+-- ============================================================================
+-- UPDATED_AT
+-- ============================================================================
+-- Every UPDATE issued by the backend sets updated_at itself. The old
+-- trg_tickets_updated_at trigger rewrote the row a second time on each update
+-- (firing several of the UPDATE triggers above again); re-running init_db.py
+-- drops it from existing databases.
+DROP TRIGGER IF EXISTS trg_tickets_updated_at;
@@ -1,8 +1,8 @@
 -- Seed data for helpdesk SQLite DB
 
--- Admin user (password 'changeme')
+-- Admin user (password 'admin123', the default expected by init_db.py)
 INSERT INTO users (username, full_name, password_hash, role)
-VALUES ('admin', 'Julian Albarracin', 'changeme', 'admin');
+VALUES ('admin', 'Julian Albarracin', 'admin123', 'admin');
 
 -- Agent user (password 'changeme')
 INSERT INTO users (username, full_name, password_hash, role)
@@ -9,7 +9,7 @@ import TicketDetail from '@/components/TicketDetail';
 import Login from '@/components/Login';
 import UserManagement from '@/components/UserManagement';
 import auth from '@/lib/auth';
-import { request } from '@/lib/api';
+import { request, subscribeTicketEvents } from '@/lib/api';
 
 function App() {
   const [tickets, setTickets] = useState([]);
@@ -62,6 +62,39 @@ function App() {
     localStorage.setItem('helpdesk_tickets', JSON.stringify(tickets));
   }, [tickets]);
 
+  // Apply server-pushed deltas instead of re-fetching the whole list
+  useEffect(() => {
+    if (!user?.token) return undefined;
+
+    const applyToTicket = (id, fn) => {
+      setTickets((prev) => prev.map((t) => (t.id === id ? fn(t) : t)));
+      setSelectedTicket((prev) => (prev?.id === id ? fn(prev) : prev));
+    };
+
+    return subscribeTicketEvents(user.token, async (type, data) => {
+      if (type === 'ticket.created') {
+        setTickets((prev) => (prev.some((t) => t.id === data.id) ? prev : [data, ...prev]));
+      } else if (type === 'ticket.updated') {
+        applyToTicket(data.id, (t) => ({ ...t, ...data }));
+      } else if (type === 'ticket.deleted') {
+        setTickets((prev) => prev.filter((t) => t.id !== data.id));
+        setSelectedTicket((prev) => (prev?.id === data.id ? null : prev));
+      } else if (type === 'comment.created') {
+        applyToTicket(data.ticket_id, (t) =>
+          (t.comments || []).some((c) => c.id === data.comment.id)
+            ? t
+            : { ...t, comments: [...(t.comments || []), data.comment] }
+        );
+      } else if (type === 'reset') {
+        try {
+          setTickets(await request('/tickets', { method: 'GET', token: user.token }));
+        } catch (err) {
+          console.error('events: failed to refetch tickets', err);
+        }
+      }
+    });
+  }, [user?.token]);
+
   const addTicket = (ticket) => {
     (async () => {
       const u = auth.getUser();
@@ -106,13 +139,15 @@ function App() {
       const u = auth.getUser();
       try {
         if (u?.token) {
-          const updated = await request(`/tickets/${ticketId}`, {
+          // Only the changed fields come back; the comments stay as they are.
+          const changes = await request(`/tickets/${ticketId}`, {
             method: 'PUT',
             body: updates,
             token: u.token,
+            headers: { Prefer: 'return=minimal' },
           });
-          setTickets(tickets.map((t) => (t.id === ticketId ? updated : t)));
-          if (selectedTicket?.id === ticketId) setSelectedTicket(updated);
+          setTickets(tickets.map((t) => (t.id === ticketId ? { ...t, ...changes } : t)));
+          if (selectedTicket?.id === ticketId) setSelectedTicket({ ...selectedTicket, ...changes });
         } else {
           setTickets(
             tickets.map((ticket) =>
@@ -260,7 +295,7 @@ function App() {
         />
 
         <main className="container mx-auto px-4 py-8">
-          <Dashboard tickets={tickets} />
+          <Dashboard tickets={tickets} user={user} />
 
           <TicketList
             tickets={filteredTickets}
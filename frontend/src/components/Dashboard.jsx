@@ -1,14 +1,37 @@
-import React from "react";
+import React, { useEffect, useState } from "react";
 import { motion } from "framer-motion";
 import { AlertCircle, CheckCircle, Clock, TrendingUp } from "lucide-react";
+import { request } from "@/lib/api";
 
-const Dashboard = ({ tickets }) => {
-  const stats = {
-    total: tickets.length,
-    open: tickets.filter((t) => t.status === "open").length,
-    inProgress: tickets.filter((t) => t.status === "in-progress").length,
-    closed: tickets.filter((t) => t.status === "closed").length,
-  };
+const Dashboard = ({ tickets, user }) => {
+  // Server-side counters (GET /stats); the browser revalidates them with
+  // If-None-Match, so refreshing after every change is cheap.
+  const [serverStats, setServerStats] = useState(null);
+
+  useEffect(() => {
+    if (!user?.token) return undefined;
+    let cancelled = false;
+    request("/stats", { token: user.token })
+      .then((data) => !cancelled && setServerStats(data))
+      .catch(() => !cancelled && setServerStats(null));
+    return () => {
+      cancelled = true;
+    };
+  }, [user?.token, tickets]);
+
+  const stats = serverStats
+    ? {
+        total: serverStats.total,
+        open: serverStats.byStatus.open || 0,
+        inProgress: serverStats.byStatus.in_progress || 0,
+        closed: (serverStats.byStatus.closed || 0) + (serverStats.byStatus.resolved || 0),
+      }
+    : {
+        total: tickets.length,
+        open: tickets.filter((t) => t.status === "open").length,
+        inProgress: tickets.filter((t) => t.status === "in-progress").length,
+        closed: tickets.filter((t) => t.status === "closed").length,
+      };
 
   const cards = [
     {
@@ -1,11 +1,46 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
 import { motion } from 'framer-motion';
 import { X, Trash2, MessageSquare, Send } from 'lucide-react';
 import { Button } from '@/components/ui/button';
 import { toast } from '@/components/ui/use-toast';
+import { request } from '@/lib/api';
 
-const TicketDetail = ({ ticket, onClose, onUpdate, onDelete, onAddComment }) => {
+const COMMENTS_PAGE = 50;
+
+const TicketDetail = ({ ticket, user, onClose, onUpdate, onDelete, onAddComment }) => {
   const [comment, setComment] = useState('');
+  // Comment thread read from GET /tickets/{id} one page at a time; null until
+  // the first page arrives (or without a session), then ticket.comments is used.
+  const [thread, setThread] = useState(null);
+  const [openedWith] = useState(() => new Set((ticket.comments || []).map((c) => c.id)));
+
+  const loadComments = async (cursor) => {
+    if (!user?.token) return;
+    const params = new URLSearchParams({ comments_limit: COMMENTS_PAGE });
+    if (cursor) params.set('comments_cursor', cursor);
+    try {
+      const detail = await request(`/tickets/${ticket.id}?${params}`, { token: user.token });
+      setThread((prev) => ({
+        comments: [...(cursor && prev ? prev.comments : []), ...detail.comments],
+        next: detail.nextCommentsCursor,
+        count: detail.commentCount,
+      }));
+    } catch (err) {
+      // keep showing the comments that came with the ticket list
+    }
+  };
+
+  useEffect(() => {
+    setThread(null);
+    loadComments(null);
+  }, [ticket.id, user?.token]);
+
+  // Comments added while the detail is open are appended by the parent to
+  // ticket.comments; show them after the last page of the thread.
+  const loadedIds = new Set((thread?.comments || []).map((c) => c.id));
+  const added = (ticket.comments || []).filter((c) => !openedWith.has(c.id) && !loadedIds.has(c.id));
+  const comments = thread ? [...thread.comments, ...(thread.next ? [] : added)] : ticket.comments || [];
+  const commentCount = thread ? thread.count + added.length : comments.length;
 
   const handleStatusChange = (newStatus) => {
     onUpdate(ticket.id, { status: newStatus });
@@ -158,12 +193,12 @@ const TicketDetail = ({ ticket, onClose, onUpdate, onDelete, onAddComment }) =>
             <div className="flex items-center gap-2 mb-4">
               <MessageSquare className="w-5 h-5 text-purple-300" />
               <h3 className="text-lg font-semibold text-purple-200">
-                Comentarios ({ticket.comments?.length || 0})
+                Comentarios ({commentCount})
               </h3>
             </div>
 
             <div className="space-y-4 mb-4">
-              {ticket.comments?.map((comment) => (
+              {comments.map((comment) => (
                 <motion.div
                   key={comment.id}
                   initial={{ opacity: 0, x: -20 }}
@@ -179,6 +214,14 @@ const TicketDetail = ({ ticket, onClose, onUpdate, onDelete, onAddComment }) =>
                   <p className="text-white">{comment.text}</p>
                 </motion.div>
               ))}
+              {thread?.next && (
+                <Button
+                  onClick={() => loadComments(thread.next)}
+                  className="w-full bg-white/10 hover:bg-white/20 text-purple-200"
+                >
+                  Cargar más comentarios
+                </Button>
+              )}
             </div>
 
             <form onSubmit={handleAddComment} className="flex gap-3">
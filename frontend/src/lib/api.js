@@ -1,7 +1,7 @@
 const API_BASE = import.meta.env.VITE_API_URL || "http://localhost:8000";
 
-async function request(path, { method = "GET", body, token } = {}) {
-  const headers = { "Content-Type": "application/json" };
+async function request(path, { method = "GET", body, token, headers: extra } = {}) {
+  const headers = { "Content-Type": "application/json", ...extra };
   if (token) headers["Authorization"] = `Bearer ${token}`;
 
   const res = await fetch(`${API_BASE}${path}`, {
@@ -17,4 +17,16 @@ async function request(path, { method = "GET", body, token } = {}) {
   return res.json();
 }
 
-export { API_BASE, request };
+// Subscribe to the backend change feed (Server-Sent Events).
+// EventSource reconnects on its own and resends Last-Event-ID, so the server
+// replays whatever was missed. Returns a function that closes the stream.
+function subscribeTicketEvents(token, onEvent) {
+  const source = new EventSource(`${API_BASE}/events?token=${encodeURIComponent(token)}`);
+  const types = ["ticket.created", "ticket.updated", "ticket.deleted", "comment.created", "reset"];
+  types.forEach((type) =>
+    source.addEventListener(type, (e) => onEvent(type, e.data ? JSON.parse(e.data) : {}))
+  );
+  return () => source.close();
+}
+
+export { API_BASE, request, subscribeTicketEvents };